@@ -0,0 +1,153 @@
+"""
+Gera exportações sintéticas no mesmo formato do portal, para benchmark.
+
+Cada funcionário recebe uma pasta no layout do modo --lote:
+
+    RAIZ/func001/PONTO_HTML/MM_AAAA.html
+    RAIZ/func001/ferias.txt, atestados.txt, aniversario.txt, abonos.txt, pontos_manuais.txt
+
+Uso:
+    python -m benchmarks.gerar_dados RAIZ --funcionarios 10 --meses 12 --densidade 0.9
+"""
+import argparse
+import calendar
+import random
+from datetime import date, timedelta
+from pathlib import Path
+
+# Atributos no estilo Wicket que dão às linhas reais o seu volume
+_ONBLUR = (
+    "if (function(){{return Wicket.$(&#39;{id}&#39;) != null;}}.bind(this)()) "
+    "{{ Wicket.showIncrementally(&#39;{id}--ajax-indicator&#39;);}}var wcall=wicketAjaxPost("
+    "&#39;?wicket:interface=:7:content:form:container:listaPontosContainer:listView:{n}:{campo}"
+    "::IBehaviorListener:1:-1&#39;, wicketSerialize(Wicket.$(&#39;{id}&#39;)),function() "
+    "{{ ;Wicket.hideIncrementally(&#39;{id}--ajax-indicator&#39;);}}.bind(this));"
+)
+
+_CABECALHO = """<!DOCTYPE html>
+<html xmlns:wicket="http://wicket.apache.org"><head><meta charset="utf-8"><title>Folha de ponto</title>
+<script type="text/javascript">{script}</script>
+</head><body><form><div class="container"><table class="listaPontos"><tbody>
+"""
+_RODAPE = """</tbody></table></div></form></body></html>
+"""
+
+
+def _hhmm(minutos: int) -> str:
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+
+def _linha(n: int, dia: date, entrada: int, saida: int) -> str:
+    id_e, id_s = f"id{2 * n:x}", f"id{2 * n + 1:x}"
+    return f"""<tr onmouseover="initializeImageComponent()">
+  <td><label></label><ul><li><a class="icone icon-clock" title="Lançar ponto em Atraso"></a></li></ul>
+    <label>TRABALHANDO</label></td>
+  <td><span><a href="javascript:void(0)" class="icone aprovado"></a></span></td>
+  <td class="folhaponto-listpontos">
+    <a class="fotoLink"></a>
+    <input type="text" class="entrada" value="{_hhmm(entrada)}" name="listView:{n}:entrada" id="{id_e}" onblur="{_ONBLUR.format(id=id_e, n=n, campo='entrada')}" disabled="disabled" style="width: 50px;">
+    <a class="fotoLink"></a>
+    <input type="text" class="saida" value="{_hhmm(saida)}" name="listView:{n}:saida" id="{id_s}" onblur="{_ONBLUR.format(id=id_s, n=n, campo='saida')}" title="Ponto fechado em {dia:%d/%m/%Y}" disabled="disabled" style="width: 50px;">
+  </td>
+  <td><label>{_hhmm(saida - entrada)}</label></td>
+  <td><label></label></td>
+  <td><span class="icone mapa cursor"></span><span>Brasília, Distrito Federal</span></td>
+</tr>
+"""
+
+
+def gerar_html_mes(ano: int, mes: int, rng: random.Random,
+                   densidade: float = 0.9, max_periodos: int = 2, preenchimento_kb: int = 0) -> str:
+    """
+    HTML de um mês: em cada dia útil, com probabilidade `densidade`, de 1 a
+    `max_periodos` períodos entrada/saída. `preenchimento_kb` acrescenta
+    script inerte para aproximar o tamanho das exportações reais.
+    """
+    partes = [_CABECALHO.format(script="var x=0;" * (preenchimento_kb * 128))]
+    n = 0
+    for dia in range(1, calendar.monthrange(ano, mes)[1] + 1):
+        d = date(ano, mes, dia)
+        if d.weekday() >= 5 or rng.random() >= densidade:
+            continue
+        inicio = 7 * 60 + rng.randrange(0, 120)
+        for _ in range(rng.randint(1, max_periodos)):
+            fim = inicio + rng.randrange(120, 300)
+            if fim >= 24 * 60:
+                break
+            partes.append(_linha(n, d, inicio, fim))
+            n += 1
+            inicio = fim + rng.randrange(30, 90)
+    partes.append(_RODAPE)
+    return "".join(partes)
+
+
+def _datas_aleatorias(rng: random.Random, inicio: date, dias: int, quantidade: int) -> list[date]:
+    return sorted({inicio + timedelta(days=rng.randrange(dias)) for _ in range(quantidade)})
+
+
+def gerar_funcionario(pasta: Path, ano: int, mes_inicial: int, meses: int, rng: random.Random,
+                      densidade: float = 0.9, max_periodos: int = 2, preenchimento_kb: int = 0):
+    """Gera os HTML de `meses` meses a partir de mes_inicial/ano e as listas TXT."""
+    pasta_html = pasta / "PONTO_HTML"
+    pasta_html.mkdir(parents=True, exist_ok=True)
+
+    inicio = date(ano, mes_inicial, 1)
+    a, m = ano, mes_inicial
+    for _ in range(meses):
+        html = gerar_html_mes(a, m, rng, densidade, max_periodos, preenchimento_kb)
+        (pasta_html / f"{m:02d}_{a}.html").write_text(html, encoding="utf-8")
+        a, m = (a + 1, 1) if m == 12 else (a, m + 1)
+    total_dias = (date(a, m, 1) - inicio).days
+
+    ini_ferias = inicio + timedelta(days=rng.randrange(max(total_dias - 30, 1)))
+    (pasta / "ferias.txt").write_text(
+        f"{ini_ferias.isoformat()};{(ini_ferias + timedelta(days=rng.randrange(10, 30))).isoformat()}\n",
+        encoding="utf-8")
+    for nome, qtd in (("atestados.txt", 3), ("abonos.txt", 2), ("aniversario.txt", 1)):
+        datas = _datas_aleatorias(rng, inicio, total_dias, qtd)
+        (pasta / nome).write_text("".join(f"{d.isoformat()}\n" for d in datas), encoding="utf-8")
+
+    linhas = []
+    for d in _datas_aleatorias(rng, inicio, total_dias, 4):
+        e1 = 8 * 60 + rng.randrange(60)
+        s1 = e1 + 240
+        e2 = s1 + 60
+        linhas.append(f"{d.isoformat()};{_hhmm(e1)};{_hhmm(s1)};{_hhmm(e2)};{_hhmm(e2 + 240)}\n")
+    (pasta / "pontos_manuais.txt").write_text("".join(linhas), encoding="utf-8")
+
+
+def gerar_lote(raiz: Path, funcionarios: int, meses: int, ano: int = 2025, mes_inicial: int = 1,
+               densidade: float = 0.9, max_periodos: int = 2, preenchimento_kb: int = 0,
+               semente: int = 0) -> list[Path]:
+    """N funcionários × M meses no layout do modo --lote. Devolve as pastas criadas."""
+    rng = random.Random(semente)
+    pastas = []
+    for i in range(1, funcionarios + 1):
+        pasta = Path(raiz) / f"func{i:03d}"
+        gerar_funcionario(pasta, ano, mes_inicial, meses, rng, densidade, max_periodos, preenchimento_kb)
+        pastas.append(pasta)
+    return pastas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera exportações sintéticas do portal de ponto.")
+    parser.add_argument("raiz", type=Path)
+    parser.add_argument("--funcionarios", type=int, default=1)
+    parser.add_argument("--meses", type=int, default=12)
+    parser.add_argument("--ano", type=int, default=2025)
+    parser.add_argument("--densidade", type=float, default=0.9,
+                        help="probabilidade de um dia útil ter batidas (0 a 1)")
+    parser.add_argument("--max-periodos", type=int, default=2,
+                        help="máximo de pares entrada/saída por dia")
+    parser.add_argument("--preenchimento-kb", type=int, default=0,
+                        help="script inerte por arquivo, para simular o tamanho real (KB)")
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    pastas = gerar_lote(args.raiz, args.funcionarios, args.meses, args.ano, 1, args.densidade,
+                        args.max_periodos, args.preenchimento_kb, args.semente)
+    print(f"{len(pastas)} funcionário(s) × {args.meses} mês(es) gerados em {args.raiz}")
+
+
+if __name__ == "__main__":
+    main()
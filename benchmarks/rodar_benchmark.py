@@ -0,0 +1,252 @@
+"""
+Benchmark por etapa sobre dados sintéticos (ver `gerar_dados.py`).
+
+Mede separadamente:
+    parse        extrair_horas_por_dia em todos os HTML
+    regras       processar_mes com o parse já feito (só regras e montagem dos DataFrames)
+    consolidado  montar_consolidado
+    excel        gerar_arquivo_excel
+
+Para cada etapa reporta o melhor tempo entre as repetições, a vazão e o pico
+de memória alocada (tracemalloc, numa passada à parte para não distorcer o tempo).
+
+Uso:
+    python -m benchmarks.rodar_benchmark --funcionarios 5 --meses 12
+    python -m benchmarks.rodar_benchmark --salvar-baseline base.json
+    python -m benchmarks.rodar_benchmark --baseline base.json --tolerancia 0.15
+"""
+import argparse
+import contextlib
+import copy
+import io
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.gerar_dados import gerar_lote
+from main import carregar_listas, listar_htmls, montar_resumo_txt
+from src.excel.consolidado import montar_consolidado
+from src.excel.writer import gerar_arquivo_excel
+from src.parser.formatos import extrair_horas_por_dia
+from src.parser.html_parser import MODO_PADRAO, MODOS
+from src.regras.regras_negocio import processar_mes
+
+ETAPAS = ("parse", "regras", "consolidado", "excel")
+TOLERANCIA_PADRAO = 0.20
+
+
+class _ParseEmMemoria:
+    """Faz o papel do CacheParse com o parse já pronto, para medir só as regras."""
+
+    def __init__(self, parses: dict):
+        self.parses = parses
+
+    def extrair(self, html_file, modo=MODO_PADRAO, conteudo=None, hash_html=None):
+        # processar_mes altera o dicionário recebido (pontos manuais)
+        return copy.copy(self.parses[html_file])
+
+
+def _carregar_funcionarios(raiz: Path) -> list[dict]:
+    funcionarios = []
+    for pasta in sorted(p for p in raiz.iterdir() if (p / "PONTO_HTML").is_dir()):
+        with contextlib.redirect_stdout(io.StringIO()):
+            listas = carregar_listas(pasta)
+        funcionarios.append({
+            "nome": pasta.name,
+            "htmls": listar_htmls(pasta / "PONTO_HTML"),
+            "listas": listas,
+        })
+    return funcionarios
+
+
+def _etapa_parse(funcionarios, modo):
+    return {f["nome"]: {h: extrair_horas_por_dia(h, modo=modo) for h in f["htmls"]}
+            for f in funcionarios}
+
+
+def _etapa_regras(funcionarios, parses):
+    por_funcionario = {}
+    for f in funcionarios:
+        cache = _ParseEmMemoria(parses[f["nome"]])
+        resultados = []
+        for h in f["htmls"]:
+            df_mes, resumo = processar_mes(h, *f["listas"], cache=cache)
+            resultados.append({
+                "sheet": resumo["nome_aba"],
+                "ano": resumo["ano"],
+                "mes": resumo["mes"],
+                "df": df_mes,
+                "dias": resumo["dias"],
+                "resumo": {
+                    "Total Trabalhado": resumo["total_trabalhado"],
+                    "Total Previsto": resumo["total_previsto"],
+                    "Saldo do dia": resumo["saldo_dia"],
+                },
+            })
+        por_funcionario[f["nome"]] = resultados
+    return por_funcionario
+
+
+def _etapa_consolidado(funcionarios, resultados):
+    return {f["nome"]: montar_consolidado(resultados[f["nome"]]) for f in funcionarios}
+
+
+def _etapa_excel(funcionarios, resultados, consolidados, pasta_saida, memoria_constante):
+    for f in funcionarios:
+        df_txt = montar_resumo_txt(*f["listas"])
+        with contextlib.redirect_stdout(io.StringIO()):
+            gerar_arquivo_excel(pasta_saida / f"{f['nome']}.xlsx", resultados[f["nome"]],
+                                consolidados[f["nome"]], df_txt, memoria_constante)
+
+
+def _medir(funcao, repeticoes: int, com_memoria: bool):
+    """Melhor tempo entre `repeticoes` chamadas; o pico de memória vem de uma chamada extra."""
+    melhor = float("inf")
+    retorno = None
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        retorno = funcao()
+        melhor = min(melhor, time.perf_counter() - t0)
+
+    pico = None
+    if com_memoria:
+        tracemalloc.start()
+        try:
+            funcao()
+            pico = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return retorno, melhor, pico
+
+
+def rodar(raiz: Path, repeticoes: int = 3, modo: str = MODO_PADRAO,
+          com_memoria: bool = True, memoria_constante: bool = False) -> dict:
+    """Executa as quatro etapas sobre os funcionários em `raiz` e devolve as métricas."""
+    funcionarios = _carregar_funcionarios(raiz)
+    htmls = [h for f in funcionarios for h in f["htmls"]]
+    if not htmls:
+        raise SystemExit(f"Nenhum HTML encontrado em {raiz}")
+    mb = sum(h.stat().st_size for h in htmls) / (1024 * 1024)
+
+    metricas = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        parses, t, pico = _medir(lambda: _etapa_parse(funcionarios, modo), repeticoes, com_memoria)
+        metricas["parse"] = {"segundos": t, "pico_bytes": pico,
+                             "vazao": len(htmls) / t, "unidade": "arquivos/s", "mb_s": mb / t}
+
+        resultados, t, pico = _medir(lambda: _etapa_regras(funcionarios, parses), repeticoes, com_memoria)
+        dias = sum(len(r["df"]) - 1 for rs in resultados.values() for r in rs)
+        metricas["regras"] = {"segundos": t, "pico_bytes": pico,
+                              "vazao": dias / t, "unidade": "dias/s"}
+
+        consolidados, t, pico = _medir(lambda: _etapa_consolidado(funcionarios, resultados),
+                                       repeticoes, com_memoria)
+        metricas["consolidado"] = {"segundos": t, "pico_bytes": pico,
+                                   "vazao": len(htmls) / t, "unidade": "meses/s"}
+
+        pasta_saida = Path(tmp)
+        _, t, pico = _medir(lambda: _etapa_excel(funcionarios, resultados, consolidados,
+                                                 pasta_saida, memoria_constante),
+                            repeticoes, com_memoria)
+        linhas = dias + sum(len(c) for c in consolidados.values())
+        metricas["excel"] = {"segundos": t, "pico_bytes": pico,
+                             "vazao": linhas / t, "unidade": "linhas/s"}
+
+    return {
+        "dados": {"funcionarios": len(funcionarios), "arquivos": len(htmls),
+                  "megabytes": round(mb, 2), "dias": dias},
+        "parametros": {"repeticoes": repeticoes, "modo_parser": modo,
+                       "memoria_constante": memoria_constante},
+        "etapas": metricas,
+    }
+
+
+def comparar(atual: dict, baseline: dict, tolerancia: float = TOLERANCIA_PADRAO) -> list[str]:
+    """Etapas cujo tempo piorou mais que `tolerancia` (fração) em relação à baseline."""
+    regressoes = []
+    for etapa in ETAPAS:
+        antes = baseline.get("etapas", {}).get(etapa)
+        agora = atual["etapas"].get(etapa)
+        if not antes or not agora:
+            continue
+        razao = agora["segundos"] / antes["segundos"]
+        if razao > 1 + tolerancia:
+            regressoes.append(f"{etapa}: {antes['segundos']:.3f}s -> {agora['segundos']:.3f}s "
+                              f"({(razao - 1) * 100:+.0f}%)")
+    return regressoes
+
+
+def _imprimir(relatorio: dict, baseline: dict | None = None):
+    d = relatorio["dados"]
+    print(f"📊 {d['funcionarios']} funcionário(s), {d['arquivos']} arquivo(s), "
+          f"{d['megabytes']} MB, {d['dias']} dia(s)\n")
+    print(f"{'etapa':<12} {'tempo':>9} {'vazão':>22} {'pico mem':>10} {'vs base':>8}")
+    for etapa in ETAPAS:
+        m = relatorio["etapas"][etapa]
+        pico = f"{m['pico_bytes'] / (1024 * 1024):.1f} MB" if m["pico_bytes"] is not None else "-"
+        vazao = f"{m['vazao']:,.0f} {m['unidade']}"
+        delta = ""
+        if baseline and etapa in baseline.get("etapas", {}):
+            delta = f"{(m['segundos'] / baseline['etapas'][etapa]['segundos'] - 1) * 100:+.0f}%"
+        print(f"{etapa:<12} {m['segundos']:>8.3f}s {vazao:>22} {pico:>10} {delta:>8}")
+    print()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark por etapa do consolidador de ponto.")
+    parser.add_argument("--dados", type=Path, metavar="RAIZ",
+                        help="usa uma raiz já gerada (layout do --lote) em vez de gerar dados")
+    parser.add_argument("--funcionarios", type=int, default=3)
+    parser.add_argument("--meses", type=int, default=12)
+    parser.add_argument("--densidade", type=float, default=0.9)
+    parser.add_argument("--max-periodos", type=int, default=2)
+    parser.add_argument("--preenchimento-kb", type=int, default=300,
+                        help="script inerte por arquivo; ~300 KB aproxima as exportações reais")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--modo", choices=MODOS, default=MODO_PADRAO)
+    parser.add_argument("--sem-memoria", action="store_true",
+                        help="não mede o pico de memória (pula a passada com tracemalloc)")
+    parser.add_argument("--memoria-constante", action="store_true")
+    parser.add_argument("--json", type=Path, help="grava o relatório completo neste arquivo")
+    parser.add_argument("--baseline", type=Path, help="compara com um relatório salvo antes")
+    parser.add_argument("--salvar-baseline", type=Path, metavar="ARQ")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO,
+                        help="piora relativa aceita antes de acusar regressão (padrão 0.20)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raiz = args.dados
+        if raiz is None:
+            raiz = Path(tmp)
+            gerar_lote(raiz, args.funcionarios, args.meses, densidade=args.densidade,
+                       max_periodos=args.max_periodos, preenchimento_kb=args.preenchimento_kb,
+                       semente=args.semente)
+        relatorio = rodar(raiz, args.repeticoes, args.modo, not args.sem_memoria,
+                          args.memoria_constante)
+
+    baseline = None
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    _imprimir(relatorio, baseline)
+
+    for destino in (args.json, args.salvar_baseline):
+        if destino:
+            destino.write_text(json.dumps(relatorio, indent=2, ensure_ascii=False), encoding="utf-8")
+            print(f"💾 Relatório salvo em {destino}")
+
+    if baseline is not None:
+        regressoes = comparar(relatorio, baseline, args.tolerancia)
+        if regressoes:
+            print("⚠️  Regressões acima da tolerância:")
+            for r in regressoes:
+                print(f"   {r}")
+            sys.exit(1)
+        print("✅ Nenhuma regressão acima da tolerância.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,101 +1,383 @@
+import argparse
+import contextlib
+import cProfile
+import functools
+import hashlib
+import io
+import itertools
+import pstats
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime
 from pathlib import Path
 from src.data.arquivos_txt import carregar_lista_txt, carregar_pontos_manuais
-from src.regras.regras_negocio import processar_mes
-from src.excel.consolidado import montar_consolidado
-from src.excel.writer import gerar_arquivo_excel
+from src.parser.cache_parse import CacheParse, hash_arquivo
+from src.parser.html_parser import MODO_STREAM, MODOS
+from src.regras.regras_negocio import processar_mes, classificar_mes, obter_mes_ano, gerar_nome_aba
+from src.regras.calendario import indice_calendario
+from src.regras.periodos import GRANULARIDADES, GRANULARIDADE_MES
+from src.regras.validacao import verificar_resultados, contar_problemas, salvar_relatorio
+from src.export.colunar import exportar_resultados, FORMATOS
+from src.utils.manifesto import Manifesto
+from src.utils.observador import observar
+from src.utils.metricas import Metricas, medir, rastrear_memoria, agora_iso
+from src.utils.pipeline import executar_pipeline
+from src.utils.time_utils import minutos_para_hhmm
+
+# pandas e xlsxwriter (via src.excel) só são importados por quem grava planilha:
+# os subcomandos rápidos (`listas`, `saldo`) respondem sem carregá-los
 
 PASTA_HTML = "PONTO_HTML"
 PASTA_EXCEL = "PONTO_EXCEL"
+PASTA_CACHE = "PONTO_CACHE"
+PASTA_EXPORT = "PONTO_EXPORT"
+
+# Manifestos de execução (um por planilha de saída), dentro da pasta de cache
+PASTA_MANIFESTOS = "manifestos"
+
+# Arquivos de folha reconhecidos na pasta (o formato é detectado pelo conteúdo)
+PADROES_FOLHA = ("*.html", "*.htm", "*.csv")
+
+ARQ_SAIDA = "PONTOS_CONSOLIDADOS.xlsx"
+ARQ_RESUMO_LOTE = "RESUMO_FUNCIONARIOS.xlsx"
+
+# Nome gravado no banco (--banco) fora do modo lote; no lote vale o nome da pasta
+FUNCIONARIO_PADRAO = "funcionario"
 
 ARQ_FERIAS = "ferias.txt"
 ARQ_ATESTADO = "atestados.txt"
 ARQ_ANIVERSARIO = "aniversario.txt"
 ARQ_ABONO = "abonos.txt"
 
-def main():
-    base_dir = Path(__file__).resolve().parent
-    pasta_html = base_dir / PASTA_HTML
-    pasta_excel = base_dir / PASTA_EXCEL
-    pasta_excel.mkdir(exist_ok=True)
+# Extrator do HTML: "stream" (padrão, sem árvore DOM), "dom" (BeautifulSoup completo)
+# ou "regex" (mais rápido; cai no "dom" quando o arquivo foge do formato do portal)
+MODO_PARSER = MODO_STREAM
 
-    data_dir = base_dir / "src" / "data"
+def _granularidades(texto: str) -> tuple[str, ...]:
+    """'semana,ano' -> ('semana', 'ano'), na ordem dada e sem repetição."""
+    itens = tuple(dict.fromkeys(p.strip().lower() for p in texto.split(",") if p.strip()))
+    invalidas = [g for g in itens if g not in GRANULARIDADES]
+    if not itens or invalidas:
+        raise argparse.ArgumentTypeError(f"use uma lista separada por vírgulas de: {', '.join(GRANULARIDADES)}")
+    return itens
 
-    # Carrega listas de dias especiais
-    ferias = carregar_lista_txt(data_dir, ARQ_FERIAS)
-    atestados = carregar_lista_txt(data_dir, ARQ_ATESTADO)
-    aniversario = carregar_lista_txt(data_dir, ARQ_ANIVERSARIO)
-    abonos = carregar_lista_txt(data_dir, ARQ_ABONO)
-    pontos_manuais = carregar_pontos_manuais(data_dir)
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Converte as folhas de ponto HTML em planilha Excel.")
+    parser.add_argument("--sem-cache", action="store_true",
+                        help="ignora o cache de parse e o manifesto: relê todos os HTML e regrava a planilha")
+    parser.add_argument("--limpar-cache", action="store_true",
+                        help="apaga o cache de parse antes de processar")
+    parser.add_argument("--workers", type=int, default=1, metavar="N",
+                        help="processa os meses (ou, com --lote, os funcionários) em N processos "
+                             "paralelos (padrão: 1, em série)")
+    parser.add_argument("--parser", choices=MODOS, default=MODO_PARSER, dest="modo_parser",
+                        help=f"extrator do HTML (padrão: {MODO_PARSER}); regex é o mais rápido e "
+                             "volta ao dom sozinho se o arquivo não tiver o formato esperado")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="lê os HTML em paralelo com o processamento (filas limitadas entre as "
+                             "etapas); útil com a pasta de exports num compartilhamento de rede")
+    parser.add_argument("--memoria-constante", action="store_true",
+                        help="grava o Excel no modo constant_memory do xlsxwriter (menos RAM em lotes grandes)")
+    parser.add_argument("--exportar", choices=FORMATOS, metavar="FORMATO",
+                        help="também exporta os dias em formato colunar: "
+                             "parquet, arrow, csv ou auto (parquet se houver pyarrow, senão csv)")
+    parser.add_argument("--agregados", type=_granularidades, default=(), metavar="LISTA",
+                        help="acrescenta a aba AGREGADOS com totais por período "
+                             f"({','.join(GRANULARIDADES)}; ex.: semana,trimestre,ano)")
+    parser.add_argument("--por-tipo", action="store_true",
+                        help="na aba AGREGADOS, abre cada período por tipo do dia (Férias, Atestado, ...)")
+    parser.add_argument("--anomalias", type=Path, metavar="ARQ",
+                        help="grava em ARQ (CSV) as anomalias encontradas nas batidas "
+                             "(no lote, de todos os funcionários)")
+    parser.add_argument("--aba-anomalias", action="store_true",
+                        help="acrescenta a aba ANOMALIAS à planilha")
+    parser.add_argument("--watch", action="store_true",
+                        help="fica em execução e recalcula a planilha quando um HTML ou TXT muda")
+    parser.add_argument("--lote", type=Path, metavar="RAIZ",
+                        help="modo lote: uma subpasta por funcionário em RAIZ, cada uma com seus "
+                             "HTML (na própria pasta ou em PONTO_HTML/) e arquivos TXT")
+    parser.add_argument("--saida", type=Path, metavar="PASTA",
+                        help=f"pasta das planilhas geradas (padrão: {PASTA_EXCEL}/)")
+    parser.add_argument("--banco", type=Path, metavar="ARQ",
+                        help="grava batidas, dias e listas num banco SQLite (só os meses alterados "
+                             "são regravados); usado também pelo subcomando historico")
+    parser.add_argument("--funcionario", default=FUNCIONARIO_PADRAO, metavar="NOME",
+                        help=f"nome do funcionário no banco fora do --lote (padrão: {FUNCIONARIO_PADRAO})")
+    parser.add_argument("--metricas", type=Path, metavar="ARQ",
+                        help="grava tempos por etapa e contadores da execução em JSON")
+    parser.add_argument("--perfil", type=Path, metavar="ARQ",
+                        help="roda sob cProfile e grava as estatísticas em ARQ (só o processo principal)")
+    parser.add_argument("--rastrear-memoria", action="store_true",
+                        help="mede o pico de memória com tracemalloc (só o processo principal)")
 
-    print("📄 Carregando arquivos TXT...\n")
-    
-    print(f"• Férias: {len(ferias)} dias")
-    print(f"• Atestados: {len(atestados)} dias")
-    print(f"• Aniversário: {len(aniversario)} dia(s)")
-    print(f"• Abonos: {len(abonos)} dias")
-    print(f"• Pontos manuais: {len(pontos_manuais)} registros\n")
+    comandos = parser.add_subparsers(dest="comando", metavar="COMANDO",
+                                     help="consultas rápidas, sem gerar planilha (sem pandas nem xlsxwriter)")
+    comandos.add_parser("listas", help="mostra o que foi lido dos arquivos TXT")
+    cmd_saldo = comandos.add_parser("saldo", help="totais e saldo do mês atual (ou do mais recente)")
+    cmd_saldo.add_argument("--mes", metavar="MM/AAAA", help="mês a consultar")
+    cmd_saldo.add_argument("--todos", action="store_true", help="todos os meses e o total geral")
+    cmd_historico = comandos.add_parser("historico", help="totais por mês lidos do banco (--banco), sem reler HTML")
+    cmd_historico.add_argument("nome", nargs="?", metavar="FUNCIONARIO", help="só este funcionário")
+    cmd_historico.add_argument("--ano", type=int, metavar="AAAA", help="só este ano")
+    cmd_historico.add_argument("--em", type=date.fromisoformat, metavar="AAAA-MM-DD",
+                               help="banco de horas no fim desta data (em vez dos totais por mês)")
+    cmd_historico.add_argument("--desde", type=date.fromisoformat, metavar="AAAA-MM-DD",
+                               help="com --em: só o saldo acumulado entre as duas datas")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers deve ser >= 1")
+    if args.watch and args.lote is not None:
+        parser.error("--watch não pode ser usado com --lote")
+    if args.watch and (args.metricas or args.perfil or args.rastrear_memoria):
+        parser.error("--metricas, --perfil e --rastrear-memoria não se aplicam ao --watch")
+    if args.comando is not None and (args.watch or args.lote is not None):
+        parser.error(f"o comando {args.comando} não pode ser usado com --watch ou --lote")
+    if args.comando == "saldo" and args.mes:
+        try:
+            mes, ano = (int(p) for p in args.mes.split("/"))
+            if not 1 <= mes <= 12:
+                raise ValueError
+        except ValueError:
+            parser.error("--mes deve estar no formato MM/AAAA")
+        args.mes = (ano, mes)
+    if args.por_tipo and not args.agregados:
+        parser.error("--por-tipo precisa de --agregados")
+    if args.comando == "historico" and args.banco is None:
+        parser.error("o comando historico precisa de --banco ARQ")
+    if args.comando == "historico" and args.desde is not None and args.em is None:
+        parser.error("--desde precisa de --em")
+    return args
 
-    print("📄 Lendo arquivos HTML...\n")
 
-    # Lista arquivos HTML/HTM na pasta
-    html_files = sorted(pasta_html.glob("*.html")) + sorted(pasta_html.glob("*.htm"))
-    html_files = sorted(dict.fromkeys(html_files), key=lambda p: p.name)
+def _processar_arquivo(html_file, ferias, atestados, aniversario, abonos, pontos_manuais, cache,
+                       com_metricas: bool = False, modo_parser: str = MODO_PARSER,
+                       conteudo: bytes | None = None, hash_html: str | None = None):
+    """
+    Processa um HTML isolado (em série ou dentro do pool de processos).
 
-    if not html_files:
-        print(f"Nenhum HTML/HTM encontrado em: {pasta_html}")
-        return
+    Retorna (df_mes, resumo, erro, acertos_cache, falhas_cache, metricas). Uma
+    falha vira `erro` em vez de exceção, para não interromper os demais meses.
+    Com `com_metricas`, `metricas` traz os tempos deste mês para o processo principal somar.
+    `conteudo` é o HTML já lido (modo pipeline); sem ele, o arquivo é lido aqui.
+    `hash_html` é o hash do arquivo já calculado pelo manifesto, reaproveitado no cache.
+    """
+    acertos = cache.acertos if cache is not None else 0
+    falhas = cache.falhas if cache is not None else 0
+    metricas = Metricas() if com_metricas else None
+    try:
+        with medir(metricas, "processar_mes", html_file.name):
+            df_mes, resumo = processar_mes(html_file, ferias, atestados, aniversario, abonos, pontos_manuais,
+                                           modo_parser=modo_parser, cache=cache, metricas=metricas,
+                                           conteudo=conteudo, hash_html=hash_html)
+        erro = None
+    except Exception as e:
+        df_mes, resumo, erro = None, None, f"{type(e).__name__}: {e}"
 
-    resultados = []
+    if cache is not None:
+        acertos = cache.acertos - acertos
+        falhas = cache.falhas - falhas
+    return df_mes, resumo, erro, acertos, falhas, metricas
+
+
+def _processar_lido(html_file, conteudo, listas, cache, com_metricas, modo_parser, hashes):
+    """Etapa de processamento do pipeline: o HTML já chega lido."""
+    return _processar_arquivo(html_file, *listas, cache, com_metricas, modo_parser, conteudo,
+                              hashes.get(html_file))
+
+
+def _saida_com_erro(erro: Exception) -> tuple:
+    """Saída no formato de `_processar_arquivo` para uma falha fora dele (leitura, pool encerrado)."""
+    return None, None, f"{type(erro).__name__}: {erro}", 0, 0, None
+
+
+def _processar_em_pipeline(html_files, listas, cache, workers, com_metricas, modo_parser,
+                           hashes: dict | None = None, ao_concluir_mes=None) -> list[tuple]:
+    """
+    Leitura dos HTML em threads, parse + regras em `workers` processos (ou
+    numa thread, com um worker só), com filas limitadas entre as etapas.
+    Mesmo retorno da lista de `_processar_arquivo` em `processar_meses`.
+    `ao_concluir_mes(html_file, saida)` recebe cada mês assim que ele termina
+    (ordem de término), enquanto os demais ainda são lidos e processados.
+    """
+    print(f"⚙️  Pipeline: {len(html_files)} arquivo(s), {workers} processador(es)\n")
+
+    def ao_concluir(_, html_file, saida, erro):
+        if erro is None:
+            print(f"📄 Processado: {html_file.name}")
+        else:  # falha na leitura ou processo do pool encerrado
+            saida = _saida_com_erro(erro)
+        if ao_concluir_mes is not None:
+            ao_concluir_mes(html_file, saida)
+
+    processar = functools.partial(_processar_lido, listas=listas, cache=cache,
+                                  com_metricas=com_metricas, modo_parser=modo_parser, hashes=hashes or {})
+    em_processos = workers > 1
+    executor = ProcessPoolExecutor(max_workers=workers) if em_processos else ThreadPoolExecutor(max_workers=1)
+    with executor:
+        pares = executar_pipeline(html_files, Path.read_bytes, processar, executor,
+                                  processadores=workers, ao_concluir=ao_concluir)
+
+    saidas = [_saida_com_erro(erro) if erro is not None else saida for saida, erro in pares]
+
+    # numa thread o próprio cache já foi atualizado; em processos, só as cópias
+    if cache is not None and em_processos:
+        for *_, acertos, falhas, _ in saidas:
+            cache.acertos += acertos
+            cache.falhas += falhas
+    return saidas
+
+
+def carregar_listas(data_dir: Path) -> tuple:
+    """Listas de dias especiais, na ordem esperada por `processar_mes`."""
+    return (
+        carregar_lista_txt(data_dir, ARQ_FERIAS),
+        carregar_lista_txt(data_dir, ARQ_ATESTADO),
+        carregar_lista_txt(data_dir, ARQ_ANIVERSARIO),
+        carregar_lista_txt(data_dir, ARQ_ABONO),
+        carregar_pontos_manuais(data_dir),
+    )
+
+
+def listar_htmls(pasta_html: Path) -> list[Path]:
+    arquivos = [p for padrao in PADROES_FOLHA for p in pasta_html.glob(padrao)]
+    return sorted(dict.fromkeys(arquivos), key=lambda p: p.name)
+
+
+def _resultado_mes(html_file: Path, df_mes, resumo: dict, impressao: str | None) -> dict:
+    """Item de `processar_meses` para um mês: planilha, dias tipados, batidas e totais."""
+    return {
+        "sheet": resumo["nome_aba"],
+        "ano": resumo["ano"],
+        "mes": resumo["mes"],
+        "arquivo": html_file,
+        "impressao": impressao,
+        "df": df_mes,
+        "dias": resumo["dias"],
+        "batidas": resumo["batidas"],
+        "resumo": {
+            "Total Trabalhado": resumo["total_trabalhado"],
+            "Total Previsto": resumo["total_previsto"],
+            "Saldo do dia": resumo["saldo_dia"],
+        },
+    }
 
-    for html_file in html_files:
-        print(f"📄 Processando: {html_file.name}")
-        df_mes, resumo = processar_mes(html_file, ferias, atestados, aniversario, abonos, pontos_manuais)
+
+def processar_meses(html_files: list[Path], listas: tuple, cache=None, workers: int = 1,
+                    manifesto: Manifesto | None = None,
+                    metricas: Metricas | None = None,
+                    modo_parser: str = MODO_PARSER,
+                    pipeline: bool = False) -> list[dict]:
+    """
+    Roda `processar_mes` para cada HTML e devolve os resultados na ordem dos arquivos.
+    Com `manifesto`, meses cujas entradas não mudaram são reaproveitados sem reprocessar.
+    Com `pipeline`, leitura e processamento andam sobrepostos (ver `_processar_em_pipeline`).
+
+    Cada mês concluído entra na consolidação assim que termina (no pipeline,
+    em ordem de término): vai para o manifesto e vira o item de resultado
+    enquanto os outros meses ainda estão em andamento. Só a ordenação final
+    espera todos; as somas do CONSOLIDADO, dos agregados e do banco de horas
+    precisam do ano inteiro e ficam com quem chamou.
+    """
+    com_metricas = metricas is not None
+    impressoes = {}
+    hashes = {}  # calculados uma vez para o manifesto e repassados ao cache de parse
+    reaproveitados = {}
+    if manifesto is not None:
+        for html_file in html_files:
+            hashes[html_file] = hash_arquivo(html_file)
+            impressao = Manifesto.impressao_mes(html_file, listas, hash_html=hashes[html_file])
+            impressoes[html_file] = impressao
+            anterior = manifesto.resultado(html_file.name, impressao)
+            if anterior is not None:
+                reaproveitados[html_file] = (*anterior, None, 0, 0, None)
+        if reaproveitados:
+            print(f"♻️  {len(reaproveitados)} mês(es) sem alteração reaproveitado(s)\n")
+
+    todos = html_files
+    html_files = [f for f in todos if f not in reaproveitados]
+
+    montados = {}  # html_file -> item de resultado (ou mensagem de erro), montado ao concluir
+    for html_file, (df_mes, resumo, *_) in reaproveitados.items():
+        montados[html_file] = _resultado_mes(html_file, df_mes, resumo, impressoes.get(html_file))
+
+    def concluir(html_file, saida):
+        df_mes, resumo, erro, *_ = saida
+        if erro is not None:
+            montados[html_file] = erro
+            return
         if df_mes is None:
-            continue
-
-        resultados.append({
-            "sheet": resumo["nome_aba"],
-            "df": df_mes,
-            "resumo": {
-                "Total Trabalhado": resumo["total_trabalhado"],
-                "Total Previsto": resumo["total_previsto"],
-                "Saldo do dia": resumo["saldo_dia"],
-            },
-        })
+            return
+        if manifesto is not None:
+            manifesto.guardar(html_file.name, impressoes[html_file], df_mes, resumo)
+        montados[html_file] = _resultado_mes(html_file, df_mes, resumo, impressoes.get(html_file))
 
-    if not resultados:
-        print("Nenhum dado processado.")
-        return
+    if not html_files:
+        saidas = []
+    elif pipeline:
+        saidas = _processar_em_pipeline(html_files, listas, cache, min(workers, len(html_files)),
+                                        com_metricas, modo_parser, hashes, concluir)
+    elif workers > 1:
+        # Cada mês é independente: roda em paralelo e remonta na ordem dos arquivos
+        workers = min(workers, len(html_files))
+        print(f"⚙️  Processando {len(html_files)} arquivo(s) com {workers} worker(s)\n")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_processar_arquivo, html_file, *listas, cache, com_metricas, modo_parser,
+                                   None, hashes.get(html_file))
+                       for html_file in html_files]
+            saidas = []
+            for html_file, fut in zip(html_files, futures):
+                print(f"📄 Processando: {html_file.name}")
+                try:
+                    saidas.append(fut.result())
+                except Exception as e:  # ex.: processo do pool encerrado
+                    saidas.append(_saida_com_erro(e))
+                concluir(html_file, saidas[-1])
 
-    # Monta DataFrame da aba CONSOLIDADO
-    df_consolidado = montar_consolidado(resultados)
+        # os contadores do cache ficaram nas cópias dos processos filhos
+        if cache is not None:
+            for *_, acertos, falhas, _ in saidas:
+                cache.acertos += acertos
+                cache.falhas += falhas
+    else:
+        saidas = []
+        for html_file in html_files:
+            print(f"📄 Processando: {html_file.name}")
+            saidas.append(_processar_arquivo(html_file, *listas, cache, com_metricas, modo_parser,
+                                             hash_html=hashes.get(html_file)))
+            concluir(html_file, saidas[-1])
 
-    # Monta resumo dos arquivos TXT para análise na aba CONSOLIDADO
-    # Estrutura: Tipo | Dias | Data1 | Data2 | Data3 | ...
+    if metricas is not None:
+        for *_, metricas_mes in saidas:
+            if metricas_mes is not None:
+                metricas.mesclar(metricas_mes)
+        metricas.contar("meses_reaproveitados", len(reaproveitados))
+        metricas.contar("meses_processados", len(html_files))
+        metricas.contar("meses_com_erro", sum(1 for s in saidas if s[2] is not None))
+
+    # ordem dos arquivos; erros só são mostrados aqui, para não se misturarem ao progresso
+    resultados = []
+    for html_file in todos:
+        item = montados.get(html_file)
+        if isinstance(item, str):
+            print(f"❌ Erro ao processar {html_file.name}: {item}")
+        elif item is not None:
+            resultados.append(item)
+
+    return resultados
+
+
+def montar_resumo_txt(ferias, atestados, aniversario, abonos, pontos_manuais):
+    """
+    Monta resumo dos arquivos TXT para análise na aba CONSOLIDADO
+    Estrutura: Tipo | Dias | Data1 | Data2 | Data3 | ...
+    """
     import pandas as pd
-    
-    resumo_txt_rows = []
 
-    # Agrupa férias contíguas em intervalos (INICIO;FIM)
-    def agrupar_intervalos(dates_set):
-        if not dates_set:
-            return []
-        dates = sorted(dates_set)
-        intervals = []
-        start = dates[0]
-        end = dates[0]
-        for d in dates[1:]:
-            if (d - end).days == 1:
-                end = d
-            else:
-                intervals.append((start, end))
-                start = d
-                end = d
-        intervals.append((start, end))
-        return intervals
+    resumo_txt_rows = []
 
     # Férias com intervalos (separar início e fim em colunas diferentes)
-    ferias_intervals = agrupar_intervalos(ferias)
+    # intervalos contíguos (INICIO;FIM) já vêm unidos da ListaIntervalos
+    ferias_intervals = ferias.intervalos()
     ferias_datas = []
     for (s, e) in ferias_intervals:
         ferias_datas.append(s.isoformat())  # data de início
@@ -142,9 +424,542 @@ def main():
     # Transforma em DataFrame
     df_resumo_txt = pd.DataFrame(resumo_txt_rows) if resumo_txt_rows else pd.DataFrame()
 
+    return df_resumo_txt
+
+
+def processar_funcionario(pasta_html: Path, data_dir: Path, caminho_saida: Path,
+                          cache=None, workers: int = 1,
+                          memoria_constante: bool = False,
+                          pasta_export: Path | None = None,
+                          formato_export: str | None = None,
+                          incremental: bool = False,
+                          manifesto: Manifesto | None = None,
+                          metricas: Metricas | None = None,
+                          modo_parser: str = MODO_PARSER,
+                          pipeline: bool = False,
+                          caminho_banco: Path | None = None,
+                          funcionario: str = FUNCIONARIO_PADRAO,
+                          granularidades: tuple[str, ...] = (),
+                          por_tipo: bool = False,
+                          aba_anomalias: bool = False,
+                          anomalias: list | None = None) -> list[dict] | None:
+    """
+    Pipeline completo de um funcionário: TXT -> HTML -> regras -> Excel.
+    Devolve os resultados mensais (ou None se nada foi processado).
+
+    Com `incremental`, um manifesto (na pasta de cache) guarda os meses já
+    processados: só os meses com entradas alteradas são recalculados e, se
+    nada mudou, a planilha não é regravada. Um `manifesto` já aberto pode
+    ser passado para manter os resultados em memória entre execuções.
+    Com `metricas`, cada etapa tem seu tempo registrado. Com `caminho_banco`,
+    os meses alterados também são gravados no banco SQLite como `funcionario`.
+    Com `granularidades`, a planilha ganha a aba AGREGADOS (e a exportação,
+    o arquivo de agregados), abertos por tipo do dia com `por_tipo`.
+    As batidas são sempre validadas; as anomalias entram na aba ANOMALIAS
+    com `aba_anomalias` e, se `anomalias` for uma lista, são acrescentadas
+    a ela (com o nome do funcionário) para o relatório.
+    """
+    # Carrega listas de dias especiais
+    with medir(metricas, "carregar_txt"):
+        listas = carregar_listas(data_dir)
+    ferias, atestados, aniversario, abonos, pontos_manuais = listas
+
+    print("📄 Carregando arquivos TXT...\n")
+    
+    print(f"• Férias: {len(ferias)} dias")
+    print(f"• Atestados: {len(atestados)} dias")
+    print(f"• Aniversário: {len(aniversario)} dia(s)")
+    print(f"• Abonos: {len(abonos)} dias")
+    print(f"• Pontos manuais: {len(pontos_manuais)} registros\n")
+
+    print("📄 Lendo arquivos HTML...\n")
+
+    # Lista arquivos HTML/HTM na pasta
+    html_files = listar_htmls(pasta_html)
+
+    if not html_files:
+        print(f"Nenhum HTML/HTM encontrado em: {pasta_html}")
+        return None
+    if metricas is not None:
+        metricas.contar("arquivos_html", len(html_files))
+
+    caminho_saida = Path(caminho_saida)
+    if manifesto is None and incremental:
+        manifesto = Manifesto(_pasta_manifesto(caminho_saida))
+
+    resultados = processar_meses(html_files, listas, cache, workers, manifesto, metricas, modo_parser,
+                                 pipeline)
+
+    if not resultados:
+        print("Nenhum dado processado.")
+        return None
+
+    if caminho_banco is not None:
+        from src.export.banco import BancoPontos
+
+        with medir(metricas, "banco"), BancoPontos(caminho_banco) as banco:
+            gravados = banco.gravar_funcionario(funcionario, resultados, listas)
+        print(f"🗄️  Banco: {gravados} mês(es) gravado(s) em {caminho_banco}")
+
+    # Varredura única (vetorizada) das batidas brutas de todos os dias da execução
+    with medir(metricas, "validacao"):
+        encontradas = verificar_resultados(resultados, listas)
+    if encontradas:
+        por_problema = ", ".join(f"{p}: {n}" for p, n in contar_problemas(encontradas).items())
+        print(f"⚠️  {len(encontradas)} anomalia(s) nas batidas ({por_problema})")
+    if metricas is not None:
+        metricas.contar("anomalias", len(encontradas))
+    if anomalias is not None:
+        anomalias.extend({"funcionario": funcionario, **a} for a in encontradas)
+
+    if manifesto is not None:
+        impressao_saida = manifesto.impressao_saida(listas, html_files, formato_export, granularidades, por_tipo,
+                                                    aba_anomalias)
+        if manifesto.saida_inalterada(impressao_saida, caminho_saida):
+            print("✅ Nenhuma alteração desde a última execução: planilha mantida.")
+            manifesto.salvar()
+            return resultados
+
+    from src.excel.consolidado import (calcular_agregados, com_banco_horas, montar_agregados, montar_anomalias,
+                                       montar_banco_horas, montar_consolidado, tabela_dias)
+    from src.excel.writer import gerar_arquivo_excel
+
+    # Monta DataFrame da aba CONSOLIDADO: todas as granularidades numa passada sobre os dias
+    with medir(metricas, "consolidado"):
+        dias = tabela_dias(resultados)
+        agregados = calcular_agregados(dias, dict.fromkeys((GRANULARIDADE_MES, *granularidades)))
+        # com manifesto, o banco guardado só tem trocados os meses alterados
+        banco_horas = manifesto.banco_horas(resultados) if manifesto is not None else montar_banco_horas(dias)
+        df_consolidado = montar_consolidado(resultados, agregados, banco_horas)
+        df_agregados = montar_agregados(agregados, granularidades, por_tipo) if granularidades else None
+        df_anomalias = montar_anomalias(encontradas) if aba_anomalias else None
+        df_resumo_txt = montar_resumo_txt(*listas)
+
     # Gera arquivo Excel final
-    caminho_saida = pasta_excel / "PONTOS_CONSOLIDADOS.xlsx"
-    gerar_arquivo_excel(caminho_saida, resultados, df_consolidado, df_resumo_txt)
+    with medir(metricas, "excel"):
+        gerar_arquivo_excel(caminho_saida, com_banco_horas(resultados, banco_horas), df_consolidado, df_resumo_txt,
+                            memoria_constante=memoria_constante, df_agregados=df_agregados,
+                            df_anomalias=df_anomalias)
+    if manifesto is None:
+        # planilha gravada por fora do manifesto (--sem-cache): a registrada lá deixou de valer
+        Manifesto(_pasta_manifesto(caminho_saida)).descartar_saida()
+
+    if formato_export is not None:
+        with medir(metricas, "exportar"):
+            pedidos = agregados[agregados["granularidade"].isin(granularidades)] if granularidades else None
+            usado = exportar_resultados(pasta_export, resultados, formato_export, pedidos)
+        print(f"Dados exportados ({usado}): {pasta_export}")
+
+    if manifesto is not None:
+        manifesto.registrar_saida(impressao_saida, caminho_saida)
+        manifesto.salvar()
+
+    return resultados
+
+
+def _pasta_manifesto(caminho_saida: Path) -> Path:
+    """
+    Pasta do manifesto de uma planilha: fica no cache privado, e não ao lado
+    da planilha (pasta que o usuário navega e compartilha), com o caminho
+    completo da saída no nome para planilhas homônimas não se misturarem.
+    """
+    caminho = Path(caminho_saida).resolve()
+    chave = hashlib.sha256(str(caminho).encode("utf-8")).hexdigest()[:16]
+    return Path(__file__).resolve().parent / PASTA_CACHE / PASTA_MANIFESTOS / f"{caminho.stem}-{chave}"
+
+
+def observar_funcionario(pasta_html: Path, data_dir: Path, caminho_saida: Path, cache=None,
+                         memoria_constante: bool = False,
+                         pasta_export: Path | None = None, formato_export: str | None = None,
+                         modo_parser: str = MODO_PARSER,
+                         caminho_banco: Path | None = None,
+                         funcionario: str = FUNCIONARIO_PADRAO,
+                         granularidades: tuple[str, ...] = (),
+                         por_tipo: bool = False,
+                         aba_anomalias: bool = False):
+    """
+    Modo --watch: processa uma vez e depois recalcula a cada mudança nos
+    HTML ou TXT. O processo fica vivo, então imports, calendário e os
+    resultados dos meses (no manifesto) continuam em memória; só os meses
+    afetados pela mudança passam de novo por `processar_mes`.
+    """
+    manifesto = Manifesto(_pasta_manifesto(caminho_saida))
+
+    def executar():
+        inicio = time.perf_counter()
+        try:
+            processar_funcionario(pasta_html, data_dir, caminho_saida, cache,
+                                  memoria_constante=memoria_constante,
+                                  pasta_export=pasta_export, formato_export=formato_export,
+                                  manifesto=manifesto, modo_parser=modo_parser,
+                                  caminho_banco=caminho_banco, funcionario=funcionario,
+                                  granularidades=granularidades, por_tipo=por_tipo,
+                                  aba_anomalias=aba_anomalias)
+        except Exception as e:
+            print(f"❌ Erro ao atualizar a planilha: {type(e).__name__}: {e}")
+            return
+        print(f"⏱️  Atualizado em {time.perf_counter() - inicio:.2f}s\n")
+
+    def ao_mudar(alterados):
+        nomes = ", ".join(sorted(p.name for p in alterados))
+        print(f"🔄 Alterações detectadas: {nomes}\n")
+        executar()
+
+    executar()
+    print(f"👀 Observando {pasta_html} e {data_dir} (Ctrl+C para sair)\n")
+    observar([(pasta_html, PADROES_FOLHA), (data_dir, ("*.txt",))], ao_mudar)
+
+
+def _pastas_funcionario(pasta: Path) -> tuple[Path, Path]:
+    """(pasta dos HTML, pasta dos TXT) de um funcionário no modo lote."""
+    pasta_html = pasta / PASTA_HTML
+    return (pasta_html if pasta_html.is_dir() else pasta), pasta
+
+
+def _processar_funcionario_lote(pasta: Path, pasta_saida: Path, cache,
+                                memoria_constante: bool = False,
+                                formato_export: str | None = None,
+                                incremental: bool = False,
+                                com_metricas: bool = False,
+                                modo_parser: str = MODO_PARSER,
+                                pipeline: bool = False,
+                                caminho_banco: Path | None = None,
+                                granularidades: tuple[str, ...] = (),
+                                por_tipo: bool = False,
+                                aba_anomalias: bool = False) -> dict:
+    """
+    Processa um funcionário do lote (em série ou dentro do pool).
+    A saída do console é capturada para ser impressa em bloco pelo processo principal.
+    """
+    pasta_html, data_dir = _pastas_funcionario(pasta)
+    acertos = cache.acertos if cache is not None else 0
+    falhas = cache.falhas if cache is not None else 0
+    metricas = Metricas() if com_metricas else None
+    anomalias = []
+
+    log = io.StringIO()
+    erro = None
+    resultados = None
+    with contextlib.redirect_stdout(log):
+        try:
+            resultados = processar_funcionario(pasta_html, data_dir, pasta_saida / f"{pasta.name}.xlsx", cache,
+                                               memoria_constante=memoria_constante,
+                                               pasta_export=pasta_saida / PASTA_EXPORT / pasta.name,
+                                               formato_export=formato_export,
+                                               incremental=incremental,
+                                               metricas=metricas,
+                                               modo_parser=modo_parser,
+                                               pipeline=pipeline,
+                                               caminho_banco=caminho_banco,
+                                               funcionario=pasta.name,
+                                               granularidades=granularidades,
+                                               por_tipo=por_tipo,
+                                               aba_anomalias=aba_anomalias,
+                                               anomalias=anomalias)
+        except Exception as e:
+            erro = f"{type(e).__name__}: {e}"
+
+    return {
+        "nome": pasta.name,
+        "log": log.getvalue(),
+        "erro": erro,
+        "meses": len(resultados or []),
+        "resumos": [r["resumo"] for r in resultados or []],
+        "acertos": (cache.acertos - acertos) if cache is not None else 0,
+        "falhas": (cache.falhas - falhas) if cache is not None else 0,
+        "metricas": metricas,
+        "anomalias": anomalias,
+    }
+
+
+def processar_lote(raiz: Path, pasta_saida: Path, cache=None, workers: int = 1,
+                   memoria_constante: bool = False, formato_export: str | None = None,
+                   incremental: bool = False,
+                   metricas: Metricas | None = None,
+                   modo_parser: str = MODO_PARSER,
+                   pipeline: bool = False,
+                   caminho_banco: Path | None = None,
+                   granularidades: tuple[str, ...] = (),
+                   por_tipo: bool = False,
+                   aba_anomalias: bool = False) -> list[dict]:
+    """
+    Modo lote: cada subpasta de `raiz` é um funcionário. Gera uma planilha
+    por funcionário e um resumo com todos em `pasta_saida`. Com
+    `caminho_banco`, todos gravam no mesmo banco (nome da pasta = funcionário).
+    """
+    com_metricas = metricas is not None
+    funcionarios = sorted(p for p in raiz.iterdir() if p.is_dir() and not p.name.startswith("."))
+    if not funcionarios:
+        print(f"Nenhuma pasta de funcionário encontrada em: {raiz}")
+        return []
+
+    # Monta o calendário antes de abrir o pool: os processos filhos herdam
+    # os mesmos arrays (somente leitura) em vez de recalcular feriados
+    indice_calendario()
+
+    workers = min(workers, len(funcionarios))
+    print(f"👥 Lote: {len(funcionarios)} funcionário(s), {workers} worker(s)\n")
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_processar_funcionario_lote, p, pasta_saida, cache,
+                                   memoria_constante, formato_export, incremental, com_metricas,
+                                   modo_parser, pipeline, caminho_banco, granularidades, por_tipo,
+                                   aba_anomalias)
+                       for p in funcionarios]
+            saidas = []
+            for p, fut in zip(funcionarios, futures):
+                try:
+                    saidas.append(fut.result())
+                except Exception as e:  # ex.: processo do pool encerrado
+                    saidas.append({"nome": p.name, "log": "", "erro": f"{type(e).__name__}: {e}",
+                                   "meses": 0, "resumos": [], "acertos": 0, "falhas": 0,
+                                   "metricas": None, "anomalias": []})
+        if cache is not None:
+            for s in saidas:
+                cache.acertos += s["acertos"]
+                cache.falhas += s["falhas"]
+    else:
+        saidas = [_processar_funcionario_lote(p, pasta_saida, cache, memoria_constante, formato_export,
+                                              incremental, com_metricas, modo_parser, pipeline,
+                                              caminho_banco, granularidades, por_tipo, aba_anomalias)
+                  for p in funcionarios]
+
+    if metricas is not None:
+        # os itens (tempo de cada HTML) ganham o nome do funcionário como prefixo
+        for s in saidas:
+            if s["metricas"] is not None:
+                metricas.mesclar(s["metricas"], prefixo=s["nome"])
+        metricas.contar("funcionarios", len(funcionarios))
+        metricas.contar("funcionarios_com_erro", sum(1 for s in saidas if s["erro"] is not None))
+
+    for s in saidas:
+        print(f"===== {s['nome']} =====")
+        print(s["log"], end="")
+        if s["erro"] is not None:
+            print(f"❌ Erro ao processar {s['nome']}: {s['erro']}")
+        print()
+
+    from src.excel.consolidado import montar_resumo_lote
+    from src.excel.writer import gerar_resumo_lote
+
+    with medir(metricas, "resumo_lote"):
+        df_resumo = montar_resumo_lote(saidas)
+        gerar_resumo_lote(pasta_saida / ARQ_RESUMO_LOTE, df_resumo, memoria_constante=memoria_constante)
+
+    return saidas
+
+
+def comando_listas(data_dir: Path):
+    """Subcomando `listas`: o que foi lido de cada TXT, com o período coberto."""
+    ferias, atestados, aniversario, abonos, pontos_manuais = carregar_listas(data_dir)
+    for rotulo, lista in (("Férias", ferias), ("Atestados", atestados), ("Aniversário", aniversario),
+                          ("Abonos", abonos)):
+        intervalos = lista.intervalos()
+        periodo = f" ({intervalos[0][0].isoformat()} a {intervalos[-1][1].isoformat()})" if intervalos else ""
+        print(f"• {rotulo}: {len(lista)} dia(s){periodo}")
+    datas = sorted(pontos_manuais.keys())
+    periodo = f" ({datas[0].isoformat()} a {datas[-1].isoformat()})" if datas else ""
+    print(f"• Pontos manuais: {len(datas)} registro(s){periodo}")
+
+
+def _imprimir_totais(rotulo: str, trabalhado: int, previsto: int, saldo: int):
+    print(f"{rotulo:<16} trabalhado {minutos_para_hhmm(trabalhado):>7}  "
+          f"previsto {minutos_para_hhmm(previsto):>7}  saldo {minutos_para_hhmm(saldo):>7}")
+
+
+def comando_saldo(pasta_html: Path, data_dir: Path, cache=None, mes: tuple[int, int] | None = None,
+                  todos: bool = False, modo_parser: str = MODO_PARSER) -> bool:
+    """
+    Subcomando `saldo`: totais do mês pedido (padrão: o atual, ou o mais
+    recente disponível) ou, com `todos`, de cada mês e o total geral.
+    Usa só a classificação numérica (`classificar_mes`), sem pandas.
+    """
+    html_files = listar_htmls(pasta_html)
+    if not html_files:
+        print(f"Nenhum HTML/HTM encontrado em: {pasta_html}")
+        return False
+    listas = carregar_listas(data_dir)
+
+    if not todos:
+        # escolhe pelo nome do arquivo (MM_AAAA) quando possível, sem ler o HTML
+        por_mes = {}
+        for f in html_files:
+            try:
+                m, a = obter_mes_ano(f, {})
+            except ValueError:
+                continue
+            por_mes[(a, m)] = f
+        hoje = datetime.today().date()
+        alvo = mes or ((hoje.year, hoje.month) if (hoje.year, hoje.month) in por_mes
+                       else max(por_mes, default=None))
+        if alvo not in por_mes:
+            print(f"Nenhum HTML encontrado para {alvo[1]:02d}/{alvo[0]}" if alvo
+                  else "Nenhum HTML com mês/ano no nome (MM_AAAA)")
+            return False
+        html_files = [por_mes[alvo]]
+
+    totais = [0, 0, 0]
+    for f in html_files:
+        c = classificar_mes(f, *listas, modo_parser=modo_parser, cache=cache)
+        _imprimir_totais(gerar_nome_aba(c["mes"], c["ano"]),
+                         c["total_trabalhado"], c["total_previsto"], c["saldo_dia"])
+        totais[0] += c["total_trabalhado"]
+        totais[1] += c["total_previsto"]
+        totais[2] += c["saldo_dia"]
+    if todos:
+        _imprimir_totais("TOTAL GERAL", *totais)
+    return True
+
+
+def comando_historico(caminho_banco: Path, funcionario: str | None = None, ano: int | None = None,
+                      em: date | None = None, desde: date | None = None) -> bool:
+    """
+    Subcomando `historico`: totais mensais agregados no banco SQLite ou,
+    com `em`, o banco de horas naquela data (ou entre `desde` e `em`).
+    """
+    from src.export.banco import BancoPontos
+
+    if not Path(caminho_banco).exists():
+        print(f"Banco não encontrado: {caminho_banco}")
+        return False
+    with BancoPontos(caminho_banco) as banco:
+        if em is not None:
+            nomes = [funcionario] if funcionario else banco.funcionarios()
+            for nome in nomes:
+                banco_horas = banco.banco_horas(nome)
+                if desde is not None:
+                    valor = banco_horas.saldo_entre(desde, em)
+                    rotulo = f"{desde.isoformat()} a {em.isoformat()}"
+                else:
+                    valor = banco_horas.saldo_em(em)
+                    rotulo = f"em {em.isoformat()}"
+                print(f"{nome:<16} banco de horas {rotulo}: {minutos_para_hhmm(valor)}")
+            return bool(nomes)
+        linhas = banco.consolidado(funcionario, ano)
+    if not linhas:
+        print("Nenhum mês gravado no banco para esta consulta.")
+        return False
+
+    for nome, meses in itertools.groupby(linhas, key=lambda l: l["funcionario"]):
+        print(f"===== {nome} =====")
+        totais = [0, 0, 0]
+        for linha in meses:
+            valores = (linha["Total Trabalhado"], linha["Total Previsto"], linha["Saldo do dia"])
+            _imprimir_totais(gerar_nome_aba(linha["mes"], linha["ano"]), *valores)
+            totais = [t + v for t, v in zip(totais, valores)]
+        _imprimir_totais("TOTAL GERAL", *totais)
+        print()
+    return True
+
+
+def _executar(args, base_dir: Path, pasta_html: Path, pasta_excel: Path, cache,
+              metricas: Metricas | None) -> bool:
+    """Processa o lote ou o funcionário único. Devolve False se nada foi processado."""
+    if args.lote is not None:
+        saidas = processar_lote(args.lote, pasta_excel, cache, args.workers, args.memoria_constante,
+                                args.exportar, incremental=not args.sem_cache, metricas=metricas,
+                                modo_parser=args.modo_parser, pipeline=args.pipeline,
+                                caminho_banco=args.banco, granularidades=args.agregados,
+                                por_tipo=args.por_tipo, aba_anomalias=args.aba_anomalias)
+        anomalias = [a for s in saidas for a in s["anomalias"]]
+        if not any(s["meses"] for s in saidas):
+            print("Nenhum dado processado.")
+            return False
+    else:
+        data_dir = base_dir / "src" / "data"
+        anomalias = []
+        resultados = processar_funcionario(pasta_html, data_dir, pasta_excel / ARQ_SAIDA, cache, args.workers,
+                                           args.memoria_constante, base_dir / PASTA_EXPORT, args.exportar,
+                                           incremental=not args.sem_cache, metricas=metricas,
+                                           modo_parser=args.modo_parser, pipeline=args.pipeline,
+                                           caminho_banco=args.banco, funcionario=args.funcionario,
+                                           granularidades=args.agregados, por_tipo=args.por_tipo,
+                                           aba_anomalias=args.aba_anomalias, anomalias=anomalias)
+        if resultados is None:
+            return False
+    if args.anomalias:
+        salvar_relatorio(args.anomalias, anomalias)
+        print(f"🔎 Relatório de anomalias ({len(anomalias)}): {args.anomalias}")
+    return True
+
+
+def _imprimir_perfil(perfil: cProfile.Profile, caminho: Path, linhas: int = 15):
+    perfil.dump_stats(str(caminho))
+    print(f"\n🔬 Perfil gravado em {caminho} (abra com: python -m pstats {caminho})")
+    pstats.Stats(perfil).sort_stats("cumulative").print_stats(linhas)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+
+    base_dir = Path(__file__).resolve().parent
+    pasta_html = base_dir / PASTA_HTML
+    pasta_excel = args.saida or (base_dir / PASTA_EXCEL)
+    pasta_excel.mkdir(parents=True, exist_ok=True)
+
+    cache = None if args.sem_cache else CacheParse(base_dir / PASTA_CACHE)
+    if args.limpar_cache:
+        removidos = CacheParse(base_dir / PASTA_CACHE).limpar()
+        print(f"🧹 Cache de parse limpo ({removidos} entrada(s))\n")
+
+    if args.comando == "listas":
+        comando_listas(base_dir / "src" / "data")
+        return
+    if args.comando == "saldo":
+        comando_saldo(pasta_html, base_dir / "src" / "data", cache, args.mes, args.todos, args.modo_parser)
+        return
+    if args.comando == "historico":
+        comando_historico(args.banco, args.nome, args.ano, args.em, args.desde)
+        return
+
+    if args.watch:
+        observar_funcionario(pasta_html, base_dir / "src" / "data", pasta_excel / ARQ_SAIDA, cache,
+                             args.memoria_constante, base_dir / PASTA_EXPORT, args.exportar,
+                             args.modo_parser, args.banco, args.funcionario, args.agregados, args.por_tipo,
+                             args.aba_anomalias)
+        return
+
+    instrumentar = args.metricas or args.perfil or args.rastrear_memoria
+    metricas = Metricas() if instrumentar else None
+    inicio_iso = agora_iso()
+    inicio = time.perf_counter()
+    sucesso = False
+    perfil = None
+    try:
+        with contextlib.ExitStack() as pilha:
+            if args.rastrear_memoria:
+                pilha.enter_context(rastrear_memoria(metricas, base_dir))
+            if args.perfil:
+                perfil = cProfile.Profile()
+                pilha.callback(perfil.disable)
+                perfil.enable()
+            sucesso = _executar(args, base_dir, pasta_html, pasta_excel, cache, metricas)
+    finally:
+        # o JSON é gravado mesmo quando a execução falha, para o agendador poder alertar
+        if metricas is not None:
+            duracao = time.perf_counter() - inicio
+            if cache is not None:
+                metricas.contar("cache_acertos", cache.acertos)
+                metricas.contar("cache_falhas", cache.falhas)
+            print("\n⏱️  Tempo por etapa:")
+            print(metricas.resumo())
+            print(f"• total: {duracao:.3f}s")
+            if metricas.memoria is not None:
+                print(f"• pico de memória: {metricas.memoria['pico_bytes'] / (1024 * 1024):.1f} MB")
+            if args.metricas:
+                metricas.salvar(args.metricas, inicio=inicio_iso, duracao_total=round(duracao, 6),
+                                sucesso=sucesso, modo="lote" if args.lote is not None else "funcionario",
+                                workers=args.workers)
+                print(f"📈 Métricas gravadas em {args.metricas}")
+        if perfil is not None:
+            _imprimir_perfil(perfil, args.perfil)
+
+    if not sucesso:
+        return
+
+    if cache is not None:
+        print(f"• Cache de parse: {cache.acertos} acerto(s), {cache.falhas} falha(s)")
 
     print("Processamento concluído com sucesso!")
 
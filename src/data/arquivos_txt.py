@@ -1,12 +1,24 @@
-from datetime import datetime, date, timedelta
+from datetime import datetime, date
 from pathlib import Path
 
-def carregar_lista_txt(data_dir: Path, nome_arquivo: str) -> set[date]:
+from src.data.intervalos import ListaIntervalos
+from src.data.pontos_manuais import PontosManuais
+from src.data.registro_dia import RegistroDia
+from src.utils.time_utils import hhmm_para_minutos
+
+MINUTOS_DIA = 24 * 60
+
+def carregar_lista_txt(data_dir: Path, nome_arquivo: str) -> ListaIntervalos:
+    """
+    Lê uma lista de dias especiais. Cada linha vira um intervalo (um dia
+    isolado é um intervalo de um dia); o resultado já vem ordenado e com
+    intervalos contíguos unidos.
+    """
     caminho = data_dir / nome_arquivo
     if not caminho.exists():
-        return set()
+        return ListaIntervalos()
 
-    dias = set()
+    intervalos: list[tuple[date, date]] = []
     for linha in caminho.read_text(encoding="utf-8").splitlines():
         linha = linha.strip()
         if not linha:
@@ -23,10 +35,7 @@ def carregar_lista_txt(data_dir: Path, nome_arquivo: str) -> set[date]:
                     d2 = datetime.strptime(parts[1], "%Y-%m-%d").date()
                     if d2 < d1:
                         d1, d2 = d2, d1
-                    cur = d1
-                    while cur <= d2:
-                        dias.add(cur)
-                        cur = cur + timedelta(days=1)
+                    intervalos.append((d1, d2))
                 except Exception:
                     print(f"Linha inválida (intervalo) em {nome_arquivo}: {linha}")
                     continue
@@ -35,27 +44,40 @@ def carregar_lista_txt(data_dir: Path, nome_arquivo: str) -> set[date]:
             continue
 
         try:
-            dias.add(datetime.strptime(linha, "%Y-%m-%d").date())
+            d = datetime.strptime(linha, "%Y-%m-%d").date()
+            intervalos.append((d, d))
         except Exception:
             print(f"Linha inválida em {nome_arquivo}: {linha}")
-    return dias
+    return ListaIntervalos(intervalos)
 
 
-def carregar_pontos_manuais(data_dir: Path, nome_arquivo: str = "pontos_manuais.txt") -> dict[date, dict]:
+def carregar_pontos_manuais(data_dir: Path,
+                            nome_arquivo: str | list[str] = "pontos_manuais.txt") -> PontosManuais:
     """
     Lê `pontos_manuais.txt` com linhas no formato:
         YYYY-MM-DD;HH:MM;HH:MM;...
 
-    Retorna um dicionário no mesmo formato usado por `extrair_horas_por_dia`:
-        { date: {"entradas": [...], "saidas": [...], "total_label": "HH:MM"}, ... }
+    Retorna um `PontosManuais` (indexado por ano/mês) de `RegistroDia`, o
+    mesmo registro produzido por `extrair_horas_por_dia`. Horários que não
+    são HH:MM entram no total como antes (pares inválidos não somam), mas
+    ficam fora das batidas, com aviso.
+
+    Com uma lista de arquivos, as fontes são mescladas na ordem dada (em
+    datas repetidas, vale o arquivo que vem depois).
     """
+    if not isinstance(nome_arquivo, str):
+        resultado = PontosManuais()
+        for nome in nome_arquivo:
+            resultado = resultado.mesclar(carregar_pontos_manuais(data_dir, nome))
+        return resultado
+
     caminho = data_dir / nome_arquivo
     if not caminho.exists():
-        return {}
+        return PontosManuais()
 
-    resultado: dict[date, dict] = {}
+    resultado = PontosManuais()
 
-    def soma_periodos(periodos: list[tuple[str, str]]) -> str:
+    def soma_periodos(periodos: list[tuple[str, str]]) -> int:
         total_min = 0
         for ent, sai in periodos:
             if not ent or not sai:
@@ -69,9 +91,7 @@ def carregar_pontos_manuais(data_dir: Path, nome_arquivo: str = "pontos_manuais.
                     total_min += (end - start)
             except Exception:
                 continue
-        hh = total_min // 60
-        mm = total_min % 60
-        return f"{hh:02d}:{mm:02d}"
+        return total_min
 
     for linha in caminho.read_text(encoding="utf-8").splitlines():
         linha = linha.strip()
@@ -104,12 +124,22 @@ def carregar_pontos_manuais(data_dir: Path, nome_arquivo: str = "pontos_manuais.
         for i in range(min(len(entradas), len(saidas))):
             pares.append((entradas[i], saidas[i]))
 
-        total_label = soma_periodos(pares)
+        total_min = soma_periodos(pares)
+
+        def em_minutos(horarios: list[str]) -> list[int]:
+            minutos = []
+            for t in horarios:
+                try:
+                    m = hhmm_para_minutos(t)
+                except ValueError:
+                    m = None
+                # fora de 00:00..24:00 (ex.: "999:00") também não cabe no array de batidas
+                if m is None or not 0 <= m <= MINUTOS_DIA or not 0 <= int(t.split(":")[1]) < 60:
+                    print(f"Horário inválido em {nome_arquivo} ({d.isoformat()}): {t}")
+                    continue
+                minutos.append(m)
+            return minutos
 
-        resultado[d] = {
-            "entradas": entradas,
-            "saidas": saidas,
-            "total_label": total_label,
-        }
+        resultado[d] = RegistroDia(em_minutos(entradas), em_minutos(saidas), total_min)
 
     return resultado
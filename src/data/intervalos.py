@@ -0,0 +1,102 @@
+import calendar
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+import numpy as np
+
+# date.toordinal() de 1970-01-01 (datetime64[D] conta dias a partir daí)
+_ORDINAL_EPOCA = date(1970, 1, 1).toordinal()
+
+
+class ListaIntervalos:
+    """
+    Conjunto de datas guardado como intervalos inclusivos, ordenados e sem
+    sobreposição (intervalos vizinhos são unidos). Usado para férias,
+    atestados, abonos e aniversário: o custo de memória é proporcional ao
+    número de intervalos, não ao número de dias.
+
+    Mantém a interface de leitura de `set[date]` usada no resto do código
+    (`in`, `len` em dias, iteração em ordem) e acrescenta consultas por
+    intervalo.
+    """
+
+    __slots__ = ("_inicios", "_fins", "_total_dias")
+
+    def __init__(self, intervalos=()):
+        pares = sorted(
+            (min(a, b).toordinal(), max(a, b).toordinal()) for a, b in intervalos
+        )
+
+        inicios: list[int] = []
+        fins: list[int] = []
+        for ini, fim in pares:
+            if fins and ini <= fins[-1] + 1:
+                fins[-1] = max(fins[-1], fim)
+            else:
+                inicios.append(ini)
+                fins.append(fim)
+
+        self._inicios = inicios
+        self._fins = fins
+        self._total_dias = sum(f - i + 1 for i, f in zip(inicios, fins))
+
+    @classmethod
+    def de_datas(cls, datas) -> "ListaIntervalos":
+        return cls((d, d) for d in datas)
+
+    # ---- interface de conjunto ----
+    def __contains__(self, d) -> bool:
+        if not isinstance(d, date):
+            return False
+        o = d.toordinal()
+        i = bisect_right(self._inicios, o) - 1
+        return i >= 0 and o <= self._fins[i]
+
+    def __len__(self) -> int:
+        return self._total_dias
+
+    def __bool__(self) -> bool:
+        return bool(self._inicios)
+
+    def __iter__(self):
+        for ini, fim in zip(self._inicios, self._fins):
+            for o in range(ini, fim + 1):
+                yield date.fromordinal(o)
+
+    def __repr__(self) -> str:
+        return f"ListaIntervalos({self.intervalos()!r})"
+
+    # ---- consultas por intervalo ----
+    def intervalos(self) -> list[tuple[date, date]]:
+        """Intervalos (início, fim) inclusivos, em ordem."""
+        return [(date.fromordinal(i), date.fromordinal(f))
+                for i, f in zip(self._inicios, self._fins)]
+
+    def no_periodo(self, inicio: date, fim: date) -> list[tuple[date, date]]:
+        """Intervalos que tocam [inicio, fim], recortados ao período."""
+        o_ini, o_fim = inicio.toordinal(), fim.toordinal()
+        # primeiro intervalo que termina em/apos o início do período
+        k = bisect_left(self._fins, o_ini)
+        resultado = []
+        while k < len(self._inicios) and self._inicios[k] <= o_fim:
+            resultado.append((date.fromordinal(max(self._inicios[k], o_ini)),
+                              date.fromordinal(min(self._fins[k], o_fim))))
+            k += 1
+        return resultado
+
+    def mascara_mes(self, ano: int, mes: int) -> np.ndarray:
+        """Array booleano com um item por dia do mês (posição 0 = dia 1)."""
+        ultimo_dia = calendar.monthrange(ano, mes)[1]
+        m = np.zeros(ultimo_dia, dtype=bool)
+        for ini, fim in self.no_periodo(date(ano, mes, 1), date(ano, mes, ultimo_dia)):
+            m[ini.day - 1:fim.day] = True
+        return m
+
+    def mascara_datas(self, datas: np.ndarray) -> np.ndarray:
+        """Pertinência de várias datas (datetime64[D]) de uma vez, por busca binária."""
+        ordinais = np.asarray(datas, dtype="datetime64[D]").astype(np.int64) + _ORDINAL_EPOCA
+        if not self._fins:
+            return np.zeros(len(ordinais), dtype=bool)
+        k = np.searchsorted(np.asarray(self._inicios, dtype=np.int64), ordinais, side="right") - 1
+        fins = np.asarray(self._fins, dtype=np.int64)
+        return (k >= 0) & (ordinais <= fins[np.maximum(k, 0)])
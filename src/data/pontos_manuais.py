@@ -0,0 +1,65 @@
+from datetime import date
+
+from src.data.registro_dia import RegistroDia
+
+
+class PontosManuais:
+    """
+    Pontos manuais indexados por (ano, mês).
+
+    Cada mês guarda seu próprio `dict[date, RegistroDia]`, então
+    `processar_mes` busca só os ajustes do mês em O(1) em vez de varrer o
+    histórico inteiro. Para leitura, se comporta como o `dict[date, ...]`
+    antigo (`len`, `in`, `keys`, `items`, `get`, iteração por data).
+    """
+
+    __slots__ = ("_por_mes",)
+
+    def __init__(self, registros: dict[date, RegistroDia] | None = None):
+        self._por_mes: dict[tuple[int, int], dict[date, RegistroDia]] = {}
+        if registros:
+            for d, info in registros.items():
+                self[d] = info
+
+    def __setitem__(self, d: date, info: RegistroDia):
+        self._por_mes.setdefault((d.year, d.month), {})[d] = info
+
+    def __getitem__(self, d: date) -> RegistroDia:
+        return self._por_mes[(d.year, d.month)][d]
+
+    def get(self, d: date, padrao=None):
+        return self._por_mes.get((d.year, d.month), {}).get(d, padrao)
+
+    def __contains__(self, d) -> bool:
+        return isinstance(d, date) and d in self._por_mes.get((d.year, d.month), {})
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._por_mes.values())
+
+    def __bool__(self) -> bool:
+        return bool(self._por_mes)
+
+    def __iter__(self):
+        for chave in sorted(self._por_mes):
+            yield from sorted(self._por_mes[chave])
+
+    def keys(self):
+        return list(self)
+
+    def items(self):
+        return [(d, self[d]) for d in self]
+
+    def do_mes(self, ano: int, mes: int) -> dict[date, RegistroDia]:
+        """Ajustes do mês (dict vazio se não houver). Não alterar o retorno."""
+        return self._por_mes.get((ano, mes), {})
+
+    def mesclar(self, outro: "PontosManuais | dict[date, RegistroDia]") -> "PontosManuais":
+        """
+        Novo conjunto com os pontos de `self` e de `outro`; na mesma data,
+        o registro de `outro` prevalece.
+        """
+        resultado = PontosManuais()
+        for fonte in (self, outro):
+            for d, info in fonte.items():
+                resultado[d] = info
+        return resultado
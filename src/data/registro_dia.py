@@ -0,0 +1,55 @@
+from array import array
+
+from src.utils.time_utils import minutos_para_hhmm
+
+# Tipo dos arrays de batidas: inteiro de 2 bytes (minutos desde 00:00)
+TIPO_BATIDA = "h"
+
+
+class RegistroDia:
+    """
+    Batidas de um dia, no formato único usado pelo parser do HTML, pelo
+    leitor de pontos manuais e por `processar_mes`.
+
+    Entradas e saídas ficam em `array('h')` de minutos desde 00:00 (2 bytes
+    por batida, em vez de uma lista de strings "HH:MM") e o total trabalhado
+    do dia já vem somado em `total_min`. "HH:MM" só é montado na saída.
+    """
+
+    __slots__ = ("entradas", "saidas", "total_min")
+
+    def __init__(self, entradas=(), saidas=(), total_min: int = 0):
+        self.entradas = array(TIPO_BATIDA, entradas)
+        self.saidas = array(TIPO_BATIDA, saidas)
+        self.total_min = total_min
+
+    @property
+    def total_label(self) -> str:
+        return minutos_para_hhmm(self.total_min)
+
+    def entradas_hhmm(self) -> list[str]:
+        return [minutos_para_hhmm(m) for m in self.entradas]
+
+    def saidas_hhmm(self) -> list[str]:
+        return [minutos_para_hhmm(m) for m in self.saidas]
+
+    def como_lista(self) -> list:
+        """[entradas, saidas, total_min] com listas simples (para JSON)."""
+        return [self.entradas.tolist(), self.saidas.tolist(), self.total_min]
+
+    @classmethod
+    def de_lista(cls, dados) -> "RegistroDia":
+        entradas, saidas, total_min = dados
+        return cls(entradas, saidas, int(total_min))
+
+    def __eq__(self, outro):
+        if not isinstance(outro, RegistroDia):
+            return NotImplemented
+        return (self.total_min == outro.total_min and self.entradas == outro.entradas
+                and self.saidas == outro.saidas)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return (f"RegistroDia(entradas={self.entradas_hhmm()}, saidas={self.saidas_hhmm()}, "
+                f"total={self.total_label})")
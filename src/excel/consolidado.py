@@ -1,33 +1,233 @@
-from datetime import timedelta
+import calendar
+from datetime import date
+
+import numpy as np
 import pandas as pd
-from src.utils.time_utils import format_timedelta
+from src.regras.banco_horas import BancoHoras
+from src.regras.periodos import (GRANULARIDADES, GRANULARIDADE_MES, ROTULOS_GRANULARIDADE,
+                                  chaves_periodo, rotulo_periodo)
+from src.regras.validacao import DESCRICOES_PROBLEMA
+from src.utils.time_utils import minutos_para_hhmm
+
+COLUNAS_MINUTOS = ("trabalhado_min", "carga_min", "saldo_min")
+
+# Banco de horas acumulado desde o primeiro dia processado (abas mensais e CONSOLIDADO)
+COLUNA_BANCO_HORAS = "Banco de Horas"
+
+
+def tabela_dias(resultados: list[dict]) -> pd.DataFrame:
+    """Os dias de todos os meses (`r["dias"]`) numa única tabela longa."""
+    if not resultados:
+        return pd.DataFrame(columns=["data", "tipo_dia", *COLUNAS_MINUTOS])
+    return pd.concat([r["dias"] for r in resultados], ignore_index=True)
+
+
+def calcular_agregados(df_dias: pd.DataFrame, granularidades=GRANULARIDADES) -> pd.DataFrame:
+    """
+    Totais por período e por tipo do dia, em minutos, para todas as
+    `granularidades` de uma vez.
+
+    Cada dia é repetido uma vez por granularidade (com a chave do seu
+    período) e tudo é somado num único groupby. O resultado é longo:
+    granularidade | chave | periodo | tipo_dia | dias | trabalhado_min |
+    carga_min | saldo_min; os totais do período (todos os tipos) saem de
+    `totais_periodo`, sem voltar aos dias.
+    """
+    granularidades = tuple(granularidades)
+    if not granularidades:
+        raise ValueError("Informe ao menos uma granularidade")
+    n = len(df_dias)
+    datas = df_dias["data"].to_numpy("datetime64[D]")
+    empilhado = pd.DataFrame({
+        "granularidade": np.repeat(np.arange(len(granularidades)), n),
+        "chave": np.concatenate([chaves_periodo(datas, g) for g in granularidades]),
+        "tipo_dia": np.tile(df_dias["tipo_dia"].to_numpy(), len(granularidades)),
+        **{c: np.tile(df_dias[c].to_numpy(np.int64), len(granularidades)) for c in COLUNAS_MINUTOS},
+    })
+
+    grupos = empilhado.groupby(["granularidade", "chave", "tipo_dia"], sort=True)
+    agregados = grupos[list(COLUNAS_MINUTOS)].sum()
+    agregados.insert(0, "dias", grupos.size())
+    agregados = agregados.reset_index()
+
+    agregados["granularidade"] = np.array(granularidades, dtype=object)[agregados["granularidade"].to_numpy()]
+    agregados.insert(2, "periodo", [rotulo_periodo(g, int(k))
+                                    for g, k in zip(agregados["granularidade"], agregados["chave"])])
+    return agregados
+
+
+def totais_periodo(agregados: pd.DataFrame, granularidade: str) -> pd.DataFrame:
+    """Soma os tipos do dia de uma granularidade: uma linha por período, em ordem."""
+    parte = agregados[agregados["granularidade"] == granularidade]
+    return (parte.groupby(["chave", "periodo"], sort=True)[["dias", *COLUNAS_MINUTOS]]
+            .sum().reset_index())
+
+
+def _fim_do_mes(ano: int, mes: int) -> date:
+    return date(ano, mes, calendar.monthrange(ano, mes)[1])
+
+
+def montar_banco_horas(df_dias: pd.DataFrame) -> BancoHoras:
+    """Somas de prefixo do saldo de todos os dias (ver `BancoHoras`)."""
+    return BancoHoras.de_dias(df_dias["data"].to_numpy("datetime64[D]"), df_dias["saldo_min"].to_numpy(np.int64))
+
+
+def com_banco_horas(resultados: list[dict], banco_horas: BancoHoras) -> list[dict]:
+    """
+    Cópia dos resultados com a coluna "Banco de Horas" nas abas mensais,
+    logo após "Saldo do dia": o banco no fim de cada dia e, na linha
+    TOTAL MÊS, no fim do mês. Os DataFrames originais (que podem estar
+    guardados no manifesto) não são alterados.
+    """
+    novos = []
+    for r in resultados:
+        dias = r["dias"]
+        acumulado = banco_horas.saldos_em(dias["data"].to_numpy("datetime64[D]"))
+        no_fim = banco_horas.saldo_em(_fim_do_mes(r["ano"], r["mes"]))
+
+        df = r["df"].copy()
+        df.insert(df.columns.get_loc("Saldo do dia") + 1, COLUNA_BANCO_HORAS,
+                  [minutos_para_hhmm(int(m)) for m in acumulado] + [minutos_para_hhmm(no_fim)])
+        novos.append({**r, "df": df})
+    return novos
+
+
+def montar_consolidado(resultados: list[dict], agregados: pd.DataFrame | None = None,
+                       banco_horas: BancoHoras | None = None) -> pd.DataFrame:
+    """
+    Monta a aba CONSOLIDADO: uma linha por mês processado e TOTAL GERAL.
+    Os totais vêm da granularidade "mes" de `agregados` (calculados a partir
+    dos dias, se não forem passados) e só são formatados como 'HH:MM' aqui.
+    "Banco de Horas" é o saldo acumulado no fim de cada mês (`banco_horas`,
+    montado dos dias se não for passado); no TOTAL GERAL, o banco final.
+    """
+    if banco_horas is None:
+        banco_horas = montar_banco_horas(tabela_dias(resultados))
+    if agregados is None or not (agregados["granularidade"] == GRANULARIDADE_MES).any():
+        agregados = calcular_agregados(tabela_dias(resultados), (GRANULARIDADE_MES,))
+    por_mes = totais_periodo(agregados, GRANULARIDADE_MES).set_index("chave")
 
-def montar_consolidado(resultados: list[dict]) -> pd.DataFrame:
     linhas = []
-    total_trab_geral = timedelta()
-    total_prev_geral = timedelta()
-    total_diff_geral = timedelta()
+    total_trab_geral = 0
+    total_prev_geral = 0
+    total_diff_geral = 0
 
     for r in resultados:
-        nome_aba = r["sheet"]
-        resumo = r["resumo"]
+        chave = r["ano"] * 100 + r["mes"]
+        # mês sem nenhum dia contado (ex.: mês futuro sem batidas) fica zerado
+        if chave in por_mes.index:
+            trab, prev, diff = (int(por_mes.at[chave, c]) for c in COLUNAS_MINUTOS)
+        else:
+            trab = prev = diff = 0
 
-        total_trab_geral += resumo["Total Trabalhado"]
-        total_prev_geral += resumo["Total Previsto"]
-        total_diff_geral += resumo["Saldo do dia"]
+        total_trab_geral += trab
+        total_prev_geral += prev
+        total_diff_geral += diff
 
         linhas.append({
-            "Mês": nome_aba,
-            "Total Trabalhado": format_timedelta(resumo["Total Trabalhado"]),
-            "Total Previsto": format_timedelta(resumo["Total Previsto"]),
-            "Saldo do dia": format_timedelta(resumo["Saldo do dia"])
+            "Mês": r["sheet"],
+            "Total Trabalhado": minutos_para_hhmm(trab),
+            "Total Previsto": minutos_para_hhmm(prev),
+            "Saldo do dia": minutos_para_hhmm(diff),
+            COLUNA_BANCO_HORAS: minutos_para_hhmm(banco_horas.saldo_em(_fim_do_mes(r["ano"], r["mes"]))),
         })
 
     linhas.append({
         "Mês": "TOTAL GERAL",
-        "Total Trabalhado": format_timedelta(total_trab_geral),
-        "Total Previsto": format_timedelta(total_prev_geral),
-        "Saldo do dia": format_timedelta(total_diff_geral),
+        "Total Trabalhado": minutos_para_hhmm(total_trab_geral),
+        "Total Previsto": minutos_para_hhmm(total_prev_geral),
+        "Saldo do dia": minutos_para_hhmm(total_diff_geral),
+        COLUNA_BANCO_HORAS: minutos_para_hhmm(banco_horas.saldo_final),
+    })
+
+    return pd.DataFrame(linhas)
+
+
+def montar_agregados(agregados: pd.DataFrame, granularidades=GRANULARIDADES,
+                     por_tipo: bool = False) -> pd.DataFrame:
+    """
+    Aba AGREGADOS: um bloco por granularidade (na ordem pedida), com o total
+    de cada período e, com `por_tipo`, uma linha por tipo do dia logo abaixo.
+    """
+    linhas = []
+    for g in granularidades:
+        rotulo = ROTULOS_GRANULARIDADE[g]
+        parte = agregados[agregados["granularidade"] == g]
+        tipos = parte.groupby("chave", sort=True) if por_tipo else None
+        for t in totais_periodo(agregados, g).itertuples(index=False):
+            linhas.append({
+                "Agrupamento": rotulo,
+                "Período": t.periodo,
+                "Tipo do Dia": "Todos",
+                "Dias": int(t.dias),
+                "Total Trabalhado": minutos_para_hhmm(int(t.trabalhado_min)),
+                "Total Previsto": minutos_para_hhmm(int(t.carga_min)),
+                "Saldo do dia": minutos_para_hhmm(int(t.saldo_min)),
+            })
+            if por_tipo:
+                for d in tipos.get_group(t.chave).itertuples(index=False):
+                    linhas.append({
+                        "Agrupamento": rotulo,
+                        "Período": t.periodo,
+                        "Tipo do Dia": d.tipo_dia,
+                        "Dias": int(d.dias),
+                        "Total Trabalhado": minutos_para_hhmm(int(d.trabalhado_min)),
+                        "Total Previsto": minutos_para_hhmm(int(d.carga_min)),
+                        "Saldo do dia": minutos_para_hhmm(int(d.saldo_min)),
+                    })
+
+    colunas = ["Agrupamento", "Período", "Tipo do Dia", "Dias",
+               "Total Trabalhado", "Total Previsto", "Saldo do dia"]
+    df = pd.DataFrame(linhas, columns=colunas)
+    return df if por_tipo else df.drop(columns="Tipo do Dia")
+
+
+def montar_anomalias(anomalias: list[dict]) -> pd.DataFrame:
+    """Aba ANOMALIAS: uma linha por problema encontrado em `verificar_resultados`."""
+    return pd.DataFrame({
+        "Data": [a["data"].strftime("%d/%m/%Y") for a in anomalias],
+        "Origem": [a["origem"] for a in anomalias],
+        "Problema": [DESCRICOES_PROBLEMA[a["problema"]] for a in anomalias],
+        "Detalhe": [a["detalhe"] for a in anomalias],
+    })
+
+
+def montar_resumo_lote(funcionarios: list[dict]) -> pd.DataFrame:
+    """
+    Resumo do modo lote: uma linha por funcionário (somando os meses
+    processados) e TOTAL GERAL. Cada item traz "nome", "meses", "resumos"
+    (os mesmos dicionários usados em `montar_consolidado`) e "erro".
+    """
+    linhas = []
+    total_trab_geral = 0
+    total_prev_geral = 0
+    total_diff_geral = 0
+
+    for f in funcionarios:
+        total_trab = sum(r["Total Trabalhado"] for r in f["resumos"])
+        total_prev = sum(r["Total Previsto"] for r in f["resumos"])
+        total_diff = sum(r["Saldo do dia"] for r in f["resumos"])
+
+        total_trab_geral += total_trab
+        total_prev_geral += total_prev
+        total_diff_geral += total_diff
+
+        linhas.append({
+            "Funcionário": f["nome"],
+            "Meses": f["meses"],
+            "Total Trabalhado": minutos_para_hhmm(total_trab),
+            "Total Previsto": minutos_para_hhmm(total_prev),
+            "Saldo do dia": minutos_para_hhmm(total_diff),
+            "Erro": f["erro"] or "",
+        })
+
+    linhas.append({
+        "Funcionário": "TOTAL GERAL",
+        "Meses": sum(f["meses"] for f in funcionarios),
+        "Total Trabalhado": minutos_para_hhmm(total_trab_geral),
+        "Total Previsto": minutos_para_hhmm(total_prev_geral),
+        "Saldo do dia": minutos_para_hhmm(total_diff_geral),
+        "Erro": "",
     })
 
     return pd.DataFrame(linhas)
@@ -4,6 +4,14 @@ def criar_estilos(workbook):
     """
     estilos = {}
 
+    # Cabeçalho das tabelas (mesmo visual do cabeçalho gerado pelo pandas)
+    estilos["cabecalho"] = workbook.add_format({
+        "bold": True,
+        "border": 1,
+        "align": "center",
+        "valign": "top",
+    })
+
     estilos["total"] = workbook.add_format({
         "bold": True,
         "bg_color": "#D9D9D9",
@@ -1,7 +1,16 @@
+import math
+import os
 from pathlib import Path
 import pandas as pd
+import xlsxwriter
 from xlsxwriter.utility import xl_col_to_name
+from src.excel.consolidado import COLUNA_BANCO_HORAS
 from src.excel.estilos import criar_estilos
+from src.regras.tipos_dia import REGRAS_COMPILADAS
+
+LARGURA_COLUNA = 18
+LARGURA_COLUNA_RESUMO = 20
+COLUNAS_PINTADAS = 6  # A:F nas abas mensais (A:G com a coluna Banco de Horas)
 
 def _aplicar_condicional_diferenca(ws, df, estilos, coluna_nome="Saldo do dia"):
     try:
@@ -23,111 +32,177 @@ def _aplicar_condicional_diferenca(ws, df, estilos, coluna_nome="Saldo do dia"):
     except Exception as e:
         print(f"Erro ao aplicar formatação condicional: {e}")
 
+def _escrever_linha(ws, linha_excel, valores, fmt=None, n_colunas_fmt=None):
+    """
+    Escreve uma linha de uma vez, cada célula uma única vez.
+    `fmt` vale para as `n_colunas_fmt` primeiras colunas (todas, se None);
+    valores ausentes (None/NaN) ficam como célula vazia.
+    """
+    for col, valor in enumerate(valores):
+        if valor is None or (isinstance(valor, float) and math.isnan(valor)):
+            continue
+        usar_fmt = fmt if n_colunas_fmt is None or col < n_colunas_fmt else None
+        ws.write(linha_excel, col, valor, usar_fmt)
+
+def _escrever_consolidado(workbook, estilos, df_consolidado, df_resumo_txt):
+    ws_cons = workbook.add_worksheet("CONSOLIDADO")
+
+    tem_resumo = df_resumo_txt is not None and not df_resumo_txt.empty
+
+    # larguras definidas antes das linhas (exigência do modo constant_memory)
+    larguras = {col: LARGURA_COLUNA for col in range(len(df_consolidado.columns))}
+    if tem_resumo:
+        for col in range(len(df_resumo_txt.columns) + 1):
+            larguras[col] = LARGURA_COLUNA_RESUMO
+    for col, largura in larguras.items():
+        ws_cons.set_column(col, col, largura)
+
+    _escrever_linha(ws_cons, 0, df_consolidado.columns, estilos["cabecalho"])
+
+    # TOTAL GERAL (linha inteira) já sai destacado
+    col_mes = df_consolidado.columns.get_loc("Mês")
+    for idx, valores in enumerate(df_consolidado.itertuples(index=False, name=None)):
+        fmt = estilos["total"] if valores[col_mes] == "TOTAL GERAL" else None
+        _escrever_linha(ws_cons, idx + 1, valores, fmt)
+
+    _aplicar_condicional_diferenca(ws_cons, df_consolidado, estilos, coluna_nome="Saldo do dia")
+    if COLUNA_BANCO_HORAS in df_consolidado.columns:
+        _aplicar_condicional_diferenca(ws_cons, df_consolidado, estilos, coluna_nome=COLUNA_BANCO_HORAS)
+
+    # ================== RESUMO DOS ARQUIVOS TXT ==================
+    if not tem_resumo:
+        return
+
+    start_row = len(df_consolidado) + 3  # uma linha em branco
+    # cabeçalho
+    ws_cons.write(start_row, 0, "Resumo", estilos["total"])
+    # tabela: colunas Tipo | Dias | Data1 | Data2 | Data3 | ...
+    headers = ["Tipo", "Dias"] + [f"Data {i+1}" for i in range(len(df_resumo_txt.columns) - 2)]
+    _escrever_linha(ws_cons, start_row + 1, headers, estilos["total"])
+
+    # escreve dados (colunas a partir de Data1, Data2, etc)
+    colunas_data = [c for c in df_resumo_txt.columns if c.startswith("Data")]
+    for i, r in enumerate(df_resumo_txt.to_dict("records")):
+        valores = [str(r.get("Tipo", "")), int(r.get("Dias", 0))]
+        for col_name in colunas_data:
+            value = r.get(col_name, "")
+            # converte NaN para string vazia
+            if pd.isna(value):
+                value = ""
+            valores.append(str(value))
+        _escrever_linha(ws_cons, start_row + 2 + i, valores)
+
+def _escrever_agregados(workbook, estilos, df_agregados):
+    ws = workbook.add_worksheet("AGREGADOS")
+    ws.set_column(0, len(df_agregados.columns) - 1, LARGURA_COLUNA)
+
+    _escrever_linha(ws, 0, df_agregados.columns, estilos["cabecalho"])
+
+    # com quebra por tipo, a linha "Todos" de cada período sai destacada
+    col_tipo = df_agregados.columns.get_loc("Tipo do Dia") if "Tipo do Dia" in df_agregados.columns else None
+    for idx, valores in enumerate(df_agregados.itertuples(index=False, name=None)):
+        fmt = estilos["total"] if col_tipo is not None and valores[col_tipo] == "Todos" else None
+        _escrever_linha(ws, idx + 1, valores, fmt)
+
+    _aplicar_condicional_diferenca(ws, df_agregados, estilos, coluna_nome="Saldo do dia")
+
+def _escrever_anomalias(workbook, estilos, df_anomalias):
+    ws = workbook.add_worksheet("ANOMALIAS")
+    ws.set_column(0, 1, LARGURA_COLUNA)
+    ws.set_column(2, 3, 2 * LARGURA_COLUNA)  # Problema e Detalhe
+
+    _escrever_linha(ws, 0, df_anomalias.columns, estilos["cabecalho"])
+    for idx, valores in enumerate(df_anomalias.itertuples(index=False, name=None)):
+        _escrever_linha(ws, idx + 1, valores)
+
+def _escrever_aba_mes(workbook, estilos, sheet_name, df_mes):
+    ws = workbook.add_worksheet(sheet_name)
+    ws.set_column(0, len(df_mes.columns) - 1, LARGURA_COLUNA)
+
+    _escrever_linha(ws, 0, df_mes.columns, estilos["cabecalho"])
+
+    # Cor escolhida na escrita, pelo tipo do dia (A:F); dia normal não colore
+    col_data = df_mes.columns.get_loc("Data")
+    col_tipo = df_mes.columns.get_loc("Tipo do Dia")
+    tem_banco = COLUNA_BANCO_HORAS in df_mes.columns
+    n_pintadas = COLUNAS_PINTADAS + tem_banco
+    for idx, valores in enumerate(df_mes.itertuples(index=False, name=None)):
+        if valores[col_data] == "TOTAL MÊS":
+            fmt = estilos["total"]
+        else:
+            chave_estilo = REGRAS_COMPILADAS.estilo.get(valores[col_tipo])
+            fmt = estilos[chave_estilo] if chave_estilo else None
+        _escrever_linha(ws, idx + 1, valores, fmt, n_pintadas)
+
+    _aplicar_condicional_diferenca(ws, df_mes, estilos, coluna_nome="Saldo do dia")
+    if tem_banco:
+        _aplicar_condicional_diferenca(ws, df_mes, estilos, coluna_nome=COLUNA_BANCO_HORAS)
+
+def _caminho_temporario(caminho_saida: Path) -> Path:
+    """Arquivo temporário na mesma pasta, para trocar a planilha de forma atômica."""
+    caminho_saida = Path(caminho_saida)
+    return caminho_saida.with_name(f".{caminho_saida.stem}.tmp{caminho_saida.suffix}")
+
 def gerar_arquivo_excel(caminho_saida: Path,
                         resultados: list[dict],
                         df_consolidado: pd.DataFrame,
-                        df_resumo_txt: pd.DataFrame | None = None):
+                        df_resumo_txt: pd.DataFrame | None = None,
+                        memoria_constante: bool = False,
+                        df_agregados: pd.DataFrame | None = None,
+                        df_anomalias: pd.DataFrame | None = None):
+    """
+    Grava a planilha direto pelo xlsxwriter, linha a linha e cada célula
+    uma única vez. Com `memoria_constante`, usa o modo `constant_memory`
+    (as linhas vão para o disco assim que escritas). Com `df_agregados`
+    (ver `montar_agregados`), a aba AGREGADOS entra logo após a CONSOLIDADO;
+    com `df_anomalias` (ver `montar_anomalias`), a aba ANOMALIAS vem em seguida.
+    O arquivo é gravado num temporário e só então substitui o anterior,
+    então quem estiver lendo a planilha nunca vê um arquivo pela metade.
+    """
 
     print(f"Gerando Excel: {caminho_saida}")
 
-    with pd.ExcelWriter(caminho_saida, engine="xlsxwriter") as writer:
-        workbook = writer.book
+    tmp = _caminho_temporario(caminho_saida)
+    with xlsxwriter.Workbook(str(tmp), {"constant_memory": memoria_constante}) as workbook:
         estilos = criar_estilos(workbook)
 
         # ================== ABA CONSOLIDADO (primeira) ==================
-        df_consolidado.to_excel(writer, sheet_name="CONSOLIDADO", index=False)
-        ws_cons = writer.sheets["CONSOLIDADO"]
-
-        for col in range(len(df_consolidado.columns)):
-            ws_cons.set_column(col, col, 18)
-
-        _aplicar_condicional_diferenca(ws_cons, df_consolidado, estilos, coluna_nome="Saldo do dia")
-
-        # Destaca TOTAL GERAL (linha inteira)
-        for idx, row in df_consolidado.iterrows():
-            if row["Mês"] == "TOTAL GERAL":
-                for col in range(len(df_consolidado.columns)):  # A:H
-                    ws_cons.write(idx + 1, col, df_consolidado.iloc[idx, col], estilos["total"])
-
-        # ================== RESUMO DOS ARQUIVOS TXT ==================
-        if df_resumo_txt is not None and not df_resumo_txt.empty:
-            start_row = len(df_consolidado) + 3  # uma linha em branco
-            # cabeçalho
-            ws_cons.write(start_row, 0, "Resumo", estilos["total"])
-            # tabela: colunas Tipo | Dias | Data1 | Data2 | Data3 | ...
-            
-            # escreve cabeçalho
-            headers = ["Tipo", "Dias"] + [f"Data {i+1}" for i in range(len(df_resumo_txt.columns) - 2)]
-            for c, h in enumerate(headers):
-                ws_cons.write(start_row + 1, c, h, estilos["total"])
-
-            # escreve dados
-            for i, r in df_resumo_txt.iterrows():
-                ws_cons.write(start_row + 2 + i, 0, str(r.get("Tipo", "")))
-                ws_cons.write(start_row + 2 + i, 1, int(r.get("Dias", 0)))
-                # escreve datas (colunas a partir de Data1, Data2, etc)
-                col_idx = 2
-                for col_name in df_resumo_txt.columns:
-                    if col_name.startswith("Data"):
-                        value = r.get(col_name, "")
-                        # converte NaN para string vazia
-                        if pd.isna(value):
-                            value = ""
-                        ws_cons.write(start_row + 2 + i, col_idx, str(value))
-                        col_idx += 1
-
-            # ajusta colunas para o bloco de resumo
-            for col in range(len(df_resumo_txt.columns) + 1):
-                ws_cons.set_column(col, col, 20)
+        _escrever_consolidado(workbook, estilos, df_consolidado, df_resumo_txt)
+        if df_agregados is not None:
+            _escrever_agregados(workbook, estilos, df_agregados)
+        if df_anomalias is not None:
+            _escrever_anomalias(workbook, estilos, df_anomalias)
 
         # ================== ABAS MENSAIS ==================
         for r in resultados:
-            sheet_name = r["sheet"]
-            df_mes = r["df"]
-
-            df_mes.to_excel(writer, sheet_name=sheet_name, index=False)
-            ws = writer.sheets[sheet_name]
-
-            for col in range(len(df_mes.columns)):
-                ws.set_column(col, col, 18)
-
-            _aplicar_condicional_diferenca(ws, df_mes, estilos, coluna_nome="Saldo do dia")
-
-            # Pintar linhas até a última coluna de dados (A:E)
-            for idx, row in df_mes.iterrows():
-                excel_row = idx + 1  # +1 por causa do cabeçalho
-                tipo = row["Tipo do Dia"]
-                data_str = row["Data"]
-
-                if data_str == "TOTAL MÊS":
-                    for col in range(6):  # A:F
-                        ws.write(excel_row, col, df_mes.iloc[idx, col], estilos["total"])
-                    continue
-
-                if tipo == "Férias":
-                    fmt = estilos["ferias"]
-                elif tipo == "Atestado":
-                    fmt = estilos["atestado"]
-                elif tipo == "Aniversário":
-                    fmt = estilos["aniversario"]
-                elif tipo == "Feriado":
-                    fmt = estilos["feriado"]
-                elif tipo == "Abono":
-                    fmt = estilos["abono"]
-                elif tipo == "Ajuste manual":
-                    fmt = estilos["ajuste_manual"]
-                elif tipo == "Final de Semana":
-                    fmt = estilos["fds"]
-                elif tipo == "Quarta-feira de Cinzas":
-                    fmt = estilos["quartacinza"]                    
-                else:
-                    continue  # dia normal, não colore
-
-                for col in range(6):  # A:F
-                    ws.write(excel_row, col, df_mes.iloc[idx, col], fmt)
-
-                for col in range(len(df_mes.columns)):
-                    ws.set_column(col, col, 18)
+            _escrever_aba_mes(workbook, estilos, r["sheet"], r["df"])
+
+    os.replace(tmp, caminho_saida)
+
+    print("Excel gerado com sucesso!")
+
+
+def gerar_resumo_lote(caminho_saida: Path, df_resumo: pd.DataFrame, memoria_constante: bool = False):
+    """Planilha do modo lote com uma linha por funcionário (ver `montar_resumo_lote`)."""
+
+    print(f"Gerando Excel: {caminho_saida}")
+
+    tmp = _caminho_temporario(caminho_saida)
+    with xlsxwriter.Workbook(str(tmp), {"constant_memory": memoria_constante}) as workbook:
+        estilos = criar_estilos(workbook)
+
+        ws = workbook.add_worksheet("FUNCIONARIOS")
+        ws.set_column(0, len(df_resumo.columns) - 1, LARGURA_COLUNA)
+
+        _escrever_linha(ws, 0, df_resumo.columns, estilos["cabecalho"])
+
+        # Destaca TOTAL GERAL (última linha)
+        ultima = len(df_resumo) - 1
+        for idx, valores in enumerate(df_resumo.itertuples(index=False, name=None)):
+            _escrever_linha(ws, idx + 1, valores, estilos["total"] if idx == ultima else None)
+
+        _aplicar_condicional_diferenca(ws, df_resumo, estilos, coluna_nome="Saldo do dia")
 
+    os.replace(tmp, caminho_saida)
 
     print("Excel gerado com sucesso!")
@@ -0,0 +1,283 @@
+import calendar
+import sqlite3
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+from src.regras.banco_horas import BancoHoras
+from src.utils.manifesto import Manifesto
+from src.utils.metricas import agora_iso
+
+# Versão do esquema; um banco de versão diferente é recriado na abertura
+# 2: coluna dias.acumulado_min (banco de horas gravado)
+VERSAO_BANCO = 2
+
+# Quanto tempo esperar pelo lock de escrita (no lote, vários processos gravam no mesmo arquivo)
+ESPERA_LOCK_S = 30.0
+
+ORIGEM_HTML = "html"
+ORIGEM_MANUAL = "manual"
+
+TIPO_FERIAS = "ferias"
+TIPO_ATESTADO = "atestado"
+TIPO_ANIVERSARIO = "aniversario"
+TIPO_ABONO = "abono"
+# mesma ordem das quatro primeiras listas de `carregar_listas`
+TIPOS_ESPECIAIS = (TIPO_FERIAS, TIPO_ATESTADO, TIPO_ANIVERSARIO, TIPO_ABONO)
+
+# Chave primária (funcionario, data, ...) em todas as tabelas de fatos:
+# consultas por funcionário e período viram varreduras de faixa no índice
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS funcionarios (
+    funcionario     TEXT PRIMARY KEY,
+    impressao_listas TEXT NOT NULL,
+    atualizado_em   TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meses (
+    funcionario     TEXT NOT NULL,
+    ano             INTEGER NOT NULL,
+    mes             INTEGER NOT NULL,
+    arquivo         TEXT NOT NULL,
+    impressao       TEXT NOT NULL,
+    atualizado_em   TEXT NOT NULL,
+    PRIMARY KEY (funcionario, ano, mes)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS dias (
+    funcionario     TEXT NOT NULL,
+    data            TEXT NOT NULL,
+    dia_semana      INTEGER NOT NULL,
+    tipo_dia        TEXT NOT NULL,
+    trabalhado_min  INTEGER NOT NULL,
+    carga_min       INTEGER NOT NULL,
+    saldo_min       INTEGER NOT NULL,
+    ajuste_manual   INTEGER NOT NULL,
+    acumulado_min   INTEGER NOT NULL,
+    PRIMARY KEY (funcionario, data)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS dias_por_data ON dias (data, funcionario);
+CREATE TABLE IF NOT EXISTS batidas (
+    funcionario     TEXT NOT NULL,
+    data            TEXT NOT NULL,
+    origem          TEXT NOT NULL,
+    seq             INTEGER NOT NULL,
+    entrada_min     INTEGER,
+    saida_min       INTEGER,
+    PRIMARY KEY (funcionario, data, origem, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS dias_especiais (
+    funcionario     TEXT NOT NULL,
+    tipo            TEXT NOT NULL,
+    inicio          TEXT NOT NULL,
+    fim             TEXT NOT NULL,
+    PRIMARY KEY (funcionario, tipo, inicio)
+) WITHOUT ROWID;
+"""
+
+# Totais por mês somados direto da tabela `dias` (mesmos números do CONSOLIDADO).
+# O LEFT JOIN mantém meses sem nenhum dia contado, como a planilha faz.
+SQL_CONSOLIDADO = """
+SELECT m.funcionario, m.ano, m.mes,
+       COALESCE(SUM(d.trabalhado_min), 0) AS trabalhado,
+       COALESCE(SUM(d.carga_min), 0) AS previsto,
+       COALESCE(SUM(d.saldo_min), 0) AS saldo
+FROM meses m
+LEFT JOIN dias d
+       ON d.funcionario = m.funcionario
+      AND d.data BETWEEN printf('%04d-%02d-01', m.ano, m.mes)
+                     AND printf('%04d-%02d-31', m.ano, m.mes)
+WHERE (:funcionario IS NULL OR m.funcionario = :funcionario)
+  AND (:ano IS NULL OR m.ano = :ano)
+GROUP BY m.funcionario, m.ano, m.mes
+ORDER BY m.funcionario, m.ano, m.mes
+"""
+
+
+def _limites_mes(ano: int, mes: int) -> tuple[str, str]:
+    return date(ano, mes, 1).isoformat(), date(ano, mes, calendar.monthrange(ano, mes)[1]).isoformat()
+
+
+def _linhas_batidas(funcionario: str, d: date, origem: str, info) -> list[tuple]:
+    """Uma linha por par entrada/saída; a batida que falta fica NULL."""
+    entradas, saidas = info.entradas, info.saidas
+    dia = d.isoformat()
+    return [(funcionario, dia, origem, k + 1,
+             entradas[k] if k < len(entradas) else None,
+             saidas[k] if k < len(saidas) else None)
+            for k in range(max(len(entradas), len(saidas)))]
+
+
+def _intervalos(lista) -> list[tuple[date, date]]:
+    if hasattr(lista, "intervalos"):
+        return lista.intervalos()
+    return [(d, d) for d in sorted(lista)]
+
+
+class BancoPontos:
+    """
+    Base SQLite local com os fatos de cada funcionário: batidas brutas (do
+    HTML e dos pontos manuais), a classificação e o saldo de cada dia
+    calculados por `processar_mes` e as listas de dias especiais.
+
+    Cada mês guarda a mesma impressão digital usada pelo manifesto: numa
+    nova gravação só os meses cuja impressão mudou têm os dias e batidas
+    trocados (numa transação por funcionário). Consultas históricas, como
+    os totais do CONSOLIDADO, saem de agregações SQL indexadas, sem reler
+    HTML nenhum.
+
+    Cada dia guarda também o banco de horas acumulado até ele: um mês
+    regravado recalcula só os seus dias e desloca os posteriores pela
+    diferença de saldo, num UPDATE de faixa.
+    """
+
+    def __init__(self, caminho: Path):
+        self.caminho = Path(caminho)
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self.conexao = sqlite3.connect(self.caminho, timeout=ESPERA_LOCK_S)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self._preparar()
+
+    def _preparar(self):
+        versao = self.conexao.execute("PRAGMA user_version").fetchone()[0]
+        with self.conexao:
+            if versao not in (0, VERSAO_BANCO):
+                for tabela in ("funcionarios", "meses", "dias", "batidas", "dias_especiais"):
+                    self.conexao.execute(f"DROP TABLE IF EXISTS {tabela}")
+            self.conexao.executescript(ESQUEMA)
+            self.conexao.execute(f"PRAGMA user_version = {VERSAO_BANCO}")
+
+    def fechar(self):
+        self.conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    # ---- gravação ----
+    def gravar_funcionario(self, funcionario: str, resultados: list[dict], listas: tuple) -> int:
+        """
+        Grava os meses de `resultados` (saída de `processar_meses`) e as
+        listas do funcionário. Devolve quantos meses foram (re)gravados.
+        """
+        agora = agora_iso()
+        cur = self.conexao.cursor()
+        with self.conexao:
+            self._gravar_listas(cur, funcionario, listas, agora)
+
+            anteriores = dict(((ano, mes), impressao) for ano, mes, impressao in cur.execute(
+                "SELECT ano, mes, impressao FROM meses WHERE funcionario = ?", (funcionario,)))
+            gravados = 0
+            for r in resultados:
+                impressao = r.get("impressao") or Manifesto.impressao_mes(r["arquivo"], listas)
+                if anteriores.get((r["ano"], r["mes"])) == impressao:
+                    continue
+                self._gravar_mes(cur, funcionario, r, impressao, agora)
+                gravados += 1
+        return gravados
+
+    def _gravar_listas(self, cur, funcionario: str, listas: tuple, agora: str):
+        impressao = Manifesto.impressao_listas(listas)
+        linha = cur.execute("SELECT impressao_listas FROM funcionarios WHERE funcionario = ?",
+                            (funcionario,)).fetchone()
+        if linha is not None and linha[0] == impressao:
+            return
+
+        *especiais, pontos_manuais = listas
+        cur.execute("DELETE FROM dias_especiais WHERE funcionario = ?", (funcionario,))
+        cur.executemany("INSERT INTO dias_especiais VALUES (?, ?, ?, ?)",
+                        [(funcionario, tipo, inicio.isoformat(), fim.isoformat())
+                         for tipo, lista in zip(TIPOS_ESPECIAIS, especiais)
+                         for inicio, fim in _intervalos(lista)])
+
+        cur.execute("DELETE FROM batidas WHERE funcionario = ? AND origem = ?", (funcionario, ORIGEM_MANUAL))
+        cur.executemany("INSERT INTO batidas VALUES (?, ?, ?, ?, ?, ?)",
+                        [linha for d, info in (pontos_manuais.items() if pontos_manuais else ())
+                         for linha in _linhas_batidas(funcionario, d, ORIGEM_MANUAL, info)])
+
+        cur.execute("INSERT INTO funcionarios VALUES (?, ?, ?) "
+                    "ON CONFLICT (funcionario) DO UPDATE SET "
+                    "impressao_listas = excluded.impressao_listas, atualizado_em = excluded.atualizado_em",
+                    (funcionario, impressao, agora))
+
+    def _gravar_mes(self, cur, funcionario: str, r: dict, impressao: str, agora: str):
+        inicio, fim = _limites_mes(r["ano"], r["mes"])
+        (antigo,) = cur.execute("SELECT COALESCE(SUM(saldo_min), 0) FROM dias "
+                                "WHERE funcionario = ? AND data BETWEEN ? AND ?",
+                                (funcionario, inicio, fim)).fetchone()
+        anterior = cur.execute("SELECT acumulado_min FROM dias WHERE funcionario = ? AND data < ? "
+                               "ORDER BY data DESC LIMIT 1", (funcionario, inicio)).fetchone()
+        base = anterior[0] if anterior is not None else 0
+        cur.execute("DELETE FROM dias WHERE funcionario = ? AND data BETWEEN ? AND ?",
+                    (funcionario, inicio, fim))
+        cur.execute("DELETE FROM batidas WHERE funcionario = ? AND origem = ? AND data BETWEEN ? AND ?",
+                    (funcionario, ORIGEM_HTML, inicio, fim))
+
+        dias = r["dias"].sort_values("data", kind="stable")
+        saldos = dias["saldo_min"].to_numpy(np.int64)
+        cur.executemany("INSERT INTO dias VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        zip([funcionario] * len(dias),
+                            dias["data"].dt.strftime("%Y-%m-%d"),
+                            dias["dia_semana"].tolist(),
+                            dias["tipo_dia"].tolist(),
+                            dias["trabalhado_min"].tolist(),
+                            dias["carga_min"].tolist(),
+                            dias["saldo_min"].tolist(),
+                            dias["ajuste_manual"].astype(int).tolist(),
+                            (base + np.cumsum(saldos)).tolist()))
+        # dias dos meses seguintes: mesmo banco, deslocado pela diferença de saldo do mês
+        delta = int(saldos.sum()) - antigo
+        if delta:
+            cur.execute("UPDATE dias SET acumulado_min = acumulado_min + ? WHERE funcionario = ? AND data > ?",
+                        (delta, funcionario, fim))
+
+        cur.executemany("INSERT INTO batidas VALUES (?, ?, ?, ?, ?, ?)",
+                        [linha for d, info in sorted(r["batidas"].items())
+                         if inicio <= d.isoformat() <= fim
+                         for linha in _linhas_batidas(funcionario, d, ORIGEM_HTML, info)])
+
+        cur.execute("INSERT INTO meses VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (funcionario, ano, mes) DO UPDATE SET "
+                    "arquivo = excluded.arquivo, impressao = excluded.impressao, "
+                    "atualizado_em = excluded.atualizado_em",
+                    (funcionario, r["ano"], r["mes"], Path(r["arquivo"]).name, impressao, agora))
+
+    # ---- consultas ----
+    def funcionarios(self) -> list[str]:
+        return [f for (f,) in self.conexao.execute("SELECT funcionario FROM funcionarios ORDER BY funcionario")]
+
+    def consolidado(self, funcionario: str | None = None, ano: int | None = None) -> list[dict]:
+        """
+        Totais mensais em minutos (os mesmos de `montar_consolidado`), de um
+        funcionário ou de todos, opcionalmente de um ano só.
+        """
+        linhas = self.conexao.execute(SQL_CONSOLIDADO, {"funcionario": funcionario, "ano": ano})
+        return [{"funcionario": f, "ano": a, "mes": m,
+                 "Total Trabalhado": trab, "Total Previsto": prev, "Saldo do dia": saldo}
+                for f, a, m, trab, prev, saldo in linhas]
+
+    def totais_funcionarios(self, ano: int | None = None) -> list[dict]:
+        """Soma por funcionário (as linhas de `montar_resumo_lote`), em minutos."""
+        linhas = self.conexao.execute(
+            "SELECT funcionario, COUNT(*), SUM(trabalhado), SUM(previsto), SUM(saldo) "
+            f"FROM ({SQL_CONSOLIDADO}) GROUP BY funcionario ORDER BY funcionario",
+            {"funcionario": None, "ano": ano})
+        return [{"nome": f, "meses": n, "Total Trabalhado": trab, "Total Previsto": prev, "Saldo do dia": saldo}
+                for f, n, trab, prev, saldo in linhas]
+
+    def dias(self, funcionario: str, inicio: date, fim: date) -> list[tuple]:
+        """Dias classificados de um funcionário no período (inclusivo), em ordem de data."""
+        return self.conexao.execute(
+            "SELECT data, dia_semana, tipo_dia, trabalhado_min, carga_min, saldo_min, ajuste_manual "
+            "FROM dias WHERE funcionario = ? AND data BETWEEN ? AND ? ORDER BY data",
+            (funcionario, inicio.isoformat(), fim.isoformat())).fetchall()
+
+    def banco_horas(self, funcionario: str) -> BancoHoras:
+        """Banco de horas do funcionário como está gravado (sem reler HTML nem refazer as somas)."""
+        linhas = self.conexao.execute("SELECT data, acumulado_min FROM dias WHERE funcionario = ? ORDER BY data",
+                                      (funcionario,)).fetchall()
+        if not linhas:
+            return BancoHoras()
+        datas, acumulado = zip(*linhas)
+        return BancoHoras.de_acumulado(datas, acumulado)
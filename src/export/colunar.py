@@ -0,0 +1,163 @@
+import csv
+import re
+from pathlib import Path
+
+FORMATO_AUTO = "auto"
+FORMATO_PARQUET = "parquet"
+FORMATO_ARROW = "arrow"   # Arrow IPC (arquivo Feather v2)
+FORMATO_CSV = "csv"
+FORMATOS = (FORMATO_AUTO, FORMATO_PARQUET, FORMATO_ARROW, FORMATO_CSV)
+
+EXTENSOES = {
+    FORMATO_PARQUET: "parquet",
+    FORMATO_ARROW: "arrow",
+    FORMATO_CSV: "csv",
+}
+
+ARQ_DIAS = "dias"
+ARQ_TOTAIS = "totais"
+ARQ_AGREGADOS = "agregados"
+
+# Pastas de partição dos dias (dias/ano=AAAA/mes=MM)
+_re_particao_ano = re.compile(r"ano=\d{4}$")
+_re_particao_mes = re.compile(r"mes=\d{2}$")
+
+
+def _pyarrow_disponivel() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def resolver_formato(formato: str) -> str:
+    """
+    Parquet e Arrow dependem do pyarrow (opcional). Sem ele, "auto" e os
+    formatos colunares caem para CSV, que só usa a biblioteca padrão.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de exportação desconhecido: {formato}")
+    if formato == FORMATO_CSV:
+        return formato
+    if _pyarrow_disponivel():
+        return FORMATO_PARQUET if formato == FORMATO_AUTO else formato
+    if formato != FORMATO_AUTO:
+        print(f"pyarrow não instalado: exportando em CSV em vez de {formato}")
+    return FORMATO_CSV
+
+
+def _tabela_arrow(df):
+    """DataFrame -> pyarrow.Table, com datas gravadas como date32 (sem hora)."""
+    import pyarrow as pa
+
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    for i, campo in enumerate(tabela.schema):
+        if pa.types.is_timestamp(campo.type):
+            tabela = tabela.set_column(i, campo.name, tabela.column(i).cast(pa.date32()))
+    return tabela
+
+
+def _gravar(df, caminho: Path, formato: str):
+    import pandas as pd
+
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    tmp = caminho.with_name(caminho.name + ".tmp")
+
+    if formato == FORMATO_PARQUET:
+        import pyarrow.parquet as pq
+        pq.write_table(_tabela_arrow(df), tmp)
+    elif formato == FORMATO_ARROW:
+        import pyarrow.feather as feather
+        feather.write_feather(_tabela_arrow(df), tmp)
+    else:
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(df.columns)
+            for linha in df.itertuples(index=False, name=None):
+                w.writerow(v.date().isoformat() if isinstance(v, pd.Timestamp) else v for v in linha)
+
+    tmp.replace(caminho)
+
+
+def _remover_outros(pasta: Path, nome: str, manter: Path | None = None):
+    """
+    Apaga `nome`.<ext> de qualquer formato (e restos .tmp) em `pasta`, menos
+    `manter`: uma exportação anterior em outro formato não fica ao lado.
+    """
+    for ext in EXTENSOES.values():
+        for caminho in (pasta / f"{nome}.{ext}", pasta / f"{nome}.{ext}.tmp"):
+            if caminho != manter and caminho.exists():
+                caminho.unlink()
+
+
+def _remover_particoes_antigas(pasta_dias: Path, produzidas: set[Path]):
+    """Esvazia e remove as partições dos meses que esta exportação não gravou."""
+    if not pasta_dias.is_dir():
+        return
+    for pasta_ano in pasta_dias.iterdir():
+        if not (pasta_ano.is_dir() and _re_particao_ano.match(pasta_ano.name)):
+            continue
+        for particao in pasta_ano.iterdir():
+            if particao.is_dir() and _re_particao_mes.match(particao.name) and particao not in produzidas:
+                _remover_outros(particao, ARQ_DIAS)
+                if not any(particao.iterdir()):
+                    particao.rmdir()
+        if not any(pasta_ano.iterdir()):
+            pasta_ano.rmdir()
+
+
+def montar_totais(resultados: list[dict]):
+    """Totais mensais (os mesmos do CONSOLIDADO) em minutos inteiros, como DataFrame."""
+    import pandas as pd
+
+    return pd.DataFrame({
+        "ano": [r["ano"] for r in resultados],
+        "mes": [r["mes"] for r in resultados],
+        "aba": [r["sheet"] for r in resultados],
+        "trabalhado_min": [r["resumo"]["Total Trabalhado"] for r in resultados],
+        "previsto_min": [r["resumo"]["Total Previsto"] for r in resultados],
+        "saldo_min": [r["resumo"]["Saldo do dia"] for r in resultados],
+    }).astype({"ano": "int16", "mes": "int8", "trabalhado_min": "int64",
+               "previsto_min": "int64", "saldo_min": "int64"})
+
+
+def exportar_resultados(pasta_destino: Path, resultados: list[dict], formato: str = FORMATO_AUTO,
+                        agregados=None) -> str:
+    """
+    Exporta os dias de cada mês em formato longo e tipado, particionado
+    no estilo Hive:
+
+        pasta_destino/dias/ano=2025/mes=03/dias.parquet
+        pasta_destino/totais.parquet
+
+    Cada partição é regravada por inteiro, então reexportar um mês não
+    duplica linhas. A pasta passa a refletir só esta exportação: arquivos
+    de outro formato, partições de meses que não vieram em `resultados` e
+    um `agregados` antigo são apagados. Com `agregados` (ver
+    `calcular_agregados`), grava também `agregados.<ext>` com os totais por
+    período e tipo do dia, em minutos. Devolve o formato efetivamente usado.
+    """
+    formato = resolver_formato(formato)
+    ext = EXTENSOES[formato]
+    pasta_destino = Path(pasta_destino)
+
+    produzidas = set()
+    for r in resultados:
+        particao = pasta_destino / ARQ_DIAS / f"ano={r['ano']}" / f"mes={r['mes']:02d}"
+        caminho = particao / f"{ARQ_DIAS}.{ext}"
+        _gravar(r["dias"], caminho, formato)
+        _remover_outros(particao, ARQ_DIAS, manter=caminho)
+        produzidas.add(particao)
+    _remover_particoes_antigas(pasta_destino / ARQ_DIAS, produzidas)
+
+    caminho = pasta_destino / f"{ARQ_TOTAIS}.{ext}"
+    _gravar(montar_totais(resultados), caminho, formato)
+    _remover_outros(pasta_destino, ARQ_TOTAIS, manter=caminho)
+
+    caminho = None
+    if agregados is not None:
+        caminho = pasta_destino / f"{ARQ_AGREGADOS}.{ext}"
+        _gravar(agregados, caminho, formato)
+    _remover_outros(pasta_destino, ARQ_AGREGADOS, manter=caminho)
+    return formato
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+from collections import defaultdict
+from datetime import date
+from pathlib import Path
+
+from src.data.registro_dia import RegistroDia
+from src.parser.formatos import extrair_horas_por_dia
+from src.parser.html_parser import MODO_PADRAO, VERSAO_PARSER
+
+# Limite padrão de entradas no cache (um arquivo por export distinto)
+MAX_ENTRADAS_PADRAO = 256
+
+
+def hash_arquivo(caminho: Path) -> str:
+    """SHA-256 do conteúdo do arquivo (o nome não entra na chave)."""
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def hash_conteudo(conteudo: bytes) -> str:
+    """Mesmo hash de `hash_arquivo`, para um conteúdo já lido em memória."""
+    return hashlib.sha256(conteudo).hexdigest()
+
+
+class CacheParse:
+    """
+    Cache em disco do resultado de `extrair_horas_por_dia`.
+
+    Cada entrada é um JSON compacto em `pasta`, nomeado pelo hash do conteúdo
+    do HTML e pela versão do parser. Meses fechados não mudam depois de
+    baixados, então a segunda execução lê só o JSON e não toca no HTML.
+    Quando o número de entradas passa de `max_entradas`, as menos usadas
+    recentemente (mtime mais antigo) são removidas.
+    """
+
+    def __init__(self, pasta: Path, max_entradas: int = MAX_ENTRADAS_PADRAO):
+        self.pasta = Path(pasta)
+        self.max_entradas = max_entradas
+        self.acertos = 0
+        self.falhas = 0
+
+    def _caminho(self, chave: str) -> Path:
+        return self.pasta / f"{chave}.v{VERSAO_PARSER}.json"
+
+    def extrair(self, html_file: Path, modo: str = MODO_PADRAO, conteudo: bytes | None = None,
+                hash_html: str | None = None):
+        """
+        Mesmo retorno de `extrair_horas_por_dia`, consultando o cache antes.
+        `hash_html` é o hash já calculado do arquivo (ex.: pelo manifesto).
+        """
+        if hash_html is not None:
+            chave = hash_html
+        elif conteudo is not None:
+            chave = hash_conteudo(conteudo)
+        else:
+            chave = hash_arquivo(html_file)
+        caminho = self._caminho(chave)
+
+        dias = self._ler(caminho)
+        if dias is not None:
+            self.acertos += 1
+            return dias
+
+        self.falhas += 1
+        dias = extrair_horas_por_dia(html_file, modo=modo, conteudo=conteudo)
+        self._gravar(caminho, dias)
+        return dias
+
+    def _ler(self, caminho: Path):
+        try:
+            conteudo = json.loads(caminho.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+        dias = defaultdict(RegistroDia)
+        try:
+            for iso, registro in conteudo.items():
+                dias[date.fromisoformat(iso)] = RegistroDia.de_lista(registro)
+        except (TypeError, ValueError, OverflowError):
+            return None
+
+        # marca como usada recentemente (política LRU da limpeza)
+        try:
+            os.utime(caminho)
+        except OSError:
+            pass
+        return dias
+
+    def _gravar(self, caminho: Path, dias):
+        conteudo = {
+            d.isoformat(): info.como_lista()
+            for d, info in dias.items()
+        }
+        try:
+            self.pasta.mkdir(parents=True, exist_ok=True)
+            tmp = caminho.with_suffix(".tmp")
+            tmp.write_text(json.dumps(conteudo, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, caminho)
+        except OSError as e:
+            print(f"Não foi possível gravar o cache de parse: {e}")
+            return
+        self._aplicar_limite()
+
+    def _aplicar_limite(self):
+        arquivos = list(self.pasta.glob("*.json"))
+        excesso = len(arquivos) - self.max_entradas
+        if excesso <= 0:
+            return
+        arquivos.sort(key=lambda p: p.stat().st_mtime)
+        for p in arquivos[:excesso]:
+            try:
+                p.unlink()
+            except OSError:
+                pass
+
+    def limpar(self) -> int:
+        """Remove todas as entradas do cache. Retorna quantas foram apagadas."""
+        if not self.pasta.exists():
+            return 0
+        removidos = 0
+        for p in list(self.pasta.glob("*.json")) + list(self.pasta.glob("*.tmp")):
+            try:
+                p.unlink()
+                removidos += 1
+            except OSError:
+                pass
+        return removidos
+
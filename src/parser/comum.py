@@ -0,0 +1,38 @@
+from datetime import datetime
+import re
+
+from src.utils.time_utils import hhmm_para_minutos
+
+# Peças comuns aos extratores de cada formato (HTML do portal, CSV, ...):
+# todos entregam o mesmo dicionário de `RegistroDia` por data.
+
+regex_data = re.compile(r"(\d{2}/\d{2}/\d{4})")
+regex_hora = re.compile(r"^\d{1,2}:\d{2}$")
+
+
+def registrar_linha(dias, texto_data, entrada_val, saida_val, label_txt):
+    """
+    Aplica uma linha da folha (um período) ao dicionário de dias
+    (`RegistroDia` por data). Sem data DD/MM/AAAA em `texto_data` a linha é
+    ignorada; horários e total fora do formato HH:MM não entram.
+    """
+    m = regex_data.search(texto_data or "")
+    if not m:
+        return
+
+    try:
+        data_dia = datetime.strptime(m.group(1), "%d/%m/%Y").date()
+    except ValueError:
+        return
+
+    registro_dia = dias[data_dia]
+
+    if entrada_val and regex_hora.match(entrada_val):
+        registro_dia.entradas.append(hhmm_para_minutos(entrada_val))
+
+    if saida_val and regex_hora.match(saida_val):
+        registro_dia.saidas.append(hhmm_para_minutos(saida_val))
+
+    if label_txt:
+        # label já validado por regex_hora: soma direto em minutos
+        registro_dia.total_min += hhmm_para_minutos(label_txt)
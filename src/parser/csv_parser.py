@@ -0,0 +1,58 @@
+import csv
+import io
+import re
+from collections import defaultdict
+
+from src.data.registro_dia import RegistroDia
+from src.parser.comum import regex_hora, registrar_linha
+from src.utils.time_utils import hhmm_para_minutos, minutos_para_hhmm
+
+# Cabeçalho do CSV de pontos: Data;Entrada;Saída[;Total] (também com "," e sem acento)
+_re_cabecalho = re.compile(rb"^\s*data\s*([;,])\s*entrada\s*\1\s*sa(?:i|\xc3\xad|\xc3\x8d)da\s*(?:\1\s*total\s*)?$",
+                           re.I)
+
+MINUTOS_DIA = 24 * 60
+
+
+def _primeira_linha(amostra: bytes) -> bytes:
+    return amostra.removeprefix(b"\xef\xbb\xbf").lstrip(b"\r\n").split(b"\n", 1)[0].rstrip(b"\r")
+
+
+def parece_csv(amostra: bytes) -> bool:
+    """O início do arquivo é o cabeçalho do CSV de pontos?"""
+    return _re_cabecalho.match(_primeira_linha(amostra)) is not None
+
+
+def extrair_horas_por_dia_csv(arquivo, modo: str | None = None, conteudo: bytes | None = None):
+    """
+    Lê a exportação em CSV da folha de ponto: uma linha por período,
+
+        Data;Entrada;Saída;Total
+        13/01/2025;08:02;12:14;04:12
+
+    e devolve o mesmo dicionário de `RegistroDia` do HTML. A coluna Total
+    (rótulo do período) é opcional; sem ela, o período conta da entrada à
+    saída (passando da meia-noite, se for o caso). `modo` só existe para
+    manter a assinatura dos extratores do HTML.
+    """
+    if conteudo is None:
+        with open(arquivo, "rb") as f:
+            conteudo = f.read()
+    texto = io.StringIO(conteudo.decode("utf-8-sig"))
+    delimitador = _re_cabecalho.match(_primeira_linha(conteudo)).group(1).decode()
+
+    dias = defaultdict(RegistroDia)
+    linhas = csv.reader(texto, delimiter=delimitador)
+    next(linhas, None)  # cabeçalho
+    for campos in linhas:
+        campos = [c.strip() for c in campos]
+        if len(campos) < 3 or not campos[0]:
+            continue
+        data, entrada, saida = campos[:3]
+        total = campos[3] if len(campos) > 3 else ""
+        if not regex_hora.match(total):
+            total = ""
+            if regex_hora.match(entrada) and regex_hora.match(saida):
+                total = minutos_para_hhmm((hhmm_para_minutos(saida) - hhmm_para_minutos(entrada)) % MINUTOS_DIA)
+        registrar_linha(dias, data, entrada, saida, total)
+    return dias
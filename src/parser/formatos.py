@@ -0,0 +1,62 @@
+from src.parser.csv_parser import extrair_horas_por_dia_csv, parece_csv
+from src.parser.html_parser import MODO_PADRAO, parece_wicket
+from src.parser.html_parser import extrair_horas_por_dia as extrair_horas_por_dia_wicket
+
+# Quanto do começo do arquivo o detector examina
+TAMANHO_AMOSTRA = 8 * 1024
+
+FORMATO_WICKET = "wicket"  # página HTML atual do portal
+FORMATO_CSV = "csv"        # exportação em CSV (Data;Entrada;Saída[;Total])
+
+
+class FormatoDesconhecido(ValueError):
+    """O começo do arquivo não corresponde a nenhum formato registrado."""
+
+
+# nome -> (detectar(amostra) -> bool, extrair(arquivo, modo, conteudo) -> dias),
+# consultados na ordem de registro
+_FORMATOS: dict[str, tuple] = {}
+
+
+def registrar_formato(nome: str, detectar, extrair):
+    """
+    Acrescenta um formato de exportação. `detectar` recebe só os primeiros
+    TAMANHO_AMOSTRA bytes do arquivo e deve ser barato; `extrair` tem a
+    assinatura de `extrair_horas_por_dia` e devolve o mesmo dicionário de
+    `RegistroDia`. Registrar de novo um nome substitui o anterior.
+    """
+    _FORMATOS[nome] = (detectar, extrair)
+
+
+def _amostra(arquivo, conteudo: bytes | None) -> bytes:
+    if conteudo is not None:
+        return conteudo[:TAMANHO_AMOSTRA]
+    with open(arquivo, "rb") as f:
+        return f.read(TAMANHO_AMOSTRA)
+
+
+def detectar_formato(arquivo, conteudo: bytes | None = None) -> str:
+    """Nome do formato do arquivo, olhando só o começo. Levanta FormatoDesconhecido."""
+    amostra = _amostra(arquivo, conteudo)
+    for nome, (detectar, _) in _FORMATOS.items():
+        if detectar(amostra):
+            return nome
+    raise FormatoDesconhecido(f"formato não reconhecido (esperado: {', '.join(_FORMATOS)})")
+
+
+def extrair_horas_por_dia(arquivo, modo: str = MODO_PADRAO, conteudo: bytes | None = None,
+                          formato: str | None = None):
+    """
+    Detecta o formato pelo começo do arquivo e chama o extrator registrado.
+    Um arquivo que não é de nenhum formato conhecido é recusado antes de
+    qualquer leitura completa ou parse. `modo` vale para o HTML (ver
+    `html_parser.extrair_horas_por_dia`); com `formato`, a detecção é pulada.
+    """
+    if formato is None:
+        formato = detectar_formato(arquivo, conteudo)
+    _, extrair = _FORMATOS[formato]
+    return extrair(arquivo, modo, conteudo)
+
+
+registrar_formato(FORMATO_WICKET, parece_wicket, extrair_horas_por_dia_wicket)
+registrar_formato(FORMATO_CSV, parece_csv, extrair_horas_por_dia_csv)
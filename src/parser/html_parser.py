@@ -1,64 +1,331 @@
-from bs4 import BeautifulSoup
-from datetime import datetime
 from collections import defaultdict
+from html import unescape
+from html.parser import HTMLParser
+import codecs
+import io
+import mmap
 import re
 
+from src.data.registro_dia import RegistroDia
+from src.parser.comum import regex_hora, registrar_linha
 
-def _somar_horas_str(h1: str, h2: str) -> str:
+# Modos de extração disponíveis em `extrair_horas_por_dia`
+MODO_STREAM = "stream"  # varredura por eventos de tag, sem montar a árvore
+MODO_DOM = "dom"        # árvore completa do BeautifulSoup (caminho antigo)
+MODO_REGEX = "regex"    # regex em bytes sobre o arquivo mapeado (opcional, cai no DOM se estranhar)
+MODOS = (MODO_STREAM, MODO_DOM, MODO_REGEX)
+MODO_PADRAO = MODO_STREAM
+
+# Versão do formato extraído; incrementar invalida o cache de parse em disco
+# 4: arquivo que nenhum formato reconhece é recusado (antes era lido como HTML do portal)
+VERSAO_PARSER = 4
+
+# Tamanho do bloco lido do disco a cada `feed` no modo stream
+TAMANHO_BLOCO = 64 * 1024
+
+# Marcas do portal (páginas Wicket) que aparecem já no começo do arquivo salvo
+_re_assinatura_wicket = re.compile(rb"xmlns:wicket=|wicket:interface|Wicket\.|wicketAjax")
+# Marcas da própria tabela de pontos, para páginas salvas sem os scripts do Wicket
+_re_marca_folha = re.compile(rb'Ponto fechado em|class\s*=\s*"(?:[^"]*\s)?(?:entrada|saida)(?:\s[^"]*)?"')
+_re_documento_html = re.compile(rb"<(?:!doctype\s+html|html)\b", re.I)
+
+# ---- Modo regex: padrões em bytes, compilados uma vez ----
+# class="... entrada|saida ..." de qualquer tag (conta e localiza a tabela de pontos)
+_re_classe_ponto = re.compile(rb'class\s*=\s*"(?:[^"]*\s)?(entrada|saida)(?:\s[^"]*)?"')
+_re_tr = re.compile(rb"<tr\b")
+# tag <input> inteira, aceitando ">" dentro de valores entre aspas
+_re_input = re.compile(rb"""<input\b(?:[^>"']|"[^"]*"|'[^']*')*>""")
+_re_atributo = re.compile(rb"""([^\s=/>]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""")
+_re_label = re.compile(rb"<label\b[^>]*>([^<]*)</label>")
+_re_label_abre = re.compile(rb"<label\b")
+_re_comentario = re.compile(rb"<!--.*?-->", re.S)
+_re_marcacao = re.compile(rb"<(?:tr|/tr|input|label)\b")
+
+
+class _LinhaPonto:
+    """Estado mínimo de uma <tr> aberta durante a varredura."""
+
+    __slots__ = ("ordem", "nivel_tabela", "tem_saida", "saida_title", "saida_val",
+                 "entrada_val", "label_txt")
+
+    def __init__(self, ordem: int, nivel_tabela: int):
+        self.ordem = ordem
+        self.nivel_tabela = nivel_tabela
+        self.tem_saida = False
+        self.saida_title = ""
+        self.saida_val = ""
+        self.entrada_val = None
+        self.label_txt = ""
+
+
+class _ExtratorPontos(HTMLParser):
     """
-    Soma duas horas no formato 'HH:MM' e devolve outra string 'HH:MM'.
-    Trata valores vazios ou inválidos como 00:00.
+    Extrator por eventos: acompanha só as <tr> abertas, o primeiro
+    input.entrada / input.saida de cada uma e o primeiro <label>HH:MM</label>.
+    Nenhuma árvore é montada; cada linha é aplicada ao fechar.
     """
-    def to_min(h: str) -> int:
-        if not h:
-            return 0
-        h = h.strip()
-        if not re.match(r"^\d{1,2}:\d{2}$", h):
-            return 0
-        try:
-            hh, mm = map(int, h.split(":"))
-            return hh * 60 + mm
-        except Exception:
-            return 0
 
-    total_min = to_min(h1) + to_min(h2)
-    hh = total_min // 60
-    mm = total_min % 60
-    return f"{hh:02d}:{mm:02d}"
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.dias = defaultdict(RegistroDia)
+        self._linhas: list[_LinhaPonto] = []     # <tr> abertas (externa -> interna)
+        self._pendentes: list[_LinhaPonto] = []  # fechadas, aguardando a <tr> externa
+        self._labels: list[list[str]] = []       # textos dos <label> abertos
+        self._nivel_tabela = 0
+        self._ordem = 0
+
+    # ---- eventos de tag ----
+    def handle_starttag(self, tag, attrs):
+        if tag == "tr":
+            self._ordem += 1
+            self._linhas.append(_LinhaPonto(self._ordem, self._nivel_tabela))
+            return
+
+        if tag == "table":
+            self._nivel_tabela += 1
+            return
+
+        if not self._linhas:
+            return
+
+        if tag == "label":
+            self._labels.append([])
+            return
+
+        if tag != "input":
+            return
+
+        classe = valor = title = None
+        for nome, v in attrs:
+            if nome == "class":
+                classe = v
+            elif nome == "value":
+                valor = v
+            elif nome == "title":
+                title = v
+        if not classe:
+            return
+
+        classes = classe.split()
+        eh_saida = "saida" in classes
+        eh_entrada = "entrada" in classes
+        if not (eh_saida or eh_entrada):
+            return
+
+        valor = (valor or "").strip()
+        for linha in self._linhas:
+            if eh_saida and not linha.tem_saida:
+                linha.tem_saida = True
+                linha.saida_title = title or ""
+                linha.saida_val = valor
+            if eh_entrada and linha.entrada_val is None:
+                linha.entrada_val = valor
+
+    def handle_endtag(self, tag):
+        if tag == "label":
+            if self._labels:
+                txt = "".join(self._labels.pop())
+                if regex_hora.match(txt):
+                    for linha in self._linhas:
+                        if not linha.label_txt:
+                            linha.label_txt = txt
+            return
+
+        if tag == "tr":
+            if self._linhas:
+                self._fechar_linha()
+            return
+
+        if tag == "table" and self._nivel_tabela:
+            # </table> fecha implicitamente as <tr> abertas dentro dela
+            while self._linhas and self._linhas[-1].nivel_tabela >= self._nivel_tabela:
+                self._fechar_linha()
+            self._nivel_tabela -= 1
+
+    def handle_data(self, data):
+        if self._labels:
+            txt = data.strip()
+            if txt:
+                for buf in self._labels:
+                    buf.append(txt)
+
+    # ---- controle das linhas ----
+    def _fechar_linha(self):
+        self._pendentes.append(self._linhas.pop())
+        if self._linhas:
+            return
+        # aplica na ordem de abertura, como o find_all("tr") do modo DOM
+        self._pendentes.sort(key=lambda l: l.ordem)
+        for linha in self._pendentes:
+            if linha.tem_saida:
+                registrar_linha(self.dias, linha.saida_title, linha.entrada_val,
+                                 linha.saida_val, linha.label_txt)
+        self._pendentes.clear()
+
+    def close(self):
+        super().close()
+        while self._linhas:
+            self._fechar_linha()
 
 
-def extrair_horas_por_dia(html_file):
+def _abrir(html_file, conteudo: bytes | None):
+    """Arquivo binário para leitura: o próprio HTML ou o conteúdo já lido em memória."""
+    return io.BytesIO(conteudo) if conteudo is not None else open(html_file, "rb")
+
+
+def _extrair_horas_por_dia_stream(html_file, conteudo: bytes | None = None):
+    extrator = _ExtratorPontos()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+
+    with _abrir(html_file, conteudo) as f:
+        while True:
+            bloco = f.read(TAMANHO_BLOCO)
+            if not bloco:
+                break
+            extrator.feed(decoder.decode(bloco))
+    extrator.feed(decoder.decode(b"", final=True))
+    extrator.close()
+
+    return extrator.dias
+
+
+class _ForaDoPadrao(Exception):
+    """O arquivo não tem a forma esperada pelo modo regex (usa-se o DOM)."""
+
+
+def _texto(valor: bytes) -> str:
+    txt = valor.decode("utf-8", errors="ignore")
+    return unescape(txt) if "&" in txt else txt
+
+
+_ATRIBUTOS_INPUT = (b"class", b"value", b"title")
+
+
+def _atributos_input(tag: bytes) -> dict[bytes, str]:
+    """class/value/title de uma tag <input> (os demais atributos são pulados sem decodificar)."""
+    attrs = {}
+    for m in _re_atributo.finditer(tag, 6):  # depois de "<input"
+        nome = m.group(1).lower()
+        if nome in _ATRIBUTOS_INPUT and nome not in attrs:
+            valor = m.group(2)
+            if valor is None:
+                valor = m.group(3) if m.group(3) is not None else m.group(4)
+            attrs[nome] = _texto(valor)
+    return attrs
+
+
+def _regiao_pontos(dados) -> tuple[bytes, int]:
     """
-    Lê o HTML da folha de ponto e devolve um dicionário:
+    (trecho da primeira à última <tr> com input de entrada/saída, total de
+    inputs de saída no arquivo). `dados` pode ser bytes ou um mmap.
+    """
+    inicio = fim = -1
+    saidas_arquivo = 0
+    for m in _re_classe_ponto.finditer(dados):
+        if inicio < 0:
+            inicio = m.start()
+        fim = m.end()
+        saidas_arquivo += m.group(1) == b"saida"
+    if inicio < 0:
+        return b"", 0
 
-        {
-          date(...): {
-              "entradas": [ "08:02", "13:15", ... ],
-              "saidas":   [ "12:14", "18:05", ... ],
-              "total_label": "HH:MM"   # SOMA de todos os labels TRABALHANDO do dia
-          },
-          ...
-        }
+    inicio = dados.rfind(b"<tr", 0, inicio)
+    fim = dados.find(b"</tr>", fim)
+    if inicio < 0 or fim < 0:
+        raise _ForaDoPadrao("tabela de pontos sem <tr> em volta")
+    # uma <tr> aberta antes da região conteria as linhas (aninhamento)
+    antes = dados[:inicio]
+    if len(_re_tr.findall(antes)) != antes.count(b"</tr>"):
+        raise _ForaDoPadrao("<tr> aberta antes da tabela de pontos")
+    return dados[inicio:fim + len(b"</tr>")], saidas_arquivo
 
-    A data é obtida do atributo title do input de SAÍDA:
-        title="Ponto fechado em 13/01/2025"
-    O total do dia é a SOMA de todos os <label>HH:MM</label> encontrados
-    nas linhas daquele dia.
+
+def _extrair_horas_por_dia_regex(html_file, conteudo: bytes | None = None):
     """
+    Mapeia o arquivo em memória (ou usa `conteudo`, se já lido) e tira as
+    linhas com regex em bytes, só na região da tabela de pontos. Levanta
+    `_ForaDoPadrao` quando as conferências falham: <tr> aninhadas ou
+    desbalanceadas, <script>/comentário com marcação na região, <label> com
+    tags dentro, input de saída fora das linhas lidas ou datas de mais de um mês.
+    """
+    if conteudo is not None:
+        regiao, saidas_arquivo = _regiao_pontos(conteudo)
+    else:
+        with open(html_file, "rb") as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # arquivo vazio não pode ser mapeado
+                raise _ForaDoPadrao("arquivo vazio")
+            with mm:
+                regiao, saidas_arquivo = _regiao_pontos(mm)
+
+    dias = defaultdict(RegistroDia)
+    if not regiao:
+        return dias
+
+    if b"<script" in regiao or b"<style" in regiao:
+        raise _ForaDoPadrao("script/estilo dentro da tabela de pontos")
+    for m in _re_comentario.finditer(regiao):
+        if _re_marcacao.search(m.group()):
+            raise _ForaDoPadrao("comentário com marcação dentro da tabela de pontos")
+
+    # a região começa num <tr> e termina num </tr>: cada pedaço entre </tr> é uma linha
+    pedacos = regiao.split(b"</tr>")
+    if pedacos.pop().strip():
+        raise _ForaDoPadrao("conteúdo após o último </tr>")
+
+    saidas_linhas = 0
+    for linha in pedacos:
+        if len(_re_tr.findall(linha)) != 1:
+            raise _ForaDoPadrao("<tr> aninhadas ou desbalanceadas")
+
+        saida = entrada = None
+        for tag in _re_input.finditer(linha):
+            tag = tag.group()
+            if b"class" not in tag:
+                continue
+            attrs = _atributos_input(tag)
+            classes = attrs.get(b"class", "").split()
+            if "saida" in classes:
+                saidas_linhas += 1
+                if saida is None:
+                    saida = attrs
+            if "entrada" in classes and entrada is None:
+                entrada = attrs
+        if saida is None:
+            continue
+
+        label_txt = ""
+        labels = _re_label.findall(linha)
+        if len(labels) != len(_re_label_abre.findall(linha)):
+            raise _ForaDoPadrao("<label> com marcação dentro")
+        for lb in labels:
+            txt = _texto(lb).strip()
+            if regex_hora.match(txt):
+                label_txt = txt
+                break
+
+        registrar_linha(dias, saida.get(b"title", ""),
+                         (entrada.get(b"value") or "").strip() if entrada is not None else None,
+                         (saida.get(b"value") or "").strip(), label_txt)
 
-    with open(html_file, "r", encoding="utf-8", errors="ignore") as f:
+    if saidas_linhas != saidas_arquivo:
+        raise _ForaDoPadrao(f"{saidas_arquivo} inputs de saída no arquivo, {saidas_linhas} nas linhas")
+    if len({(d.year, d.month) for d in dias}) > 1:
+        raise _ForaDoPadrao("datas de mais de um mês")
+
+    return dias
+
+
+def _extrair_horas_por_dia_dom(html_file, conteudo: bytes | None = None):
+    with io.TextIOWrapper(_abrir(html_file, conteudo), encoding="utf-8", errors="ignore") as f:
         html = f.read()
 
-    soup = BeautifulSoup(html, "html.parser")
+    from bs4 import BeautifulSoup  # só o caminho DOM precisa do bs4
 
-    dias = defaultdict(lambda: {
-        "entradas": [],
-        "saidas": [],
-        "total_label": "00:00",
-    })
+    soup = BeautifulSoup(html, "html.parser")
 
-    regex_data = re.compile(r"(\d{2}/\d{2}/\d{4})")
-    regex_hora = re.compile(r"^\d{1,2}:\d{2}$")
+    dias = defaultdict(RegistroDia)
 
     # Cada registro de ponto está em uma <tr>
     for tr in soup.find_all("tr"):
@@ -68,40 +335,74 @@ def extrair_horas_por_dia(html_file):
         if not saida_input:
             continue
 
-        title = saida_input.get("title") or ""
-        m = regex_data.search(title)
-        if not m:
-            continue
-
-        data_str = m.group(1)
-        try:
-            data_dia = datetime.strptime(data_str, "%d/%m/%Y").date()
-        except ValueError:
-            continue
-
-        registro_dia = dias[data_dia]
-
         # 2) ENTRADA / SAÍDA (para exibição detalhada)
         entrada_input = tr.find("input", class_="entrada")
         entrada_val = (entrada_input.get("value") or "").strip() if entrada_input else ""
         saida_val = (saida_input.get("value") or "").strip()
 
-        if entrada_val and regex_hora.match(entrada_val):
-            registro_dia["entradas"].append(entrada_val)
-
-        if saida_val and regex_hora.match(saida_val):
-            registro_dia["saidas"].append(saida_val)
-
         # 3) LABEL TRABALHANDO (Total do período) -> somar no total do dia
-        labels = tr.find_all("label")
-        for lb in labels:
+        # cada linha TR costuma ter só um label HH:MM relevante
+        label_txt = ""
+        for lb in tr.find_all("label"):
             txt = lb.get_text(strip=True)
             if regex_hora.match(txt):
-                # soma esse período ao total do dia
-                registro_dia["total_label"] = _somar_horas_str(
-                    registro_dia["total_label"], txt
-                )
-                # cada linha TR costuma ter só um label HH:MM relevante
+                label_txt = txt
                 break
 
+        registrar_linha(dias, saida_input.get("title") or "",
+                         entrada_val, saida_val, label_txt)
+
     return dias
+
+
+def parece_wicket(amostra: bytes) -> bool:
+    """
+    O início do arquivo é uma página HTML do portal (layout Wicket atual)?
+    Além das marcas do Wicket, vale a própria tabela de pontos (campos
+    class="entrada"/"saida" ou o título "Ponto fechado em"), que sobra
+    quando a página é salva sem os scripts.
+    """
+    if _re_documento_html.search(amostra) is None:
+        return False
+    return _re_assinatura_wicket.search(amostra) is not None or _re_marca_folha.search(amostra) is not None
+
+
+def extrair_horas_por_dia(html_file, modo: str = MODO_PADRAO, conteudo: bytes | None = None):
+    """
+    Lê o HTML da folha de ponto e devolve um dicionário de `RegistroDia`:
+
+        {
+          date(...): RegistroDia(
+              entradas=[482, 795, ...],  # minutos desde 00:00 ("08:02", "13:15", ...)
+              saidas=[734, 1085, ...],
+              total_min=int,             # SOMA de todos os labels TRABALHANDO do dia
+          ),
+          ...
+        }
+
+    A data é obtida do atributo title do input de SAÍDA:
+        title="Ponto fechado em 13/01/2025"
+    O total do dia é a SOMA de todos os <label>HH:MM</label> encontrados
+    nas linhas daquele dia.
+
+    `modo` escolhe o extrator:
+        - "stream": varre o arquivo em blocos por eventos de tag, guardando
+          apenas o estado das <tr> abertas (padrão);
+        - "dom": monta a árvore completa do BeautifulSoup (caminho antigo,
+          mantido como alternativa);
+        - "regex": mapeia o arquivo em memória e extrai as linhas com regex
+          em bytes (o mais rápido). Se as conferências de formato falharem,
+          o arquivo é lido pelo modo "dom".
+
+    Com `conteudo` (os bytes do arquivo, já lidos), o disco não é acessado.
+    """
+    if modo == MODO_STREAM:
+        return _extrair_horas_por_dia_stream(html_file, conteudo)
+    if modo == MODO_DOM:
+        return _extrair_horas_por_dia_dom(html_file, conteudo)
+    if modo == MODO_REGEX:
+        try:
+            return _extrair_horas_por_dia_regex(html_file, conteudo)
+        except _ForaDoPadrao:
+            return _extrair_horas_por_dia_dom(html_file, conteudo)
+    raise ValueError(f"Modo de extração desconhecido: {modo}")
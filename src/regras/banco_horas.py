@@ -0,0 +1,128 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+# Capacidade inicial dos arrays (dobra quando enche)
+CAPACIDADE_INICIAL = 512
+
+
+class BancoHoras:
+    """
+    Banco de horas acumulado: somas de prefixo do saldo diário (minutos)
+    sobre todos os dias processados, em ordem de data.
+
+    `acumulado[i]` é o saldo somado do primeiro dia até `datas[i]`
+    (inclusive), então o banco em qualquer data ou entre duas datas sai de
+    uma busca binária (O(log n)), sem somar os dias de novo. Um mês novo ou
+    reprocessado entra com `estender`, que só soma os dias daquele mês e
+    desloca os seguintes; os arrays crescem dobrando de tamanho, como uma
+    lista. `de_acumulado` remonta um banco já gravado sem refazer as somas.
+    """
+
+    def __init__(self):
+        self._datas = np.empty(CAPACIDADE_INICIAL, dtype="datetime64[D]")
+        self._acumulado = np.empty(CAPACIDADE_INICIAL, dtype=np.int64)
+        self._n = 0
+
+    @classmethod
+    def de_dias(cls, datas, saldos) -> "BancoHoras":
+        """Monta o banco a partir de dias em qualquer ordem (ex.: a tabela de `tabela_dias`)."""
+        datas = np.asarray(datas, dtype="datetime64[D]")
+        saldos = np.asarray(saldos, dtype=np.int64)
+        ordem = np.argsort(datas, kind="stable")
+        banco = cls()
+        banco.estender(datas[ordem], saldos[ordem])
+        return banco
+
+    @classmethod
+    def de_acumulado(cls, datas, acumulado) -> "BancoHoras":
+        """Remonta um banco gravado (`datas` e `acumulado` já em ordem), sem refazer as somas."""
+        datas = np.asarray(datas, dtype="datetime64[D]")
+        banco = cls()
+        if len(datas) > len(banco._datas):
+            banco._datas = np.empty(len(datas), dtype="datetime64[D]")
+            banco._acumulado = np.empty(len(datas), dtype=np.int64)
+        banco._datas[:len(datas)] = datas
+        banco._acumulado[:len(datas)] = np.asarray(acumulado, dtype=np.int64)
+        banco._n = len(datas)
+        return banco
+
+    @property
+    def datas(self) -> np.ndarray:
+        return self._datas[:self._n]
+
+    @property
+    def acumulado(self) -> np.ndarray:
+        return self._acumulado[:self._n]
+
+    def __len__(self) -> int:
+        return self._n
+
+    def estender(self, datas, saldos, inicio: date | None = None, fim: date | None = None):
+        """
+        Grava dias (em ordem de data) no banco, substituindo os guardados de
+        `inicio` a `fim` (por padrão, do primeiro ao último dia novo). Um mês
+        reprocessado (passe o primeiro e o último dia do mês) troca só a sua
+        fatia: o histórico anterior não é tocado e os dias posteriores são
+        apenas deslocados pela diferença entre o saldo novo e o antigo do
+        período, sem refazer as somas. Sem dias, o período é só removido.
+        """
+        datas = np.asarray(datas, dtype="datetime64[D]")
+        saldos = np.asarray(saldos, dtype=np.int64)
+        if len(datas) > 1 and (np.diff(datas).astype(np.int64) < 0).any():
+            raise ValueError("Os dias devem vir em ordem de data")
+        inicio = np.datetime64(inicio, "D") if inicio is not None else (datas[0] if len(datas) else None)
+        fim = np.datetime64(fim, "D") if fim is not None else (datas[-1] if len(datas) else None)
+        if inicio is None or fim is None:
+            return
+        if len(datas) and (datas[0] < inicio or datas[-1] > fim):
+            raise ValueError("Os dias devem estar entre o início e o fim do período")
+
+        ini = int(np.searchsorted(self.datas, inicio, side="left"))
+        apos = int(np.searchsorted(self.datas, fim, side="right"))
+        base = int(self._acumulado[ini - 1]) if ini else 0
+        antigo = int(self._acumulado[apos - 1]) - base if apos > ini else 0
+
+        n_cauda = self._n - apos
+        fim_novos = ini + len(datas)
+        total = fim_novos + n_cauda
+        if total > len(self._datas):
+            capacidade = max(total, 2 * len(self._datas))
+            self._datas = np.resize(self._datas, capacidade)
+            self._acumulado = np.resize(self._acumulado, capacidade)
+
+        if n_cauda and fim_novos != apos:
+            # dias posteriores ao período: só mudam de posição (cópia, pois as faixas podem se sobrepor)
+            self._datas[fim_novos:total] = self._datas[apos:self._n].copy()
+            self._acumulado[fim_novos:total] = self._acumulado[apos:self._n].copy()
+
+        self._datas[ini:fim_novos] = datas
+        np.cumsum(saldos, out=self._acumulado[ini:fim_novos])
+        self._acumulado[ini:fim_novos] += base
+        delta = int(saldos.sum()) - antigo
+        if n_cauda and delta:
+            self._acumulado[fim_novos:total] += delta
+        self._n = total
+
+    def saldos_em(self, datas) -> np.ndarray:
+        """Banco no fim de cada data (0 antes do primeiro dia), vetorizado."""
+        datas = np.asarray(datas, dtype="datetime64[D]")
+        if not self._n:
+            return np.zeros(len(datas), dtype=np.int64)
+        idx = np.searchsorted(self.datas, datas, side="right")
+        return np.where(idx > 0, self.acumulado[np.maximum(idx - 1, 0)], 0)
+
+    def saldo_em(self, dia: date) -> int:
+        """Banco de horas no fim de `dia` (dias sem registro mantêm o valor anterior)."""
+        idx = int(np.searchsorted(self.datas, np.datetime64(dia, "D"), side="right"))
+        return int(self._acumulado[idx - 1]) if idx else 0
+
+    def saldo_entre(self, inicio: date, fim: date) -> int:
+        """Saldo acumulado de `inicio` a `fim`, inclusive."""
+        if fim < inicio:
+            return 0
+        return self.saldo_em(fim) - self.saldo_em(inicio - timedelta(days=1))
+
+    @property
+    def saldo_final(self) -> int:
+        return int(self._acumulado[self._n - 1]) if self._n else 0
@@ -1,4 +1,8 @@
+import calendar
 from datetime import date, timedelta
+from functools import lru_cache
+
+import numpy as np
 
 
 def pascoa(ano: int) -> date:
@@ -72,3 +76,98 @@ def feriados_ano(ano: int) -> set[date]:
     feriados |= feriados_moveis(ano)
 
     return feriados
+
+
+# ---- Índice de calendário pré-calculado ----
+# Cada data recebe um código de bits, para que fim de semana, feriado e
+# Cinzas sejam consultados em O(1) e fatiados por mês como máscaras.
+DIA_UTIL = 0
+DIA_FDS = 1
+DIA_FERIADO = 2
+DIA_CINZAS = 4
+
+ANO_INICIO_PADRAO = 2000
+ANO_FIM_PADRAO = 2050
+
+
+class IndiceCalendario:
+    """
+    Calendário de `ano_inicio` a `ano_fim` (inclusive) com, para cada data:
+        - `codigos[i]`: combinação de DIA_FDS / DIA_FERIADO / DIA_CINZAS;
+        - `dias_semana[i]`: 0 = segunda ... 6 = domingo.
+    Os arrays são imutáveis depois de montados e podem ser compartilhados
+    entre todos os meses e funcionários de uma execução.
+    """
+
+    def __init__(self, ano_inicio: int, ano_fim: int):
+        self.ano_inicio = ano_inicio
+        self.ano_fim = ano_fim
+        self.inicio = date(ano_inicio, 1, 1)
+        total = (date(ano_fim + 1, 1, 1) - self.inicio).days
+
+        offsets = np.arange(total)
+        dias_semana = ((self.inicio.weekday() + offsets) % 7).astype(np.uint8)
+        codigos = np.where(dias_semana >= 5, DIA_FDS, DIA_UTIL).astype(np.uint8)
+
+        self._feriados_mes: dict[tuple[int, int], frozenset[date]] = {}
+        self._cinzas: dict[int, date] = {}
+        for ano in range(ano_inicio, ano_fim + 1):
+            for d in feriados_ano(ano):
+                codigos[(d - self.inicio).days] |= DIA_FERIADO
+                self._feriados_mes.setdefault((ano, d.month), set()).add(d)
+            cinzas = pascoa(ano) - timedelta(days=46)
+            codigos[(cinzas - self.inicio).days] |= DIA_CINZAS
+            self._cinzas[ano] = cinzas
+        self._feriados_mes = {k: frozenset(v) for k, v in self._feriados_mes.items()}
+
+        codigos.flags.writeable = False
+        dias_semana.flags.writeable = False
+        self.codigos = codigos
+        self.dias_semana = dias_semana
+
+    def contem(self, ano: int) -> bool:
+        return self.ano_inicio <= ano <= self.ano_fim
+
+    def _pos(self, d: date) -> int:
+        if not self.contem(d.year):
+            raise KeyError(f"{d} fora do índice de calendário ({self.ano_inicio}-{self.ano_fim})")
+        return (d - self.inicio).days
+
+    def fatia_mes(self, ano: int, mes: int) -> slice:
+        """Posições do mês nos arrays do índice."""
+        ini = self._pos(date(ano, mes, 1))
+        return slice(ini, ini + calendar.monthrange(ano, mes)[1])
+
+    def codigo(self, d: date) -> int:
+        return int(self.codigos[self._pos(d)])
+
+    def eh_feriado(self, d: date) -> bool:
+        return bool(self.codigos[self._pos(d)] & DIA_FERIADO)
+
+    def feriados_mes(self, ano: int, mes: int) -> frozenset[date]:
+        return self._feriados_mes.get((ano, mes), frozenset())
+
+    def quarta_cinzas(self, ano: int, mes: int | None = None) -> date | None:
+        """Quarta-feira de Cinzas do ano (ou None se não cair em `mes`)."""
+        d = self._cinzas.get(ano)
+        if d is None or (mes is not None and d.month != mes):
+            return None
+        return d
+
+    def mascara_mes(self, ano: int, mes: int, codigo: int):
+        """Array booleano (um item por dia do mês) das datas com o bit `codigo`."""
+        return (self.codigos[self.fatia_mes(ano, mes)] & codigo) != 0
+
+
+@lru_cache(maxsize=None)
+def indice_calendario(ano_inicio: int = ANO_INICIO_PADRAO,
+                      ano_fim: int = ANO_FIM_PADRAO) -> IndiceCalendario:
+    """Índice memoizado: montado uma vez por processo para cada faixa de anos."""
+    return IndiceCalendario(ano_inicio, ano_fim)
+
+
+def indice_para_ano(ano: int) -> IndiceCalendario:
+    """Índice padrão, ou um índice ampliado se `ano` estiver fora da faixa padrão."""
+    if ANO_INICIO_PADRAO <= ano <= ANO_FIM_PADRAO:
+        return indice_calendario()
+    return indice_calendario(min(ano, ANO_INICIO_PADRAO), max(ano, ANO_FIM_PADRAO))
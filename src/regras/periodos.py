@@ -0,0 +1,51 @@
+import numpy as np
+
+from src.regras.regras_negocio import gerar_nome_aba
+
+GRANULARIDADE_SEMANA = "semana"
+GRANULARIDADE_MES = "mes"
+GRANULARIDADE_TRIMESTRE = "trimestre"
+GRANULARIDADE_ANO = "ano"
+GRANULARIDADES = (GRANULARIDADE_SEMANA, GRANULARIDADE_MES, GRANULARIDADE_TRIMESTRE, GRANULARIDADE_ANO)
+
+ROTULOS_GRANULARIDADE = {
+    GRANULARIDADE_SEMANA: "Semana",
+    GRANULARIDADE_MES: "Mês",
+    GRANULARIDADE_TRIMESTRE: "Trimestre",
+    GRANULARIDADE_ANO: "Ano",
+}
+
+
+def chaves_periodo(datas: np.ndarray, granularidade: str) -> np.ndarray:
+    """
+    Chave inteira e ordenável do período de cada data (datetime64[D]):
+    semana ISO 202503, mês 202503, trimestre 20251, ano 2025.
+    """
+    datas = np.asarray(datas, dtype="datetime64[D]")
+    if granularidade == GRANULARIDADE_SEMANA:
+        # semana ISO: a quinta-feira da semana define o ano e a posição
+        dia_semana = (datas.astype(np.int64) + 3) % 7  # segunda = 0 (1970-01-01 foi quinta)
+        quinta = datas + (3 - dia_semana)
+        ano_iso = quinta.astype("datetime64[Y]")
+        semana = (quinta - ano_iso.astype("datetime64[D]")).astype(np.int64) // 7 + 1
+        return (ano_iso.astype(np.int64) + 1970) * 100 + semana
+
+    ano = datas.astype("datetime64[Y]").astype(np.int64) + 1970
+    mes = datas.astype("datetime64[M]").astype(np.int64) % 12 + 1
+    if granularidade == GRANULARIDADE_MES:
+        return ano * 100 + mes
+    if granularidade == GRANULARIDADE_TRIMESTRE:
+        return ano * 10 + (mes - 1) // 3 + 1
+    if granularidade == GRANULARIDADE_ANO:
+        return ano
+    raise ValueError(f"Granularidade desconhecida: {granularidade}")
+
+
+def rotulo_periodo(granularidade: str, chave: int) -> str:
+    if granularidade == GRANULARIDADE_SEMANA:
+        return f"{chave // 100}-S{chave % 100:02d}"
+    if granularidade == GRANULARIDADE_MES:
+        return gerar_nome_aba(chave % 100, chave // 100)
+    if granularidade == GRANULARIDADE_TRIMESTRE:
+        return f"{chave % 10}º tri {chave // 10}"
+    return str(chave)
@@ -1,17 +1,19 @@
 import calendar
-from datetime import date, timedelta, datetime
+from datetime import date, datetime
 from pathlib import Path
 import re
 
-import pandas as pd
+import numpy as np
 
-from src.parser.html_parser import extrair_horas_por_dia
-from src.regras.calendario import feriados_ano, feriados_moveis
-from src.utils.time_utils import parse_time, format_timedelta
-
-# Carga padrão
-CARGA_DIARIA_PADRAO = timedelta(hours=8)
-CARGA_MEIO_EXPEDIENTE = timedelta(hours=4)  # usada em aniversário e cinzas
+from src.data.intervalos import ListaIntervalos
+from src.data.pontos_manuais import PontosManuais
+from src.data.registro_dia import RegistroDia
+from src.parser.formatos import extrair_horas_por_dia
+from src.parser.html_parser import MODO_PADRAO
+from src.regras.calendario import indice_para_ano, DIA_FDS, DIA_FERIADO, DIA_CINZAS
+from src.regras.tipos_dia import REGRAS_COMPILADAS
+from src.utils.time_utils import minutos_para_hhmm
+from src.utils.metricas import Metricas, medir
 
 dias_semana = {
     0: "Segunda",
@@ -50,341 +52,199 @@ def obter_mes_ano(html_file: Path, horas_por_dia: dict) -> tuple[int, int]:
     raise ValueError(f"Não foi possível determinar mês/ano a partir de {nome}")
 
 
-def _entradas_saidas(info):
-    if info is None:
-        return [], []
-    return info.get("entradas", []) or [], info.get("saidas", []) or []
-
-
-def processar_mes(html_file: Path,
-                  ferias: set[date],
-                  atestados: set[date],
-                  aniversarios: set[date],
-                  abonos: set[date],
-                  pontos_manuais: dict[date, dict] | None = None):
-
-    horas_por_dia = extrair_horas_por_dia(html_file)
+def _pontos_manuais_do_mes(pontos_manuais, ano: int, mes: int) -> dict:
+    if not pontos_manuais:
+        return {}
+    if isinstance(pontos_manuais, PontosManuais):
+        return pontos_manuais.do_mes(ano, mes)
+    return {d: info for d, info in pontos_manuais.items() if d.month == mes and d.year == ano}
+
+
+def classificar_mes(html_file: Path,
+                    ferias: ListaIntervalos | set[date],
+                    atestados: ListaIntervalos | set[date],
+                    aniversarios: ListaIntervalos | set[date],
+                    abonos: ListaIntervalos | set[date],
+                    pontos_manuais: PontosManuais | dict[date, RegistroDia] | None = None,
+                    modo_parser: str = MODO_PADRAO,
+                    cache=None,
+                    metricas: Metricas | None = None,
+                    conteudo: bytes | None = None,
+                    hash_html: str | None = None) -> dict:
+    """
+    Parte numérica de `processar_mes`: lê o HTML, aplica as regras e devolve
+    os arrays por dia processado (só numpy, sem pandas). Serve sozinha para
+    consultas rápidas de totais, sem montar DataFrames.
+    Com `conteudo`, o HTML já lido em memória é usado no lugar do arquivo.
+    `hash_html` (hash do arquivo já calculado) é repassado ao cache de parse.
+    """
+    # Com cache de parse, um HTML já visto (mesmo conteúdo) não é relido
+    with medir(metricas, "parse_html", Path(html_file).name):
+        if cache is not None:
+            horas_por_dia = cache.extrair(html_file, modo=modo_parser, conteudo=conteudo, hash_html=hash_html)
+        else:
+            horas_por_dia = extrair_horas_por_dia(html_file, modo=modo_parser, conteudo=conteudo)
     mes, ano = obter_mes_ano(html_file, horas_por_dia)
 
     # Se existirem pontos manuais para datas deste mês, sobrescreve o ponto extraído do HTML
-    if pontos_manuais:
-        for d, info in pontos_manuais.items():
-            # só sobrescreve se for do mesmo mês/ano que estamos processando (ou se a data estiver presente)
-            if d.month == mes and d.year == ano:
-                horas_por_dia[d] = info
-    # conjunto de datas que foram ajustadas manualmente (para priorizar e pintar)
-    manual_dates = set()
-    if pontos_manuais:
-        for d in pontos_manuais.keys():
-            if d.month == mes and d.year == ano:
-                manual_dates.add(d)
-
-    feriados_do_ano = feriados_ano(ano)
-    feriados_mes = {d for d in feriados_do_ano if d.month == mes}
-
-    # pega semana de cinzas automaticamente
-    mov = feriados_moveis(ano)
-    quarta_cinzas = None
-    for d in mov:
-        if d.month == mes and d.weekday() == 2:  # quarta-feira
-            quarta_cinzas = d
-            break
+    manuais_mes = _pontos_manuais_do_mes(pontos_manuais, ano, mes)
+    batidas_html = dict(horas_por_dia)  # batidas brutas do HTML, antes dos ajustes manuais
+    horas_por_dia.update(manuais_mes)
+    # datas que foram ajustadas manualmente (para priorizar e pintar)
+    manual_dates = manuais_mes.keys()
+
+    # feriados, fins de semana e Cinzas vêm do índice de calendário (montado uma vez por processo)
+    cal = indice_para_ano(ano)
+    fatia = cal.fatia_mes(ano, mes)
 
     hoje = datetime.today().date()
 
     _, ultimo_dia = calendar.monthrange(ano, mes)
 
-    dias_processar = []
-
-    for dia in range(1, ultimo_dia + 1):
-        d = date(ano, mes, dia)
-
-        # MÊS ATUAL → só até hoje
-        if mes == hoje.month and ano == hoje.year:
-            if d > hoje:
-                continue
-
-        # MÊS FUTURO → só dias que têm ponto no HTML
-        elif ano > hoje.year or (ano == hoje.year and mes > hoje.month):
-            if d not in horas_por_dia:
-                continue
-
-        # adiciona se for relevante
-        if (
-            d in horas_por_dia
-            or d in ferias
-            or d in atestados
-            or d in abonos
-            or d in aniversarios
-            or d in feriados_mes
-            or d == quarta_cinzas
-            or d.weekday() >= 5
-        ):
-            dias_processar.append(d)
-
-    dias_processar.sort()
-
-    linhas = []
-
-    total_trab = timedelta()
-    total_prev = timedelta()
-    total_saldo = timedelta()
-
-    for d in dias_processar:
-
-        info = horas_por_dia.get(d)
-
-        if info is None:
-            entradas = []
-            saidas = []
-            total_label = "00:00"
-        else:
-            entradas, saidas = _entradas_saidas(info)
-            total_label = info.get("total_label", "00:00")
-
-        try:
-            total_horas = parse_time(total_label)
-        except:
-            total_horas = timedelta()
-
-        # flags
-        eh_ferias = d in ferias
-        eh_fds = d.weekday() >= 5
-        eh_feriado = d in feriados_mes
-        eh_atestado = d in atestados
-        eh_abono = d in abonos
-        eh_aniversario = d in aniversarios
-        eh_cinzas = (quarta_cinzas == d)
-        eh_ajuste = d in manual_dates
-
-        # 0) Ajuste manual — sobrescreve tipo do dia e cor
-        if eh_ajuste:
-            carga = CARGA_DIARIA_PADRAO
-            saldo = total_horas - carga
-
-            total_trab += total_horas
-            total_prev += carga
-            total_saldo += saldo
-
-            linha = {
-                "Data": d.strftime("%d/%m/%Y"),
-                "Dia da Semana": dias_semana[d.weekday()],
-                "Tipo do Dia": "Ajuste manual",
-                "Total Trabalhado": format_timedelta(total_horas),
-                "Carga Prevista": format_timedelta(carga),
-                "Saldo do dia": format_timedelta(saldo),
-            }
-
-            entradas, saidas = _entradas_saidas(horas_por_dia.get(d))
-            for i in range(max(len(entradas), len(saidas))):
-                linha[f"Entrada {i+1}"] = entradas[i] if i < len(entradas) else ""
-                linha[f"Saída {i+1}"] = saidas[i] if i < len(saidas) else ""
-
-            linhas.append(linha)
-            continue
-
-        # 1) Férias
-        if eh_ferias:
-            linhas.append({
-                "Data": d.strftime("%d/%m/%Y"),
-                "Dia da Semana": dias_semana[d.weekday()],
-                "Tipo do Dia": "Férias",
-                "Total Trabalhado": "00:00",
-                "Carga Prevista": "00:00",
-                "Saldo do dia": "00:00",
-            })
-            continue
+    # ---- Máscaras por dia do mês (posição 0 = dia 1) ----
+    dia_idx = np.arange(ultimo_dia)
+    dia_semana = cal.dias_semana[fatia]
+    codigos = cal.codigos[fatia]
+
+    def mascara(datas) -> np.ndarray:
+        if isinstance(datas, ListaIntervalos):
+            return datas.mascara_mes(ano, mes)
+        m = np.zeros(ultimo_dia, dtype=bool)
+        m[[d.day - 1 for d in datas if d.month == mes and d.year == ano]] = True
+        return m
+
+    tem_ponto = mascara(horas_por_dia)
+    mascaras = {
+        "ajuste": mascara(manual_dates),
+        "ferias": mascara(ferias),
+        "fds": (codigos & DIA_FDS) != 0,
+        "cinzas": (codigos & DIA_CINZAS) != 0,
+        "feriado": (codigos & DIA_FERIADO) != 0,
+        "atestado": mascara(atestados),
+        "abono": mascara(abonos),
+        "aniversario": mascara(aniversarios),
+    }
 
-        # 2) Final de Semana
-        if eh_fds:
-            carga = timedelta(0)
-            saldo = total_horas
-
-            total_trab += total_horas
-            total_prev += carga
-            total_saldo += saldo
-
-            linha = {
-                "Data": d.strftime("%d/%m/%Y"),
-                "Dia da Semana": dias_semana[d.weekday()],
-                "Tipo do Dia": "Final de Semana",
-                "Total Trabalhado": format_timedelta(total_horas),
-                "Carga Prevista": "00:00",
-                "Saldo do dia": format_timedelta(saldo),
-            }
-
-            for i in range(max(len(entradas), len(saidas))):
-                linha[f"Entrada {i+1}"] = entradas[i] if i < len(entradas) else ""
-                linha[f"Saída {i+1}"] = saidas[i] if i < len(saidas) else ""
-
-            linhas.append(linha)
-            continue
+    # MÊS ATUAL → só até hoje; MÊS FUTURO → só dias que têm ponto no HTML
+    if (ano, mes) == (hoje.year, hoje.month):
+        visivel = dia_idx < hoje.day
+    elif (ano, mes) > (hoje.year, hoje.month):
+        visivel = tem_ponto
+    else:
+        visivel = np.ones(ultimo_dia, dtype=bool)
+
+    # dia entra na planilha se tem ponto ou qualquer flag de tipo
+    # (ajuste manual implica ponto, então não muda o resultado)
+    relevante = tem_ponto.copy()
+    for m in mascaras.values():
+        relevante |= m
+    sel = np.flatnonzero(visivel & relevante)  # dias processados, já em ordem
+
+    # Total trabalhado (minutos) de cada dia do mês
+    total_mes = np.zeros(ultimo_dia, dtype=np.int64)
+    for d, info in horas_por_dia.items():
+        if d.month == mes and d.year == ano:
+            total_mes[d.day - 1] = info.total_min
+
+    # ---- Tipo do dia, carga e saldo: uma consulta na tabela de regras ----
+    regras = REGRAS_COMPILADAS
+    regra = regras.classificar(mascaras)[sel]
+    tipo = regras.tipo[regra]
+    carga = regras.carga[regra]
+    trabalhado = np.where(regras.conta_horas[regra], total_mes[sel], 0)
+    saldo = np.where(regras.zera_saldo[regra], 0, trabalhado - carga)
+
+    return {
+        "ano": ano,
+        "mes": mes,
+        "horas_por_dia": horas_por_dia,
+        "batidas_html": batidas_html,
+        "sel": sel,
+        "dia_semana": dia_semana[sel],
+        "tipo": tipo,
+        "carga": carga,
+        "trabalhado": trabalhado,
+        "saldo": saldo,
+        "mostra_batidas": regras.mostra_batidas[regra],
+        "ajuste_manual": mascaras["ajuste"][sel],
+        "total_trabalhado": int(trabalhado.sum()),
+        "total_previsto": int(carga.sum()),
+        "saldo_dia": int(saldo.sum()),
+    }
 
-        # 3) Quarta-feira de Cinzas (4h)
-        if eh_cinzas:
-            carga = CARGA_MEIO_EXPEDIENTE
-            saldo = total_horas - carga
-
-            total_trab += total_horas
-            total_prev += carga
-            total_saldo += saldo
-
-            linha = {
-                "Data": d.strftime("%d/%m/%Y"),
-                "Dia da Semana": dias_semana[d.weekday()],
-                "Tipo do Dia": "Quarta-feira de Cinzas",
-                "Total Trabalhado": format_timedelta(total_horas),
-                "Carga Prevista": format_timedelta(carga),
-                "Saldo do dia": format_timedelta(saldo),
-            }
-
-            for i in range(max(len(entradas), len(saidas))):
-                linha[f"Entrada {i+1}"] = entradas[i] if i < len(entradas) else ""
-                linha[f"Saída {i+1}"] = saidas[i] if i < len(saidas) else ""
-
-            linhas.append(linha)
-            continue
 
-        # 4) Feriado
-        if eh_feriado:
-            carga = timedelta(0)
-            saldo = total_horas
-
-            total_trab += total_horas
-            total_prev += carga
-            total_saldo += saldo
-
-            linha = {
-                "Data": d.strftime("%d/%m/%Y"),
-                "Dia da Semana": dias_semana[d.weekday()],
-                "Tipo do Dia": "Feriado",
-                "Total Trabalhado": format_timedelta(total_horas),
-                "Carga Prevista": "00:00",
-                "Saldo do dia": format_timedelta(saldo),
-            }
-
-            for i in range(max(len(entradas), len(saidas))):
-                linha[f"Entrada {i+1}"] = entradas[i] if i < len(entradas) else ""
-                linha[f"Saída {i+1}"] = saidas[i] if i < len(saidas) else ""
-
-            linhas.append(linha)
-            continue
-
-        # 5) Atestado — saldo = 0
-        if eh_atestado:
-            carga = CARGA_DIARIA_PADRAO
-            saldo = timedelta(0)
-
-            total_trab += total_horas
-            total_prev += carga
-            total_saldo += saldo
-
-            linha = {
-                "Data": d.strftime("%d/%m/%Y"),
-                "Dia da Semana": dias_semana[d.weekday()],
-                "Tipo do Dia": "Atestado",
-                "Total Trabalhado": format_timedelta(total_horas),
-                "Carga Prevista": format_timedelta(carga),
-                "Saldo do dia": "00:00",
-            }
-
-            for i in range(max(len(entradas), len(saidas))):
-                linha[f"Entrada {i+1}"] = entradas[i] if i < len(entradas) else ""
-                linha[f"Saída {i+1}"] = saidas[i] if i < len(saidas) else ""
-
-            linhas.append(linha)
-            continue
+def processar_mes(html_file: Path,
+                  ferias: ListaIntervalos | set[date],
+                  atestados: ListaIntervalos | set[date],
+                  aniversarios: ListaIntervalos | set[date],
+                  abonos: ListaIntervalos | set[date],
+                  pontos_manuais: PontosManuais | dict[date, RegistroDia] | None = None,
+                  modo_parser: str = MODO_PADRAO,
+                  cache=None,
+                  metricas: Metricas | None = None,
+                  conteudo: bytes | None = None,
+                  hash_html: str | None = None):
+    import pandas as pd
+
+    c = classificar_mes(html_file, ferias, atestados, aniversarios, abonos, pontos_manuais,
+                        modo_parser, cache, metricas, conteudo, hash_html)
+    ano, mes, sel = c["ano"], c["mes"], c["sel"]
+    horas_por_dia = c["horas_por_dia"]
+    dia_semana, tipo, carga = c["dia_semana"], c["tipo"], c["carga"]
+    trabalhado, saldo, mostra_batidas = c["trabalhado"], c["saldo"], c["mostra_batidas"]
+    total_trab, total_prev, total_saldo = c["total_trabalhado"], c["total_previsto"], c["saldo_dia"]
+
+    # ---- Colunas de saída (strings só aqui, na fronteira da planilha) ----
+    nomes_semana = np.array([dias_semana[i] for i in range(7)], dtype=object)
+    colunas = {
+        "Data": [f"{i + 1:02d}/{mes:02d}/{ano}" for i in sel] + ["TOTAL MÊS"],
+        "Dia da Semana": nomes_semana[dia_semana].tolist() + [""],
+        "Tipo do Dia": tipo.tolist() + [""],
+        "Total Trabalhado": [minutos_para_hhmm(int(m)) for m in trabalhado] + [minutos_para_hhmm(total_trab)],
+        "Carga Prevista": [minutos_para_hhmm(int(m)) for m in carga] + [minutos_para_hhmm(total_prev)],
+        "Saldo do dia": [minutos_para_hhmm(int(m)) for m in saldo] + [minutos_para_hhmm(total_saldo)],
+    }
 
-        # 6) Abono — saldo = 0
-        if eh_abono:
-            carga = CARGA_DIARIA_PADRAO
-            saldo = timedelta(0)
-
-            total_trab += total_horas
-            total_prev += carga
-            total_saldo += saldo
-
-            linha = {
-                "Data": d.strftime("%d/%m/%Y"),
-                "Dia da Semana": dias_semana[d.weekday()],
-                "Tipo do Dia": "Abono",
-                "Total Trabalhado": format_timedelta(total_horas),
-                "Carga Prevista": format_timedelta(carga),
-                "Saldo do dia": "00:00",
-            }
-
-            for i in range(max(len(entradas), len(saidas))):
-                linha[f"Entrada {i+1}"] = entradas[i] if i < len(entradas) else ""
-                linha[f"Saída {i+1}"] = saidas[i] if i < len(saidas) else ""
-
-            linhas.append(linha)
+    # Entrada i / Saída i: tipos sem batidas (Férias) ficam de fora; células além das
+    # batidas de cada dia ficam vazias (NaN), como na montagem por dicionário
+    n_linhas = len(sel) + 1
+    for pos, i in enumerate(sel):
+        if not mostra_batidas[pos]:
             continue
-
-        # 7) Aniversário (4h)
-        if eh_aniversario:
-            carga = CARGA_MEIO_EXPEDIENTE
-            saldo = total_horas - carga
-
-            total_trab += total_horas
-            total_prev += carga
-            total_saldo += saldo
-
-            linha = {
-                "Data": d.strftime("%d/%m/%Y"),
-                "Dia da Semana": dias_semana[d.weekday()],
-                "Tipo do Dia": "Aniversário",
-                "Total Trabalhado": format_timedelta(total_horas),
-                "Carga Prevista": format_timedelta(carga),
-                "Saldo do dia": format_timedelta(saldo),
-            }
-
-            for i in range(max(len(entradas), len(saidas))):
-                linha[f"Entrada {i+1}"] = entradas[i] if i < len(entradas) else ""
-                linha[f"Saída {i+1}"] = saidas[i] if i < len(saidas) else ""
-
-            linhas.append(linha)
+        info = horas_por_dia.get(date(ano, mes, i + 1))
+        if info is None:
             continue
-
-        # 8) Normal (8h)
-        carga = CARGA_DIARIA_PADRAO
-        saldo = total_horas - carga
-
-        total_trab += total_horas
-        total_prev += carga
-        total_saldo += saldo
-
-        linha = {
-            "Data": d.strftime("%d/%m/%Y"),
-            "Dia da Semana": dias_semana[d.weekday()],
-            "Tipo do Dia": "Normal",
-            "Total Trabalhado": format_timedelta(total_horas),
-            "Carga Prevista": format_timedelta(carga),
-            "Saldo do dia": format_timedelta(saldo),
-        }
-
-        for i in range(max(len(entradas), len(saidas))):
-            linha[f"Entrada {i+1}"] = entradas[i] if i < len(entradas) else ""
-            linha[f"Saída {i+1}"] = saidas[i] if i < len(saidas) else ""
-
-        linhas.append(linha)
-
-    # FINAL — Linha TOTAL DO MÊS
-    linhas.append({
-        "Data": "TOTAL MÊS",
-        "Dia da Semana": "",
-        "Tipo do Dia": "",
-        "Total Trabalhado": format_timedelta(total_trab),
-        "Carga Prevista": format_timedelta(total_prev),
-        "Saldo do dia": format_timedelta(total_saldo),
+        entradas, saidas = info.entradas_hhmm(), info.saidas_hhmm()
+        for k in range(max(len(entradas), len(saidas))):
+            col_e, col_s = f"Entrada {k+1}", f"Saída {k+1}"
+            if col_e not in colunas:
+                colunas[col_e] = [np.nan] * n_linhas
+                colunas[col_s] = [np.nan] * n_linhas
+            colunas[col_e][pos] = entradas[k] if k < len(entradas) else ""
+            colunas[col_s][pos] = saidas[k] if k < len(saidas) else ""
+
+    df_mes = pd.DataFrame(colunas)
+
+    # Mesmos dias em formato tipado (datas reais e minutos inteiros), para exportação
+    df_dias = pd.DataFrame({
+        "data": np.datetime64(date(ano, mes, 1), "D") + sel,
+        "dia_semana": dia_semana.astype(np.int8),
+        "tipo_dia": tipo.astype(str),
+        "trabalhado_min": trabalhado.astype(np.int64),
+        "carga_min": carga.astype(np.int64),
+        "saldo_min": saldo.astype(np.int64),
+        "ajuste_manual": c["ajuste_manual"],
     })
 
-    df_mes = pd.DataFrame(linhas)
-
     resumo = {
         "nome_aba": gerar_nome_aba(mes, ano),
+        "ano": ano,
+        "mes": mes,
         "total_trabalhado": total_trab,
         "total_previsto": total_prev,
         "saldo_dia": total_saldo,
+        "dias": df_dias,
+        "batidas": c["batidas_html"],
     }
 
     return df_mes, resumo
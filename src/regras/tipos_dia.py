@@ -0,0 +1,88 @@
+import numpy as np
+
+# Carga padrão (minutos)
+CARGA_DIARIA_PADRAO = 8 * 60
+CARGA_MEIO_EXPEDIENTE = 4 * 60  # usada em aniversário e cinzas
+
+# Tabela de tipos de dia, em ordem de PRIORIDADE (o primeiro que casar vence).
+#   flag          -> nome da máscara de dias calculada em `processar_mes`
+#   carga         -> carga prevista do dia (minutos)
+#   conta_horas   -> se as horas trabalhadas entram no total do dia
+#   zera_saldo    -> saldo do dia fixo em 0 (senão: trabalhado - carga)
+#   mostra_batidas-> se as colunas Entrada i / Saída i são preenchidas
+#   estilo        -> chave em `criar_estilos` (None = linha sem cor)
+# A última regra (flag None) é o dia Normal, usado quando nenhuma flag casa.
+REGRAS_DIA = [
+    {"tipo": "Ajuste manual", "flag": "ajuste", "carga": CARGA_DIARIA_PADRAO,
+     "conta_horas": True, "zera_saldo": False, "mostra_batidas": True, "estilo": "ajuste_manual"},
+    {"tipo": "Férias", "flag": "ferias", "carga": 0,
+     "conta_horas": False, "zera_saldo": True, "mostra_batidas": False, "estilo": "ferias"},
+    {"tipo": "Final de Semana", "flag": "fds", "carga": 0,
+     "conta_horas": True, "zera_saldo": False, "mostra_batidas": True, "estilo": "fds"},
+    {"tipo": "Quarta-feira de Cinzas", "flag": "cinzas", "carga": CARGA_MEIO_EXPEDIENTE,
+     "conta_horas": True, "zera_saldo": False, "mostra_batidas": True, "estilo": "quartacinza"},
+    {"tipo": "Feriado", "flag": "feriado", "carga": 0,
+     "conta_horas": True, "zera_saldo": False, "mostra_batidas": True, "estilo": "feriado"},
+    {"tipo": "Atestado", "flag": "atestado", "carga": CARGA_DIARIA_PADRAO,
+     "conta_horas": True, "zera_saldo": True, "mostra_batidas": True, "estilo": "atestado"},
+    {"tipo": "Abono", "flag": "abono", "carga": CARGA_DIARIA_PADRAO,
+     "conta_horas": True, "zera_saldo": True, "mostra_batidas": True, "estilo": "abono"},
+    {"tipo": "Aniversário", "flag": "aniversario", "carga": CARGA_MEIO_EXPEDIENTE,
+     "conta_horas": True, "zera_saldo": False, "mostra_batidas": True, "estilo": "aniversario"},
+    {"tipo": "Normal", "flag": None, "carga": CARGA_DIARIA_PADRAO,
+     "conta_horas": True, "zera_saldo": False, "mostra_batidas": True, "estilo": None},
+]
+
+
+class RegrasCompiladas:
+    """
+    Forma compilada de uma tabela de regras.
+
+    Cada regra com flag vira um bit (prioridade 0 = bit 0). `por_codigo`
+    leva qualquer combinação de bits direto ao índice da regra vencedora
+    (o bit menos significativo ligado), então classificar um dia é só
+    montar o código e indexar arrays — sem cascata de ifs.
+    """
+
+    def __init__(self, regras: list[dict]):
+        com_flag = [r for r in regras if r["flag"] is not None]
+        padrao = [r for r in regras if r["flag"] is None]
+        if len(padrao) != 1:
+            raise ValueError("A tabela de regras precisa de exatamente uma regra padrão (flag None)")
+
+        self.regras = com_flag + padrao
+        self.flags = [r["flag"] for r in com_flag]
+        idx_padrao = len(com_flag)
+
+        por_codigo = np.full(1 << len(com_flag), idx_padrao, dtype=np.int64)
+        for codigo in range(1, len(por_codigo)):
+            por_codigo[codigo] = (codigo & -codigo).bit_length() - 1
+        self.por_codigo = por_codigo
+
+        self.tipo = np.array([r["tipo"] for r in self.regras], dtype=object)
+        self.carga = np.array([r["carga"] for r in self.regras], dtype=np.int64)
+        self.conta_horas = np.array([r["conta_horas"] for r in self.regras], dtype=bool)
+        self.zera_saldo = np.array([r["zera_saldo"] for r in self.regras], dtype=bool)
+        self.mostra_batidas = np.array([r["mostra_batidas"] for r in self.regras], dtype=bool)
+        self.estilo = {r["tipo"]: r["estilo"] for r in self.regras}
+
+    def classificar(self, mascaras: dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Recebe uma máscara booleana por flag (todas do mesmo tamanho) e
+        devolve, para cada dia, o índice da regra aplicada.
+        Flags ausentes em `mascaras` são tratadas como sempre falsas.
+        """
+        codigo = None
+        for bit, flag in enumerate(self.flags):
+            m = mascaras.get(flag)
+            if m is None:
+                continue
+            parcela = m.astype(np.int64) << bit
+            codigo = parcela if codigo is None else codigo | parcela
+        if codigo is None:
+            tamanho = len(next(iter(mascaras.values()))) if mascaras else 0
+            codigo = np.zeros(tamanho, dtype=np.int64)
+        return self.por_codigo[codigo]
+
+
+REGRAS_COMPILADAS = RegrasCompiladas(REGRAS_DIA)
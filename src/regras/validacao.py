@@ -0,0 +1,162 @@
+import csv
+import os
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+from src.data.intervalos import ListaIntervalos
+from src.data.registro_dia import RegistroDia
+from src.utils.time_utils import minutos_para_hhmm
+
+PROBLEMA_IMPAR = "batidas_impares"
+PROBLEMA_NEGATIVO = "periodo_negativo"
+PROBLEMA_SOBREPOSTO = "periodos_sobrepostos"
+PROBLEMA_TOTAL = "total_divergente"
+PROBLEMA_FERIAS = "batida_em_ferias"
+PROBLEMAS = (PROBLEMA_IMPAR, PROBLEMA_NEGATIVO, PROBLEMA_SOBREPOSTO, PROBLEMA_TOTAL, PROBLEMA_FERIAS)
+
+DESCRICOES_PROBLEMA = {
+    PROBLEMA_IMPAR: "Entradas e saídas em número diferente",
+    PROBLEMA_NEGATIVO: "Saída antes da entrada que não pode ser virada de meia-noite",
+    PROBLEMA_SOBREPOSTO: "Período começa antes de outro do mesmo dia terminar",
+    PROBLEMA_TOTAL: "Total do dia diferente da soma dos períodos",
+    PROBLEMA_FERIAS: "Batidas em dia de férias",
+}
+
+MINUTOS_DIA = 24 * 60
+_ORDINAL_EPOCA = date(1970, 1, 1).toordinal()
+
+# Colunas do relatório (CSV e aba ANOMALIAS)
+COLUNAS_RELATORIO = ("funcionario", "data", "origem", "problema", "detalhe")
+
+
+def _matriz(arrays: list, qtd: np.ndarray, largura: int) -> np.ndarray:
+    """Batidas de todos os dias numa matriz dias x largura (-1 onde não há batida)."""
+    matriz = np.full((len(arrays), largura), -1, dtype=np.int64)
+    # os array('h') são colados como bytes e lidos de uma vez
+    valores = np.frombuffer(b"".join(arrays), dtype=np.int16)
+    if len(valores):
+        linhas = np.repeat(np.arange(len(arrays)), qtd)
+        colunas = np.arange(len(valores)) - np.repeat(np.cumsum(qtd) - qtd, qtd)
+        matriz[linhas, colunas] = valores
+    return matriz
+
+
+def verificar_batidas(datas: list[date], origens: list[str], registros: list[RegistroDia],
+                      ferias: ListaIntervalos | None = None) -> list[dict]:
+    """
+    Varre todos os dias de uma vez (arrays dias x batidas) e devolve uma
+    linha por problema encontrado: {data, origem, problema, detalhe}.
+
+    Regras, na ordem de PROBLEMAS:
+    - número de entradas diferente do de saídas;
+    - período com saída antes da entrada que não pode ser uma virada de
+      meia-noite: como no parser, um período assim conta até a saída do dia
+      seguinte, mas um dia só tem uma virada, e ela precisa bater com o
+      total do dia;
+    - períodos sobrepostos: com os pares em ordem de entrada (o portal
+      não garante essa ordem) e a saída de uma virada contada no dia
+      seguinte (+24h), a entrada de um período antes da saída do anterior
+      (não se aplica a dias com período invertido, em que a leitura de
+      virada não vale);
+    - total do dia (rótulo do portal ou soma dos pontos manuais) diferente
+      da soma dos pares, só para dias com pares completos e sem período
+      invertido já apontado na regra anterior;
+    - qualquer batida num dia de `ferias`.
+    """
+    n = len(registros)
+    if n == 0:
+        return []
+
+    arrays_ent = [r.entradas for r in registros]
+    arrays_sai = [r.saidas for r in registros]
+    n_ent = np.fromiter(map(len, arrays_ent), dtype=np.int64, count=n)
+    n_sai = np.fromiter(map(len, arrays_sai), dtype=np.int64, count=n)
+    largura = max(int(n_ent.max()), int(n_sai.max()), 1)
+    entradas = _matriz(arrays_ent, n_ent, largura)
+    saidas = _matriz(arrays_sai, n_sai, largura)
+    total = np.fromiter((r.total_min for r in registros), dtype=np.int64, count=n)
+
+    pares = np.minimum(n_ent, n_sai)
+    par_valido = np.arange(largura) < pares[:, None]
+    duracao = saidas - entradas
+
+    impar = n_ent != n_sai
+    viradas = (par_valido & (duracao < 0)).sum(axis=1)
+    soma_pares = np.where(par_valido, duracao % MINUTOS_DIA, 0).sum(axis=1)
+    total_difere = ~impar & (soma_pares != total)
+    negativo = (viradas > 1) | ((viradas == 1) & total_difere)
+    divergente = total_difere & ~negativo
+    # pares ordenados pela entrada (os incompletos vão para o fim) e virada terminando após 24:00
+    ordem = np.argsort(np.where(par_valido, entradas, np.iinfo(np.int64).max), axis=1, kind="stable")
+    ent_ord = np.take_along_axis(entradas, ordem, axis=1)
+    fim_ord = np.take_along_axis(np.where(duracao < 0, saidas + MINUTOS_DIA, saidas), ordem, axis=1)
+    valido_ord = np.take_along_axis(par_valido, ordem, axis=1)
+    sobreposto = (valido_ord[:, 1:] & (ent_ord[:, 1:] < fim_ord[:, :-1])).any(axis=1) & ~negativo
+    if ferias:
+        dias = np.fromiter((d.toordinal() for d in datas), dtype=np.int64, count=n) - _ORDINAL_EPOCA
+        em_ferias = ferias.mascara_datas(dias.astype("datetime64[D]")) & ((n_ent + n_sai) > 0)
+    else:
+        em_ferias = np.zeros(n, dtype=bool)
+
+    mascaras = {
+        PROBLEMA_IMPAR: impar,
+        PROBLEMA_NEGATIVO: negativo,
+        PROBLEMA_SOBREPOSTO: sobreposto,
+        PROBLEMA_TOTAL: divergente,
+        PROBLEMA_FERIAS: em_ferias,
+    }
+
+    # só os dias marcados (poucos) voltam para Python, para montar o detalhe
+    anomalias = []
+    for problema in PROBLEMAS:
+        for i in np.flatnonzero(mascaras[problema]):
+            r = registros[i]
+            if problema == PROBLEMA_TOTAL:
+                detalhe = f"total {minutos_para_hhmm(int(total[i]))}, pares {minutos_para_hhmm(int(soma_pares[i]))}"
+            else:
+                detalhe = (f"entradas {' '.join(r.entradas_hhmm()) or '-'}; "
+                           f"saídas {' '.join(r.saidas_hhmm()) or '-'}")
+            anomalias.append({"data": datas[i], "origem": origens[i], "problema": problema, "detalhe": detalhe})
+    anomalias.sort(key=lambda a: (a["data"], a["origem"]))
+    return anomalias
+
+
+def verificar_resultados(resultados: list[dict], listas: tuple) -> list[dict]:
+    """
+    Valida as batidas brutas de uma execução: as do HTML de cada mês
+    processado e os pontos manuais, todas numa única varredura.
+    """
+    ferias, *_, pontos_manuais = listas
+    datas, origens, registros = [], [], []
+    for r in resultados:
+        for d, info in r["batidas"].items():
+            datas.append(d)
+            origens.append("html")
+            registros.append(info)
+    for d, info in (pontos_manuais.items() if pontos_manuais else ()):
+        datas.append(d)
+        origens.append("manual")
+        registros.append(info)
+    return verificar_batidas(datas, origens, registros, ferias)
+
+
+def contar_problemas(anomalias: list[dict]) -> dict[str, int]:
+    contagem = dict.fromkeys(PROBLEMAS, 0)
+    for a in anomalias:
+        contagem[a["problema"]] += 1
+    return {p: n for p, n in contagem.items() if n}
+
+
+def salvar_relatorio(caminho: Path, anomalias: list[dict]):
+    """Grava o relatório em CSV (uma linha por anomalia, colunas COLUNAS_RELATORIO)."""
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    tmp = caminho.with_name(f".{caminho.name}.tmp")
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(COLUNAS_RELATORIO)
+        for a in anomalias:
+            w.writerow([a.get("funcionario", ""), a["data"].isoformat(), a["origem"], a["problema"], a["detalhe"]])
+    os.replace(tmp, caminho)
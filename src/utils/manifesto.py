@@ -0,0 +1,356 @@
+import calendar
+import hashlib
+import json
+import os
+from datetime import date, datetime
+from pathlib import Path
+
+import numpy as np
+
+from src.data.registro_dia import RegistroDia
+from src.parser.cache_parse import hash_arquivo
+from src.parser.html_parser import VERSAO_PARSER
+from src.regras.banco_horas import BancoHoras
+from src.regras.regras_negocio import obter_mes_ano
+from src.regras.tipos_dia import REGRAS_DIA
+
+# Versão do resultado de `processar_mes`; incrementar invalida os meses guardados
+VERSAO_RESULTADOS = 2
+
+# Versão do layout da planilha (abas, colunas, formatação); incrementar a cada
+# mudança do writer para que planilhas já geradas sejam regravadas
+# 2: coluna "Banco de Horas" nas abas mensais e no CONSOLIDADO
+VERSAO_PLANILHA = 2
+
+ARQ_MANIFESTO = "manifesto.json"
+PASTA_RESULTADOS = "resultados"
+
+
+def _hash(*partes) -> str:
+    h = hashlib.sha256()
+    for p in partes:
+        h.update(repr(p).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _datas_no_mes(lista, ano: int, mes: int):
+    """Recorte de uma lista de dias especiais no mês (intervalos ou datas)."""
+    if hasattr(lista, "no_periodo"):
+        ultimo_dia = calendar.monthrange(ano, mes)[1]
+        return lista.no_periodo(date(ano, mes, 1), date(ano, mes, ultimo_dia))
+    return sorted(d for d in lista if d.year == ano and d.month == mes)
+
+
+def _datas_todas(lista):
+    if hasattr(lista, "intervalos"):
+        return lista.intervalos()
+    return sorted(lista)
+
+
+def _limites_mes(chave: str) -> tuple[date, date]:
+    ano, mes = map(int, chave.split("-"))
+    return date(ano, mes, 1), date(ano, mes, calendar.monthrange(ano, mes)[1])
+
+
+def _pontos_manuais(registros) -> list:
+    return [(d, info.entradas.tolist(), info.saidas.tolist(), info.total_min)
+            for d, info in sorted(registros.items())]
+
+
+# ---- resultado de um mês em JSON (só dados, nada executável) ----
+# Cada DataFrame vira uma lista de colunas [nome, tipo, valores]: datas em
+# dias desde 1970-01-01, números e booleanos pelo dtype numpy e o resto
+# (textos) como está, com NaN gravado como null.
+
+def _tabela_para_json(df) -> list:
+    colunas = []
+    for nome, serie in df.items():
+        valores = serie.to_numpy()
+        if valores.dtype.kind == "M":
+            colunas.append([nome, "datetime64[D]", valores.astype("datetime64[D]").astype(np.int64).tolist()])
+        elif valores.dtype.kind in "biuf":
+            colunas.append([nome, valores.dtype.str, valores.tolist()])
+        else:
+            colunas.append([nome, None, [None if v is None or v != v else v for v in valores.tolist()]])
+    return colunas
+
+
+def _tabela_de_json(colunas):
+    import pandas as pd
+
+    dados = {}
+    for nome, tipo, valores in colunas:
+        if tipo == "datetime64[D]":
+            dados[nome] = np.array(valores, dtype=np.int64).astype(tipo)
+        elif tipo is not None:
+            dados[nome] = np.array(valores, dtype=tipo)
+        elif any(v is None for v in valores):
+            dados[nome] = [np.nan if v is None else v for v in valores]
+        else:
+            dados[nome] = np.array(valores, dtype=str)
+    return pd.DataFrame(dados)
+
+
+def _resultado_para_json(df_mes, resumo) -> dict:
+    return {
+        "df_mes": _tabela_para_json(df_mes),
+        "resumo": {
+            **{k: v for k, v in resumo.items() if k not in ("dias", "batidas")},
+            "dias": _tabela_para_json(resumo["dias"]),
+            "batidas": {d.isoformat(): info.como_lista() for d, info in resumo["batidas"].items()},
+        },
+    }
+
+
+def _resultado_de_json(conteudo: dict) -> tuple:
+    resumo = dict(conteudo["resumo"])
+    resumo["dias"] = _tabela_de_json(resumo["dias"])
+    resumo["batidas"] = {date.fromisoformat(iso): RegistroDia.de_lista(registro)
+                         for iso, registro in resumo["batidas"].items()}
+    return _tabela_de_json(conteudo["df_mes"]), resumo
+
+
+class Manifesto:
+    """
+    Manifesto de execução de uma planilha de saída.
+
+    Para cada HTML guarda uma impressão digital das entradas do mês (hash do
+    arquivo + recortes de férias/atestados/aniversário/abonos/pontos manuais
+    daquele mês + versões do parser e das regras) e o resultado de
+    `processar_mes` correspondente. Na execução seguinte, só os meses cuja
+    impressão mudou voltam a ser processados; se nenhuma mudou, a planilha
+    nem é regravada.
+
+    Guarda também o banco de horas da planilha (somas de prefixo, ver
+    `BancoHoras`) com a impressão de cada mês que entrou nele: a cada
+    execução só os meses alterados têm a sua fatia trocada.
+    """
+
+    def __init__(self, pasta: Path):
+        self.pasta = Path(pasta)
+        self._caminho = self.pasta / ARQ_MANIFESTO
+        self._meses: dict[str, str] = {}
+        # impressão da planilha gravada + tamanho e mtime do arquivo escrito
+        self._saida: dict | None = None
+        self._usados: dict[str, str] = {}
+        # banco de horas: impressão de cada mês ("AAAA-MM") e o banco em si (montado na primeira consulta)
+        self._banco_meses: dict[str, str | None] = {}
+        self._banco_json: dict | None = None
+        self._banco: BancoHoras | None = None
+        # resultados já carregados/gerados nesta execução do processo (modo --watch)
+        self._memoria: dict[str, tuple] = {}
+        self.reaproveitados = 0
+
+        try:
+            conteudo = json.loads(self._caminho.read_text(encoding="utf-8"))
+            if conteudo.get("versao") == VERSAO_RESULTADOS:
+                self._meses = dict(conteudo.get("meses", {}))
+                saida = conteudo.get("saida")
+                self._saida = saida if isinstance(saida, dict) else None
+                banco = conteudo.get("banco_horas")
+                if isinstance(banco, dict):
+                    self._banco_meses = dict(banco.get("meses", {}))
+                    self._banco_json = banco
+        except (OSError, ValueError):
+            pass
+
+    # ---- impressões digitais ----
+    @staticmethod
+    def impressao_mes(html_file: Path, listas: tuple, hoje: date | None = None,
+                      hash_html: str | None = None) -> str:
+        """Impressão das entradas de um mês; `hash_html` evita reler o arquivo se já foi calculado."""
+        ferias, atestados, aniversario, abonos, pontos_manuais = listas
+        hoje = hoje or datetime.today().date()
+
+        try:
+            mes, ano = obter_mes_ano(html_file, {})
+        except ValueError:
+            mes = ano = None
+
+        if mes is None:
+            # sem mês/ano no nome do arquivo: depende das listas inteiras
+            recortes = [_datas_todas(x) for x in (ferias, atestados, aniversario, abonos)]
+            manuais = _pontos_manuais(dict(pontos_manuais.items()) if pontos_manuais else {})
+            dia_ref = hoje
+        else:
+            recortes = [_datas_no_mes(x, ano, mes) for x in (ferias, atestados, aniversario, abonos)]
+            if pontos_manuais and hasattr(pontos_manuais, "do_mes"):
+                manuais = _pontos_manuais(pontos_manuais.do_mes(ano, mes))
+            else:
+                manuais = _pontos_manuais({d: i for d, i in (pontos_manuais or {}).items()
+                                           if d.year == ano and d.month == mes})
+            # mês atual/futuro muda de conteúdo conforme os dias passam
+            dia_ref = hoje if (ano, mes) >= (hoje.year, hoje.month) else None
+
+        return _hash(VERSAO_RESULTADOS, VERSAO_PARSER, REGRAS_DIA, hash_html or hash_arquivo(html_file),
+                     recortes, manuais, dia_ref)
+
+    @staticmethod
+    def impressao_listas(listas: tuple) -> str:
+        """Impressão das listas completas (bloco de resumo TXT da aba CONSOLIDADO)."""
+        ferias, atestados, aniversario, abonos, pontos_manuais = listas
+        manuais = _pontos_manuais(dict(pontos_manuais.items()) if pontos_manuais else {})
+        return _hash([_datas_todas(x) for x in (ferias, atestados, aniversario, abonos)], manuais)
+
+    def impressao_saida(self, listas: tuple, html_files: list[Path], *extras) -> str:
+        """Impressão da planilha: layout + listas completas + impressão de cada mês usado, em ordem."""
+        return _hash(VERSAO_PLANILHA, self.impressao_listas(listas),
+                     [self._usados.get(Path(f).name) for f in html_files], extras)
+
+    # ---- resultados por mês ----
+    def _arquivo_resultado(self, impressao: str) -> Path:
+        return self.pasta / PASTA_RESULTADOS / f"{impressao}.json"
+
+    def resultado(self, nome_arquivo: str, impressao: str):
+        """(df_mes, resumo) guardado para este HTML, se a impressão não mudou."""
+        if self._meses.get(nome_arquivo) != impressao:
+            return None
+        if impressao in self._memoria:
+            df_mes, resumo = self._memoria[impressao]
+        else:
+            try:
+                conteudo = json.loads(self._arquivo_resultado(impressao).read_text(encoding="utf-8"))
+                df_mes, resumo = _resultado_de_json(conteudo)
+            except (OSError, ValueError, TypeError, KeyError):
+                return None
+            self._memoria[impressao] = (df_mes, resumo)
+        self._usados[nome_arquivo] = impressao
+        self.reaproveitados += 1
+        return df_mes, resumo
+
+    def guardar(self, nome_arquivo: str, impressao: str, df_mes, resumo):
+        self._memoria[impressao] = (df_mes, resumo)
+        caminho = self._arquivo_resultado(impressao)
+        try:
+            caminho.parent.mkdir(parents=True, exist_ok=True)
+            tmp = caminho.with_suffix(".tmp")
+            tmp.write_text(json.dumps(_resultado_para_json(df_mes, resumo), separators=(",", ":")),
+                           encoding="utf-8")
+            os.replace(tmp, caminho)
+        except OSError as e:
+            print(f"Não foi possível gravar o resultado do mês em cache: {e}")
+            return
+        self._usados[nome_arquivo] = impressao
+
+    # ---- banco de horas ----
+    def _carregar_banco(self) -> BancoHoras:
+        if self._banco is None:
+            try:
+                datas = np.array(self._banco_json["datas"], dtype=np.int64).astype("datetime64[D]")
+                self._banco = BancoHoras.de_acumulado(datas, self._banco_json["acumulado"])
+            except (TypeError, KeyError, ValueError):
+                self._banco = BancoHoras()
+                self._banco_meses = {}
+            self._banco_json = None
+        return self._banco
+
+    def banco_horas(self, resultados: list[dict]) -> BancoHoras:
+        """
+        Banco de horas dos `resultados` (saída de `processar_meses`): o
+        guardado, com a fatia de cada mês novo ou alterado trocada por
+        `BancoHoras.estender` e a dos meses que saíram removida.
+        """
+        banco = self._carregar_banco()
+        por_mes: dict[str, list[dict]] = {}
+        for r in resultados:
+            por_mes.setdefault(f"{r['ano']:04d}-{r['mes']:02d}", []).append(r)
+        atuais = {}
+        for chave, rs in por_mes.items():
+            impressoes = [r.get("impressao") for r in rs]
+            # sem impressão (resultado fora do manifesto), o mês é sempre refeito
+            atuais[chave] = _hash(impressoes) if None not in impressoes else None
+
+        for chave in sorted(self._banco_meses.keys() - atuais.keys()):
+            banco.estender([], [], *_limites_mes(chave))
+        for chave, impressao in sorted(atuais.items()):
+            if impressao is not None and self._banco_meses.get(chave) == impressao:
+                continue
+            dias = [r["dias"] for r in por_mes[chave]]
+            datas = np.concatenate([d["data"].to_numpy("datetime64[D]") for d in dias])
+            saldos = np.concatenate([d["saldo_min"].to_numpy(np.int64) for d in dias])
+            ordem = np.argsort(datas, kind="stable")
+            banco.estender(datas[ordem], saldos[ordem], *_limites_mes(chave))
+        self._banco_meses = atuais
+        return banco
+
+    def _banco_para_json(self) -> dict | None:
+        if self._banco is None:
+            return self._banco_json
+        return {
+            "meses": self._banco_meses,
+            "datas": self._banco.datas.astype(np.int64).tolist(),
+            "acumulado": self._banco.acumulado.tolist(),
+        }
+
+    # ---- planilha de saída ----
+    @staticmethod
+    def _estado_arquivo(caminho: Path) -> dict | None:
+        try:
+            st = Path(caminho).stat()
+        except OSError:
+            return None
+        return {"tamanho": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+    def saida_inalterada(self, impressao: str, caminho_saida: Path) -> bool:
+        """
+        A planilha no disco é a que este manifesto gravou com as mesmas
+        entradas? Um arquivo regravado ou editado por fora (outra execução
+        sem manifesto, o próprio usuário) muda de tamanho ou de mtime.
+        """
+        if self._saida is None or self._saida.get("impressao") != impressao:
+            return False
+        estado = self._estado_arquivo(caminho_saida)
+        return estado is not None and all(self._saida.get(k) == v for k, v in estado.items())
+
+    def registrar_saida(self, impressao: str, caminho_saida: Path):
+        """Chamar logo depois de gravar a planilha, para guardar o estado do arquivo escrito."""
+        estado = self._estado_arquivo(caminho_saida)
+        self._saida = {"impressao": impressao, **estado} if estado is not None else None
+
+    def descartar_saida(self):
+        """
+        Esquece a planilha registrada (os meses guardados continuam valendo).
+        Usado quando a planilha é gravada sem passar pelo manifesto.
+        """
+        if self._saida is None:
+            return
+        self._saida = None
+        self._gravar()
+
+    def salvar(self):
+        """
+        Grava o manifesto com os meses usados nesta execução e apaga os
+        resultados guardados que deixaram de ser referenciados. O mesmo
+        objeto pode ser reutilizado na execução seguinte.
+        """
+        self._meses = dict(self._usados)
+        self._usados = {}
+        self.reaproveitados = 0
+        if not self._gravar():
+            return
+
+        referenciados = set(self._meses.values())
+        self._memoria = {k: v for k, v in self._memoria.items() if k in referenciados}
+        for p in (self.pasta / PASTA_RESULTADOS).glob("*.json"):
+            if p.stem not in referenciados:
+                try:
+                    p.unlink()
+                except OSError:
+                    pass
+
+    def _gravar(self) -> bool:
+        try:
+            self.pasta.mkdir(parents=True, exist_ok=True)
+            tmp = self._caminho.with_suffix(".tmp")
+            tmp.write_text(json.dumps({
+                "versao": VERSAO_RESULTADOS,
+                "meses": self._meses,
+                "saida": self._saida,
+                "banco_horas": self._banco_para_json(),
+            }, indent=2), encoding="utf-8")
+            os.replace(tmp, self._caminho)
+        except OSError as e:
+            print(f"Não foi possível gravar o manifesto: {e}")
+            return False
+        return True
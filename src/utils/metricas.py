@@ -0,0 +1,138 @@
+import contextlib
+import json
+import os
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+# Versão do formato do JSON de métricas (para quem consome o arquivo)
+VERSAO_METRICAS = 1
+
+# Quantos pontos de alocação entram no relatório do tracemalloc
+TOP_ALOCACOES = 10
+
+
+class Metricas:
+    """
+    Tempos por etapa e contadores de uma execução.
+
+    `etapas` acumula, por nome, quantas vezes a etapa rodou, o tempo total
+    e o maior tempo isolado; `itens` guarda o tempo de cada item (ex.: cada
+    HTML) quando a etapa é medida com um nome de item.
+    Como o cache de parse, uma instância enviada a um processo do pool volta
+    como cópia: quem processa em paralelo devolve as métricas do filho e o
+    processo principal soma com `mesclar`. Por isso, com vários workers, o
+    tempo de uma etapa é a soma entre processos e pode passar do tempo total.
+    """
+
+    def __init__(self):
+        self.etapas: dict[str, dict] = {}
+        self.itens: dict[str, dict[str, float]] = {}
+        self.contadores: dict[str, int] = {}
+        self.memoria: dict | None = None
+
+    def registrar(self, nome: str, segundos: float, item: str | None = None):
+        e = self.etapas.setdefault(nome, {"chamadas": 0, "segundos": 0.0, "maximo": 0.0})
+        e["chamadas"] += 1
+        e["segundos"] += segundos
+        e["maximo"] = max(e["maximo"], segundos)
+        if item is not None:
+            itens = self.itens.setdefault(nome, {})
+            itens[item] = itens.get(item, 0.0) + segundos
+
+    @contextlib.contextmanager
+    def etapa(self, nome: str, item: str | None = None):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(nome, time.perf_counter() - inicio, item)
+
+    def contar(self, nome: str, n: int = 1):
+        self.contadores[nome] = self.contadores.get(nome, 0) + n
+
+    def mesclar(self, outra: "Metricas", prefixo: str | None = None):
+        """Soma as métricas de `outra` (ex.: vindas de um processo filho)."""
+        for nome, e in outra.etapas.items():
+            atual = self.etapas.setdefault(nome, {"chamadas": 0, "segundos": 0.0, "maximo": 0.0})
+            atual["chamadas"] += e["chamadas"]
+            atual["segundos"] += e["segundos"]
+            atual["maximo"] = max(atual["maximo"], e["maximo"])
+        for nome, itens in outra.itens.items():
+            destino = self.itens.setdefault(nome, {})
+            for item, segundos in itens.items():
+                chave = f"{prefixo}/{item}" if prefixo else item
+                destino[chave] = destino.get(chave, 0.0) + segundos
+        for nome, n in outra.contadores.items():
+            self.contar(nome, n)
+
+    def como_dict(self, **extras) -> dict:
+        dados = {
+            "versao": VERSAO_METRICAS,
+            **extras,
+            "etapas": {nome: {"chamadas": e["chamadas"],
+                              "segundos": round(e["segundos"], 6),
+                              "maximo": round(e["maximo"], 6)}
+                       for nome, e in self.etapas.items()},
+            "itens": {nome: {item: round(s, 6) for item, s in itens.items()}
+                      for nome, itens in self.itens.items()},
+            "contadores": dict(self.contadores),
+        }
+        if self.memoria is not None:
+            dados["memoria"] = self.memoria
+        return dados
+
+    def salvar(self, caminho: Path, **extras):
+        """Grava o JSON (num temporário, trocado no fim para nunca ficar pela metade)."""
+        caminho = Path(caminho)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        tmp = caminho.with_name(f".{caminho.name}.tmp")
+        tmp.write_text(json.dumps(self.como_dict(**extras), indent=2, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, caminho)
+
+    def resumo(self) -> str:
+        """Uma linha por etapa, para o console."""
+        return "\n".join(f"• {nome}: {e['segundos']:.3f}s ({e['chamadas']}x)"
+                         for nome, e in self.etapas.items())
+
+
+def medir(metricas: Metricas | None, nome: str, item: str | None = None):
+    """`metricas.etapa(...)`, ou um contexto vazio quando não há métricas."""
+    if metricas is None:
+        return contextlib.nullcontext()
+    return metricas.etapa(nome, item)
+
+
+@contextlib.contextmanager
+def rastrear_memoria(metricas: Metricas, raiz: Path | None = None):
+    """
+    Liga o tracemalloc durante o bloco e guarda em `metricas.memoria` o pico
+    e as linhas com mais memória ainda alocada no fim. Só enxerga o processo
+    atual (não os workers).
+    """
+    tracemalloc.start()
+    try:
+        yield
+    finally:
+        atual, pico = tracemalloc.get_traced_memory()
+        estatisticas = tracemalloc.take_snapshot().statistics("lineno")[:TOP_ALOCACOES]
+        tracemalloc.stop()
+
+        def local(stat):
+            quadro = stat.traceback[0]
+            nome = quadro.filename
+            if raiz is not None:
+                with contextlib.suppress(ValueError):
+                    nome = str(Path(nome).relative_to(raiz))
+            return f"{nome}:{quadro.lineno}"
+
+        metricas.memoria = {
+            "pico_bytes": pico,
+            "final_bytes": atual,
+            "top": [{"local": local(s), "bytes": s.size, "blocos": s.count} for s in estatisticas],
+        }
+
+
+def agora_iso() -> str:
+    return datetime.now().isoformat(timespec="seconds")
@@ -0,0 +1,54 @@
+import time
+from pathlib import Path
+
+# Intervalo entre varreduras e tempo de silêncio antes de disparar (segundos)
+INTERVALO_PADRAO = 0.2
+ESPERA_PADRAO = 0.3
+
+
+def estado_arquivos(alvos: list[tuple[Path, tuple[str, ...]]]) -> dict[Path, tuple[int, int]]:
+    """(mtime_ns, tamanho) de cada arquivo que casa com os padrões de cada pasta."""
+    estado = {}
+    for pasta, padroes in alvos:
+        for padrao in padroes:
+            for p in Path(pasta).glob(padrao):
+                try:
+                    st = p.stat()
+                except OSError:
+                    continue  # removido entre o glob e o stat
+                estado[p] = (st.st_mtime_ns, st.st_size)
+    return estado
+
+
+def _diferencas(antes: dict, depois: dict) -> set[Path]:
+    return {p for p in antes.keys() | depois.keys() if antes.get(p) != depois.get(p)}
+
+
+def observar(alvos: list[tuple[Path, tuple[str, ...]]], ao_mudar,
+             intervalo: float = INTERVALO_PADRAO, espera: float = ESPERA_PADRAO):
+    """
+    Monitora os arquivos por varredura periódica (sem serviços externos) e
+    chama `ao_mudar(arquivos_alterados)` depois que uma rajada de mudanças
+    fica `espera` segundos sem novidades. Roda até Ctrl+C.
+    """
+    estado = estado_arquivos(alvos)
+    pendentes: set[Path] = set()
+    ultima_mudanca = 0.0
+
+    try:
+        while True:
+            time.sleep(intervalo)
+            novo = estado_arquivos(alvos)
+            mudados = _diferencas(estado, novo)
+            estado = novo
+
+            if mudados:
+                pendentes |= mudados
+                ultima_mudanca = time.monotonic()
+                continue
+
+            if pendentes and time.monotonic() - ultima_mudanca >= espera:
+                alterados, pendentes = pendentes, set()
+                ao_mudar(alterados)
+    except KeyboardInterrupt:
+        print("\nObservação encerrada.")
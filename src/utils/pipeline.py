@@ -0,0 +1,82 @@
+import asyncio
+from concurrent.futures import Executor
+
+# Leituras simultâneas (em montagens de rede, várias leituras em voo escondem a latência)
+LEITORES_PADRAO = 4
+
+
+def executar_pipeline(itens: list, ler, processar, executor: Executor,
+                      processadores: int = 1, tamanho_fila: int | None = None,
+                      leitores: int = LEITORES_PADRAO, ao_concluir=None) -> list[tuple]:
+    """
+    Executa ler -> processar -> concluir como um pipeline assíncrono.
+
+    - `ler(item)` roda em threads (E/S): até `leitores` leituras em paralelo;
+    - `processar(item, dados)` roda no `executor` (ex.: pool de processos),
+      com até `processadores` itens em processamento ao mesmo tempo;
+    - `ao_concluir(indice, item, resultado, erro)` é chamado no processo
+      principal à medida que cada item termina (ordem de término).
+
+    Entre as etapas há filas limitadas a `tamanho_fila` itens: se o
+    processamento atrasa, as leituras param de avançar (contrapressão), então
+    no máximo `tamanho_fila` arquivos lidos ficam esperando em memória. O
+    tempo total fica limitado pela etapa mais lenta, não pela soma delas.
+
+    Devolve [(resultado, erro), ...] na ordem de `itens`; `erro` é a exceção
+    levantada na leitura ou no processamento (ou None).
+    """
+    if not itens:
+        return []
+    tamanho_fila = tamanho_fila or 2 * processadores
+    return asyncio.run(_pipeline(itens, ler, processar, executor, processadores,
+                                 tamanho_fila, leitores, ao_concluir))
+
+
+async def _pipeline(itens, ler, processar, executor, processadores, tamanho_fila, leitores, ao_concluir):
+    loop = asyncio.get_running_loop()
+    a_ler = asyncio.Queue()
+    for i, item in enumerate(itens):
+        a_ler.put_nowait((i, item))
+    lidos = asyncio.Queue(maxsize=tamanho_fila)
+    prontos = asyncio.Queue(maxsize=tamanho_fila)
+    saidas = [None] * len(itens)
+
+    async def leitor():
+        while not a_ler.empty():
+            i, item = a_ler.get_nowait()
+            try:
+                dados, erro = await asyncio.to_thread(ler, item), None
+            except Exception as e:
+                dados, erro = None, e
+            await lidos.put((i, item, dados, erro))  # espera se a fila estiver cheia
+
+    async def processador():
+        while True:
+            msg = await lidos.get()
+            if msg is None:
+                return
+            i, item, dados, erro = msg
+            resultado = None
+            if erro is None:
+                try:
+                    resultado = await loop.run_in_executor(executor, processar, item, dados)
+                except Exception as e:
+                    erro = e
+            del dados, msg  # libera o conteúdo lido antes de esperar a próxima fila
+            await prontos.put((i, item, resultado, erro))
+
+    async def concluidor():
+        for _ in itens:
+            i, item, resultado, erro = await prontos.get()
+            saidas[i] = (resultado, erro)
+            if ao_concluir is not None:
+                ao_concluir(i, item, resultado, erro)
+
+    async def leitura():
+        await asyncio.gather(*(leitor() for _ in range(min(leitores, len(itens)))))
+        for _ in range(processadores):
+            await lidos.put(None)  # avisa cada processador que acabou
+
+    # um erro em `ao_concluir` encerra o gather; asyncio.run cancela o que sobrar
+    await asyncio.gather(leitura(), concluidor(), *(processador() for _ in range(processadores)))
+    return saidas
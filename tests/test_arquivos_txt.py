@@ -0,0 +1,23 @@
+from datetime import date
+
+from src.data.arquivos_txt import carregar_pontos_manuais
+
+
+def test_horarios_fora_da_faixa_sao_avisados_e_ignorados(tmp_path, capsys):
+    (tmp_path / "pontos_manuais.txt").write_text(
+        "2025-01-13;08:00;12:00;999:00;18:00\n"
+        "2025-01-14;08:00;12:70;-01:00;24:00\n"
+        "2025-01-15;08:00;12:00\n",
+        encoding="utf-8",
+    )
+    pontos = carregar_pontos_manuais(tmp_path)
+
+    assert pontos[date(2025, 1, 13)].entradas.tolist() == [8 * 60]
+    assert pontos[date(2025, 1, 13)].saidas.tolist() == [12 * 60, 18 * 60]
+    assert pontos[date(2025, 1, 14)].entradas.tolist() == [8 * 60]
+    assert pontos[date(2025, 1, 14)].saidas.tolist() == [24 * 60]
+    assert pontos[date(2025, 1, 15)].total_min == 4 * 60
+
+    avisos = capsys.readouterr().out
+    for t in ("999:00", "12:70", "-01:00"):
+        assert f": {t}" in avisos
@@ -0,0 +1,113 @@
+import random
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from src.regras.banco_horas import CAPACIDADE_INICIAL, BancoHoras
+
+
+def _dias(inicio: date, saldos: list[int]) -> tuple[list[date], list[int]]:
+    return [inicio + timedelta(days=k) for k in range(len(saldos))], saldos
+
+
+def test_banco_vazio():
+    banco = BancoHoras()
+    assert len(banco) == 0 and banco.saldo_final == 0
+    assert banco.saldo_em(date(2025, 1, 1)) == 0
+    assert banco.saldos_em([date(2025, 1, 1)]).tolist() == [0]
+
+
+def test_saldo_atravessa_a_virada_de_mes_e_de_ano():
+    banco = BancoHoras()
+    banco.estender(*_dias(date(2024, 12, 30), [30, -10]))   # 30 e 31/12
+    banco.estender(*_dias(date(2025, 1, 2), [60, 0, -20]))  # 02 a 04/01 (01/01 sem registro)
+    banco.estender(*_dias(date(2025, 1, 31), [5, 15]))      # 31/01 e 01/02
+
+    assert banco.saldo_em(date(2024, 12, 31)) == 20
+    assert banco.saldo_em(date(2025, 1, 1)) == 20  # dia sem registro mantém o anterior
+    assert banco.saldo_em(date(2025, 1, 4)) == 60
+    assert banco.saldo_em(date(2025, 1, 31)) == 65
+    assert banco.saldo_em(date(2025, 2, 1)) == 80
+    assert banco.saldo_final == 80
+    assert banco.saldo_entre(date(2025, 1, 1), date(2025, 1, 31)) == 45
+    assert banco.saldo_entre(date(2024, 12, 31), date(2025, 2, 1)) == 50
+
+
+def test_consultas_antes_do_primeiro_e_depois_do_ultimo_dia():
+    banco = BancoHoras.de_dias(*_dias(date(2025, 3, 10), [10, 20, 30]))
+    assert banco.saldo_em(date(2025, 3, 9)) == 0
+    assert banco.saldo_em(date(1999, 1, 1)) == 0
+    assert banco.saldo_em(date(2025, 3, 13)) == 60
+    assert banco.saldo_em(date(2030, 1, 1)) == 60
+    assert banco.saldo_entre(date(2025, 1, 1), date(2025, 3, 9)) == 0
+    assert banco.saldo_entre(date(2025, 3, 13), date(2025, 12, 31)) == 0
+    assert banco.saldo_entre(date(2025, 3, 12), date(2025, 3, 10)) == 0  # intervalo invertido
+    datas = np.array(["2025-03-01", "2025-03-11", "2026-01-01"], dtype="datetime64[D]")
+    assert banco.saldos_em(datas).tolist() == [0, 30, 60]
+
+
+def test_reprocessar_o_ultimo_mes_substitui_a_cauda():
+    banco = BancoHoras()
+    banco.estender(*_dias(date(2025, 1, 30), [10, 10, 10, 10]))  # até 02/02
+    banco.estender(*_dias(date(2025, 2, 1), [-5, -5, -5]))         # fevereiro de novo
+    assert len(banco) == 5
+    assert banco.saldo_em(date(2025, 1, 31)) == 20
+    assert banco.saldo_final == 5
+
+
+def test_reprocessar_um_mes_do_meio_mantem_os_seguintes():
+    banco = BancoHoras()
+    banco.estender(*_dias(date(2025, 1, 1), [10] * 31))
+    banco.estender(*_dias(date(2025, 2, 1), [20] * 28))
+    banco.estender(*_dias(date(2025, 3, 1), [30] * 31))
+
+    # janeiro refeito com um dia a menos e outro saldo
+    banco.estender(*_dias(date(2025, 1, 1), [-5] * 30), date(2025, 1, 1), date(2025, 1, 31))
+    assert len(banco) == 30 + 28 + 31
+    assert banco.saldo_em(date(2025, 1, 31)) == -150
+    assert banco.saldo_em(date(2025, 2, 28)) == -150 + 560
+    assert banco.saldo_final == -150 + 560 + 930
+
+    # fevereiro removido
+    banco.estender([], [], date(2025, 2, 1), date(2025, 2, 28))
+    assert len(banco) == 30 + 31
+    assert banco.saldo_entre(date(2025, 2, 1), date(2025, 2, 28)) == 0
+    assert banco.saldo_final == -150 + 930
+
+    copia = BancoHoras.de_acumulado(banco.datas, banco.acumulado)
+    assert copia.saldo_final == banco.saldo_final and len(copia) == len(banco)
+
+
+def test_dias_fora_do_periodo_em_estender():
+    with pytest.raises(ValueError):
+        BancoHoras().estender([date(2025, 2, 1)], [1], date(2025, 1, 1), date(2025, 1, 31))
+
+
+def test_dias_fora_de_ordem_em_estender():
+    with pytest.raises(ValueError):
+        BancoHoras().estender([date(2025, 1, 2), date(2025, 1, 1)], [1, 1])
+
+
+def test_equivale_a_somar_os_dias():
+    rng = random.Random(3)
+    inicio = date(2024, 1, 1)
+    datas = sorted(rng.sample([inicio + timedelta(days=k) for k in range(3 * CAPACIDADE_INICIAL)],
+                              2 * CAPACIDADE_INICIAL))
+    saldos = [rng.randint(-120, 120) for _ in datas]
+    saldos_originais = list(saldos)
+
+    banco = BancoHoras()
+    for ini in range(0, len(datas), 31):  # um "mês" por vez, obrigando os arrays a crescer
+        banco.estender(datas[ini:ini + 31], saldos[ini:ini + 31])
+    ordenado = BancoHoras.de_dias(datas[::-1], saldos[::-1])
+
+    # um trecho do meio refeito com outros saldos
+    meio = slice(len(datas) // 3, len(datas) // 3 + 31)
+    saldos[meio] = [rng.randint(-120, 120) for _ in saldos[meio]]
+    banco.estender(datas[meio], saldos[meio])
+
+    for d in (inicio - timedelta(days=1), *rng.sample(datas, 50), inicio + timedelta(days=4 * CAPACIDADE_INICIAL)):
+        esperado = sum(s for x, s in zip(datas, saldos) if x <= d)
+        assert banco.saldo_em(d) == BancoHoras.de_dias(datas, saldos).saldo_em(d) == esperado
+        assert ordenado.saldo_em(d) == sum(s for x, s in zip(datas, saldos_originais) if x <= d)
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from src.export.colunar import FORMATO_CSV, exportar_resultados
+
+
+def _resultado(ano: int, mes: int) -> dict:
+    dias = pd.DataFrame({
+        "data": np.array([f"{ano}-{mes:02d}-01"], dtype="datetime64[D]"),
+        "trabalhado_min": np.array([480], dtype=np.int64),
+    })
+    resumo = {"Total Trabalhado": 480, "Total Previsto": 480, "Saldo do dia": 0}
+    return {"ano": ano, "mes": mes, "sheet": f"{mes}/{ano}", "dias": dias, "resumo": resumo}
+
+
+def _arquivos(pasta) -> list[str]:
+    return sorted(str(p.relative_to(pasta)) for p in pasta.rglob("*") if p.is_file())
+
+
+def test_reexportar_remove_particoes_e_formatos_antigos(tmp_path):
+    # sobras de uma exportação anterior em outro formato, com um mês a mais e agregados
+    for relativo in ("dias/ano=2024/mes=12/dias.parquet", "dias/ano=2025/mes=01/dias.parquet",
+                     "totais.parquet", "agregados.parquet"):
+        (tmp_path / relativo).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / relativo).write_bytes(b"antigo")
+    (tmp_path / "dias" / "ano=2025" / "LEIAME.txt").write_text("do usuário")
+
+    exportar_resultados(tmp_path, [_resultado(2025, 1), _resultado(2025, 2)], FORMATO_CSV)
+
+    assert _arquivos(tmp_path) == [
+        "dias/ano=2025/LEIAME.txt",
+        "dias/ano=2025/mes=01/dias.csv",
+        "dias/ano=2025/mes=02/dias.csv",
+        "totais.csv",
+    ]
+    assert (tmp_path / "dias/ano=2025/mes=01/dias.csv").read_text(encoding="utf-8").splitlines() == [
+        "data,trabalhado_min", "2025-01-01,480"]
+
+
+def test_agregados_so_quando_pedidos(tmp_path):
+    agregados = pd.DataFrame({"granularidade": ["ano"], "chave": [2025]})
+    exportar_resultados(tmp_path, [_resultado(2025, 1)], FORMATO_CSV, agregados)
+    assert (tmp_path / "agregados.csv").exists()
+    exportar_resultados(tmp_path, [_resultado(2025, 1)], FORMATO_CSV)
+    assert not (tmp_path / "agregados.csv").exists()
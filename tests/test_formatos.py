@@ -0,0 +1,55 @@
+import random
+import re
+from datetime import date
+
+import pytest
+
+from benchmarks.gerar_dados import gerar_html_mes
+from src.parser.formatos import (FORMATO_CSV, FORMATO_WICKET, FormatoDesconhecido, detectar_formato,
+                                 extrair_horas_por_dia)
+from src.parser.html_parser import MODO_DOM, MODO_REGEX, MODO_STREAM
+
+
+def test_csv_com_e_sem_total(tmp_path):
+    arquivo = tmp_path / "01_2025.csv"
+    arquivo.write_text("Data;Entrada;Saída;Total\n"
+                       "13/01/2025;08:02;12:14;04:12\n"
+                       "13/01/2025;13:00;17:30;\n"
+                       "14/01/2025;22:00;02:00;\n", encoding="utf-8")
+    assert detectar_formato(arquivo) == FORMATO_CSV
+
+    dias = extrair_horas_por_dia(arquivo)
+    assert dias[date(2025, 1, 13)].entradas.tolist() == [8 * 60 + 2, 13 * 60]
+    assert dias[date(2025, 1, 13)].total_min == 4 * 60 + 12 + 4 * 60 + 30
+    assert dias[date(2025, 1, 14)].total_min == 4 * 60  # atravessa a meia-noite
+
+
+def test_csv_com_virgula_e_sem_acento():
+    conteudo = "\ufeffdata,entrada,SAIDA\r\n02/01/2025,08:00,12:00\r\n".encode("utf-8")
+    assert detectar_formato("x.csv", conteudo) == FORMATO_CSV
+    assert extrair_horas_por_dia("x.csv", conteudo=conteudo)[date(2025, 1, 2)].total_min == 4 * 60
+
+
+def test_html_salvo_sem_os_scripts_do_portal():
+    html = gerar_html_mes(2025, 3, random.Random(1)).encode("utf-8")
+    sem_scripts = re.sub(rb'\s(?:xmlns:wicket|onblur|onclick)="[^"]*"', b"", html)
+    assert not re.search(rb"wicket", sem_scripts, re.I)
+    assert detectar_formato("03_2025.html", sem_scripts) == FORMATO_WICKET
+
+    resultados = [extrair_horas_por_dia("03_2025.html", modo, sem_scripts)
+                  for modo in (MODO_STREAM, MODO_DOM, MODO_REGEX)]
+    assert resultados[0] and all(r == resultados[0] for r in resultados)
+    assert resultados[0] == extrair_horas_por_dia("03_2025.html", conteudo=html)
+
+
+@pytest.mark.parametrize("conteudo", [
+    b"qualquer coisa\n",
+    b"<!DOCTYPE html>\n<html><head><title>Outra coisa</title></head><body><p>Ol\xc3\xa1</p></body></html>\n",
+])
+def test_arquivo_que_nao_e_folha_de_ponto_e_recusado(tmp_path, conteudo):
+    arquivo = tmp_path / "02_2025.html"
+    arquivo.write_bytes(conteudo)
+    with pytest.raises(FormatoDesconhecido):
+        detectar_formato(arquivo)
+    with pytest.raises(FormatoDesconhecido):
+        extrair_horas_por_dia(arquivo)
@@ -0,0 +1,71 @@
+import random
+from datetime import date, timedelta
+
+import numpy as np
+
+from src.data.intervalos import ListaIntervalos
+
+
+def test_sobrepostos_e_vizinhos_sao_unidos():
+    lista = ListaIntervalos([
+        (date(2025, 1, 10), date(2025, 1, 5)),   # invertido
+        (date(2025, 1, 8), date(2025, 1, 12)),   # sobreposto
+        (date(2025, 1, 13), date(2025, 1, 13)),  # vizinho
+        (date(2025, 1, 15), date(2025, 1, 16)),  # separado por um dia
+    ])
+    assert lista.intervalos() == [(date(2025, 1, 5), date(2025, 1, 13)),
+                                  (date(2025, 1, 15), date(2025, 1, 16))]
+    assert len(lista) == 11
+    assert date(2025, 1, 14) not in lista
+    assert date(2025, 1, 13) in lista and date(2025, 1, 15) in lista
+
+
+def test_vazia():
+    lista = ListaIntervalos()
+    assert not lista and len(lista) == 0
+    assert date(2025, 1, 1) not in lista
+    assert lista.no_periodo(date(2025, 1, 1), date(2025, 12, 31)) == []
+    assert not lista.mascara_mes(2025, 2).any()
+    assert not lista.mascara_datas(np.array(["2025-01-01"], dtype="datetime64[D]")).any()
+
+
+def test_no_periodo_recorta_nas_viradas_de_mes_e_ano():
+    lista = ListaIntervalos([(date(2024, 12, 20), date(2025, 1, 10)),
+                             (date(2025, 1, 31), date(2025, 2, 1))])
+    assert lista.no_periodo(date(2024, 12, 1), date(2024, 12, 31)) == [(date(2024, 12, 20), date(2024, 12, 31))]
+    assert lista.no_periodo(date(2025, 1, 1), date(2025, 1, 31)) == [(date(2025, 1, 1), date(2025, 1, 10)),
+                                                                     (date(2025, 1, 31), date(2025, 1, 31))]
+    assert lista.no_periodo(date(2025, 2, 1), date(2025, 2, 28)) == [(date(2025, 2, 1), date(2025, 2, 1))]
+    assert lista.no_periodo(date(2025, 1, 11), date(2025, 1, 30)) == []
+
+
+def test_mascara_mes_nas_bordas():
+    lista = ListaIntervalos([(date(2024, 2, 28), date(2024, 3, 1)), (date(2024, 12, 31), date(2025, 1, 1))])
+    fev = lista.mascara_mes(2024, 2)  # ano bissexto
+    assert len(fev) == 29 and np.flatnonzero(fev).tolist() == [27, 28]
+    assert np.flatnonzero(lista.mascara_mes(2024, 3)).tolist() == [0]
+    assert np.flatnonzero(lista.mascara_mes(2024, 12)).tolist() == [30]
+    assert np.flatnonzero(lista.mascara_mes(2025, 1)).tolist() == [0]
+
+
+def test_equivale_a_um_conjunto_de_datas():
+    rng = random.Random(7)
+    inicio = date(2024, 11, 1)
+    for _ in range(50):
+        intervalos = []
+        for _ in range(rng.randint(0, 8)):
+            a = inicio + timedelta(days=rng.randrange(120))
+            intervalos.append((a, a + timedelta(days=rng.randrange(6))))
+        lista = ListaIntervalos(intervalos)
+        conjunto = {a + timedelta(days=k) for a, b in intervalos for k in range((b - a).days + 1)}
+
+        assert len(lista) == len(conjunto)
+        assert list(lista) == sorted(conjunto)
+
+        datas = [inicio + timedelta(days=k) for k in range(-3, 125)]
+        assert [d in lista for d in datas] == [d in conjunto for d in datas]
+        assert lista.mascara_datas(np.array(datas, dtype="datetime64[D]")).tolist() == [d in conjunto for d in datas]
+        for ano, mes in ((2024, 11), (2024, 12), (2025, 1), (2025, 2)):
+            mascara = lista.mascara_mes(ano, mes)
+            assert [i + 1 for i in np.flatnonzero(mascara)] == sorted(d.day for d in conjunto
+                                                                      if (d.year, d.month) == (ano, mes))
@@ -0,0 +1,76 @@
+import os
+
+from src.data.intervalos import ListaIntervalos
+from src.utils import manifesto as modulo
+from src.utils.manifesto import Manifesto
+
+LISTAS = (ListaIntervalos(), ListaIntervalos(), ListaIntervalos(), ListaIntervalos(), {})
+
+
+def _planilha_registrada(tmp_path) -> tuple[Manifesto, str, object]:
+    m = Manifesto(tmp_path / "manifesto")
+    impressao = m.impressao_saida(LISTAS, [], None)
+    saida = tmp_path / "saida.xlsx"
+    saida.write_bytes(b"planilha")
+    m.registrar_saida(impressao, saida)
+    m.salvar()
+    return m, impressao, saida
+
+
+def test_mudanca_de_layout_invalida_a_planilha(tmp_path, monkeypatch):
+    m, impressao, saida = _planilha_registrada(tmp_path)
+    assert m.saida_inalterada(m.impressao_saida(LISTAS, [], None), saida)
+
+    monkeypatch.setattr(modulo, "VERSAO_PLANILHA", modulo.VERSAO_PLANILHA + 1)
+    assert not m.saida_inalterada(m.impressao_saida(LISTAS, [], None), saida)
+
+
+def test_planilha_alterada_por_fora_e_regravada(tmp_path):
+    m, impressao, saida = _planilha_registrada(tmp_path)
+    assert Manifesto(tmp_path / "manifesto").saida_inalterada(impressao, saida)
+
+    saida.write_bytes(b"planilha editada")
+    assert not Manifesto(tmp_path / "manifesto").saida_inalterada(impressao, saida)
+
+    saida.write_bytes(b"planilha")  # mesmo tamanho, mtime diferente
+    os.utime(saida, ns=(0, 0))
+    assert not m.saida_inalterada(impressao, saida)
+
+    saida.unlink()
+    assert not m.saida_inalterada(impressao, saida)
+
+
+def test_descartar_saida(tmp_path):
+    _, impressao, saida = _planilha_registrada(tmp_path)
+    Manifesto(tmp_path / "manifesto").descartar_saida()
+    assert not Manifesto(tmp_path / "manifesto").saida_inalterada(impressao, saida)
+
+
+def _resultado(ano: int, mes: int, saldos: list[int], impressao: str) -> dict:
+    import pandas as pd
+
+    datas = pd.date_range(f"{ano:04d}-{mes:02d}-01", periods=len(saldos), freq="D")
+    return {"ano": ano, "mes": mes, "impressao": impressao,
+            "dias": pd.DataFrame({"data": datas, "saldo_min": saldos})}
+
+
+def test_banco_de_horas_troca_so_os_meses_alterados(tmp_path, monkeypatch):
+    resultados = [_resultado(2025, 1, [10] * 31, "jan"), _resultado(2025, 2, [20] * 28, "fev"),
+                  _resultado(2025, 3, [30] * 31, "mar")]
+    m = Manifesto(tmp_path / "manifesto")
+    assert m.banco_horas(resultados).saldo_final == 310 + 560 + 930
+    m.salvar()
+
+    chamados = []
+    original = modulo.BancoHoras.estender
+    monkeypatch.setattr(modulo.BancoHoras, "estender",
+                        lambda self, datas, *args: chamados.append(len(datas)) or original(self, datas, *args))
+
+    resultados[1] = _resultado(2025, 2, [-10] * 28, "fev2")
+    banco = Manifesto(tmp_path / "manifesto").banco_horas(resultados)
+    assert chamados == [28]
+    assert banco.saldo_em(modulo.date(2025, 2, 28)) == 310 - 280
+    assert banco.saldo_final == 310 - 280 + 930
+
+    banco = Manifesto(tmp_path / "manifesto").banco_horas(resultados[:2])  # março saiu
+    assert banco.saldo_final == 310 - 280
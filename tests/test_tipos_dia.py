@@ -0,0 +1,120 @@
+import itertools
+from datetime import date
+
+import numpy as np
+import pytest
+
+from src.data.intervalos import ListaIntervalos
+from src.data.registro_dia import RegistroDia
+from src.regras.regras_negocio import classificar_mes
+from src.regras.tipos_dia import (
+    CARGA_DIARIA_PADRAO, CARGA_MEIO_EXPEDIENTE, REGRAS_COMPILADAS, REGRAS_DIA, RegrasCompiladas,
+)
+
+FLAGS = [r["flag"] for r in REGRAS_DIA if r["flag"] is not None]
+
+
+def _primeira_regra(ligadas: set[str]) -> str:
+    """Referência: cascata de ifs na ordem da tabela."""
+    for r in REGRAS_DIA:
+        if r["flag"] is None or r["flag"] in ligadas:
+            return r["tipo"]
+
+
+def test_todas_as_combinacoes_seguem_a_ordem_da_tabela():
+    combinacoes = list(itertools.product((False, True), repeat=len(FLAGS)))
+    mascaras = {flag: np.array([c[i] for c in combinacoes]) for i, flag in enumerate(FLAGS)}
+
+    tipos = REGRAS_COMPILADAS.tipo[REGRAS_COMPILADAS.classificar(mascaras)]
+
+    esperado = [_primeira_regra({f for f, ligada in zip(FLAGS, c) if ligada}) for c in combinacoes]
+    assert tipos.tolist() == esperado
+
+
+@pytest.mark.parametrize("ligadas, tipo", [
+    ({"ajuste", "ferias", "feriado"}, "Ajuste manual"),
+    ({"ferias", "atestado", "feriado"}, "Férias"),
+    ({"ferias", "fds"}, "Férias"),
+    ({"fds", "atestado"}, "Final de Semana"),
+    ({"cinzas", "feriado"}, "Quarta-feira de Cinzas"),
+    ({"feriado", "atestado", "abono"}, "Feriado"),
+    ({"atestado", "abono", "aniversario"}, "Atestado"),
+    ({"abono", "aniversario"}, "Abono"),
+    ({"aniversario"}, "Aniversário"),
+    (set(), "Normal"),
+])
+def test_precedencia(ligadas, tipo):
+    mascaras = {flag: np.array([flag in ligadas]) for flag in FLAGS}
+    regra = REGRAS_COMPILADAS.classificar(mascaras)
+    assert REGRAS_COMPILADAS.tipo[regra][0] == tipo
+
+
+def test_flags_ausentes_contam_como_falsas():
+    regra = REGRAS_COMPILADAS.classificar({"abono": np.array([True, False])})
+    assert REGRAS_COMPILADAS.tipo[regra].tolist() == ["Abono", "Normal"]
+
+
+def test_tabela_sem_regra_padrao():
+    with pytest.raises(ValueError):
+        RegrasCompiladas([r for r in REGRAS_DIA if r["flag"] is not None])
+
+
+# ---- classificar_mes: listas reais sobre o calendário ----
+
+def _folha(pasta, nome: str, linhas: list[str]):
+    arquivo = pasta / nome
+    arquivo.write_text("Data;Entrada;Saída;Total\n" + "\n".join(linhas) + "\n", encoding="utf-8")
+    return arquivo
+
+
+def _por_data(c: dict) -> dict:
+    ano, mes = c["ano"], c["mes"]
+    return {date(ano, mes, int(i) + 1): (str(t), int(carga), int(saldo))
+            for i, t, carga, saldo in zip(c["sel"], c["tipo"], c["carga"], c["saldo"])}
+
+
+@pytest.fixture
+def listas():
+    ferias = ListaIntervalos([(date(2024, 12, 30), date(2025, 1, 3))])  # atravessa a virada do ano
+    atestados = ListaIntervalos([(date(2025, 1, 1), date(2025, 1, 1)),
+                                 (date(2025, 1, 6), date(2025, 1, 7)),
+                                 (date(2025, 1, 11), date(2025, 1, 11))])
+    aniversario = ListaIntervalos.de_datas([date(2025, 1, 7), date(2025, 1, 9)])
+    abonos = ListaIntervalos.de_datas([date(2025, 1, 8)])
+    manuais = {date(2025, 1, 2): RegistroDia([8 * 60], [12 * 60], 4 * 60)}
+    return ferias, atestados, aniversario, abonos, manuais
+
+
+def test_classificar_mes_precedencia_nas_bordas_do_ano(tmp_path, listas):
+    janeiro = _folha(tmp_path, "01_2025.csv", [
+        "02/01/2025;08:00;17:00;09:00",
+        "10/01/2025;08:00;12:00;04:00",
+        "11/01/2025;09:00;10:00;01:00",
+    ])
+    dias = _por_data(classificar_mes(janeiro, *listas))
+
+    assert dias[date(2025, 1, 1)][0] == "Férias"          # férias > feriado > atestado
+    assert dias[date(2025, 1, 2)][0] == "Ajuste manual"   # ajuste > férias
+    assert dias[date(2025, 1, 3)][0] == "Férias"
+    assert dias[date(2025, 1, 4)] == ("Final de Semana", 0, 0)  # logo depois das férias
+    assert dias[date(2025, 1, 6)] == ("Atestado", CARGA_DIARIA_PADRAO, 0)
+    assert dias[date(2025, 1, 7)][0] == "Atestado"        # atestado > aniversário
+    assert dias[date(2025, 1, 8)] == ("Abono", CARGA_DIARIA_PADRAO, 0)
+    assert dias[date(2025, 1, 9)] == ("Aniversário", CARGA_MEIO_EXPEDIENTE, -CARGA_MEIO_EXPEDIENTE)
+    assert dias[date(2025, 1, 10)] == ("Normal", CARGA_DIARIA_PADRAO, -4 * 60)
+    assert dias[date(2025, 1, 11)] == ("Final de Semana", 0, 60)  # fim de semana > atestado
+
+    dezembro = _folha(tmp_path, "12_2024.csv", ["27/12/2024;08:00;16:00;08:00"])
+    dias = _por_data(classificar_mes(dezembro, *listas))
+    assert dias[date(2024, 12, 27)] == ("Normal", CARGA_DIARIA_PADRAO, 0)
+    assert [dias[date(2024, 12, d)][0] for d in (30, 31)] == ["Férias", "Férias"]
+    assert max(dias) == date(2024, 12, 31)
+
+
+def test_classificar_mes_cinzas_e_carnaval(tmp_path):
+    # 2025: carnaval em 03-04/03, Cinzas em 05/03
+    marco = _folha(tmp_path, "03_2025.csv", ["05/03/2025;13:00;17:00;04:00"])
+    vazias = (ListaIntervalos(),) * 4
+    dias = _por_data(classificar_mes(marco, *vazias, {}))
+    assert dias[date(2025, 3, 4)][0] == "Feriado"
+    assert dias[date(2025, 3, 5)] == ("Quarta-feira de Cinzas", CARGA_MEIO_EXPEDIENTE, 0)
@@ -0,0 +1,59 @@
+from datetime import date
+
+from src.data.intervalos import ListaIntervalos
+from src.data.registro_dia import RegistroDia
+from src.regras.validacao import (
+    PROBLEMA_FERIAS, PROBLEMA_IMPAR, PROBLEMA_NEGATIVO, PROBLEMA_SOBREPOSTO, PROBLEMA_TOTAL, verificar_batidas,
+)
+
+
+def _h(hhmm: str) -> int:
+    h, m = hhmm.split(":")
+    return int(h) * 60 + int(m)
+
+
+def _dia(pares: list[tuple[str, str]], total: str) -> RegistroDia:
+    return RegistroDia([_h(e) for e, _ in pares], [_h(s) for _, s in pares], _h(total))
+
+
+def _problemas(*registros: RegistroDia, ferias=None) -> list[tuple[int, str]]:
+    datas = [date(2025, 6, k + 1) for k in range(len(registros))]
+    anomalias = verificar_batidas(datas, ["html"] * len(registros), list(registros), ferias)
+    return sorted((a["data"].day, a["problema"]) for a in anomalias)
+
+
+def test_periodo_que_atravessa_a_meia_noite_nao_e_anomalia():
+    assert _problemas(
+        _dia([("22:00", "02:00")], "04:00"),
+        # como no portal, a virada pode vir antes dos outros períodos do dia
+        _dia([("22:00", "02:00"), ("08:00", "12:00"), ("13:00", "17:00")], "12:00"),
+    ) == []
+
+
+def test_periodos_fora_de_ordem_sem_sobreposicao():
+    assert _problemas(_dia([("13:00", "17:00"), ("08:00", "12:00")], "08:00")) == []
+
+
+def test_virada_sobreposta_a_outro_periodo():
+    # batidas reais de 03/06/2025: 15:37-00:05 cobre 20:01-23:29 (e começa antes de 17:33)
+    assert _problemas(
+        _dia([("15:37", "00:05"), ("08:36", "12:58"), ("14:00", "17:33"), ("20:01", "23:29")], "19:51"),
+    ) == [(1, PROBLEMA_SOBREPOSTO)]
+
+
+def test_periodo_invertido():
+    assert _problemas(
+        _dia([("12:00", "08:00")], "00:00"),                      # não bate com a leitura de virada
+        _dia([("12:00", "08:00"), ("18:00", "13:00")], "38:00"),  # duas viradas no mesmo dia
+    ) == [(1, PROBLEMA_NEGATIVO), (2, PROBLEMA_NEGATIVO)]
+
+
+def test_demais_regras():
+    assert _problemas(
+        _dia([("08:00", "12:00")], "04:00"),
+        RegistroDia([_h("08:00"), _h("13:00")], [_h("12:00")], _h("04:00")),
+        _dia([("08:00", "12:00"), ("11:00", "17:00")], "10:00"),
+        _dia([("08:00", "12:00")], "05:00"),
+        _dia([("08:00", "12:00")], "04:00"),
+        ferias=ListaIntervalos([(date(2025, 6, 5), date(2025, 6, 10))]),
+    ) == [(2, PROBLEMA_IMPAR), (3, PROBLEMA_SOBREPOSTO), (4, PROBLEMA_TOTAL), (5, PROBLEMA_FERIAS)]